@@ -0,0 +1,13 @@
+"""Throughput benchmarks for deapplefy that run anywhere (including Linux).
+
+    python -m benchmarks --frameworks 200 --apps 40 --latency 0.002 --jobs 4
+
+A synthetic corpus (see `corpus`) and stand-in tools (see `tools`) replace
+the macOS framework tree and radare2/class-dump, so regressions in scanning,
+discovery, the analyzers and the full pipeline show up without a Mac.
+"""
+
+from .corpus import MachOBuilder, fat_macho, generate
+from .tools import install_tools, tool_environment
+
+__all__ = ["MachOBuilder", "fat_macho", "generate", "install_tools", "tool_environment"]
@@ -0,0 +1,165 @@
+"""Benchmark runner: `python -m benchmarks [options]`"""
+
+import argparse
+import gc
+import json
+import logging
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import List, Dict, Any, Callable
+
+import deapplefy
+from deapplefy import FileSnapshot, FrameworkScanner, StaticAnalyzer, UsageAnalyzer, RuntimeAnalyzer, RecordSpool
+
+from .corpus import generate
+from .tools import install_tools, tool_environment
+
+
+def _peak_rss_mb(who: int = resource.RUSAGE_SELF) -> float:
+    rss = resource.getrusage(who).ru_maxrss
+    return round(rss / ((1 << 20) if sys.platform == "darwin" else (1 << 10)), 1)
+
+
+def measure(name: str, items: int, fn: Callable[[], Any], heap: bool = False) -> Dict[str, Any]:
+    """Time one benchmark stage; optionally track the Python heap peak"""
+    gc.collect()
+    if heap:
+        tracemalloc.start()
+    start = time.perf_counter()
+    fn()
+    seconds = time.perf_counter() - start
+    result = {
+        "name": name,
+        "items": items,
+        "seconds": round(seconds, 4),
+        "per_sec": round(items / seconds, 1) if seconds > 0 else None,
+        "peak_rss_mb": _peak_rss_mb(),
+        "children_peak_rss_mb": _peak_rss_mb(resource.RUSAGE_CHILDREN),
+    }
+    if heap:
+        result["heap_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / (1 << 20), 2)
+        tracemalloc.stop()
+    return result
+
+
+def run(args: argparse.Namespace, workdir: Path) -> List[Dict[str, Any]]:
+    corpus_root = workdir / "corpus"
+    results = []
+    corpus: Dict[str, Any] = {}
+
+    def make_corpus():
+        corpus.update(generate(corpus_root, args.frameworks, args.apps, args.classes, args.methods,
+                               args.fat_every, args.seed))
+    results.append(measure("generate corpus", args.frameworks + args.apps, make_corpus))
+
+    os.environ.update(tool_environment(install_tools(workdir / "bin", args.latency)))
+    # Point the layers at the corpus instead of the host's system locations
+    FrameworkScanner.FRAMEWORK_PATHS = corpus["framework_paths"]
+    UsageAnalyzer.SCAN_PATHS = corpus["app_paths"]
+    deapplefy.DyldSharedCache.current = None
+
+    # One crawl shared by every layer, as in main()
+    snapshot = FileSnapshot()
+    results.append(measure("FileSnapshot.crawl", args.frameworks + args.apps,
+                           lambda: snapshot.crawl({**FrameworkScanner.crawl_roots(), **UsageAnalyzer.crawl_roots()}),
+                           args.heap))
+
+    frameworks: List[Path] = []
+    results.append(measure("FrameworkScanner.scan", args.frameworks,
+                           lambda: frameworks.extend(FrameworkScanner(snapshot).scan()), args.heap))
+
+    scanner = FrameworkScanner(snapshot)
+    binaries: Dict[Path, Path] = {}
+
+    def discover():
+        for framework in frameworks:
+            binaries[framework] = scanner.get_binary_path(framework)
+    results.append(measure("get_binary_path", len(frameworks), discover, args.heap))
+    missing = [f.name for f, b in binaries.items() if b is None]
+    if missing:
+        raise RuntimeError(f"no binary discovered for {len(missing)} frameworks, e.g. {missing[0]}")
+
+    static = StaticAnalyzer(snapshot)
+    static_results: Dict[Path, Dict[str, Any]] = {}
+
+    def run_static():
+        for framework in frameworks:
+            static_results[framework] = static.analyze(framework, binaries[framework])
+    results.append(measure("StaticAnalyzer.analyze", len(frameworks), run_static, args.heap))
+
+    usage = UsageAnalyzer(snapshot=snapshot)
+    results.append(measure("UsageIndex.build", args.apps, usage.get_index, args.heap))
+
+    def run_usage():
+        for framework in frameworks:
+            RecordSpool.discard_all({"usage": usage.analyze(framework.stem, static_results[framework])})
+    results.append(measure("UsageAnalyzer.analyze", len(frameworks), run_usage, args.heap))
+
+    runtime = RuntimeAnalyzer(scanner)
+
+    def run_runtime():
+        for framework in frameworks:
+            RecordSpool.discard_all({"runtime": runtime.analyze(framework)})
+    try:
+        results.append(measure("RuntimeAnalyzer.analyze", len(frameworks), run_runtime, args.heap))
+    finally:
+        runtime.close()
+    RecordSpool.discard_all(static_results)
+    static_results.clear()
+
+    main_argv = ["-o", str(workdir / "site" / "data"), "--no-dyld-cache", "--no-cache", "--jobs", str(args.jobs)]
+    results.append(measure(f"main() --jobs {args.jobs}", len(frameworks),
+                           lambda: deapplefy.main(main_argv)))
+    return results
+
+
+def print_report(results: List[Dict[str, Any]]):
+    print(f"{'benchmark':<28} {'items':>7} {'seconds':>9} {'items/s':>10} {'rss MB':>8} {'child MB':>9} {'heap MB':>8}")
+    for r in results:
+        per_sec = f"{r['per_sec']:.1f}" if r["per_sec"] is not None else "-"
+        heap = f"{r['heap_peak_mb']:.2f}" if "heap_peak_mb" in r else "-"
+        print(f"{r['name']:<28} {r['items']:>7} {r['seconds']:>9.3f} {per_sec:>10} "
+              f"{r['peak_rss_mb']:>8.1f} {r['children_peak_rss_mb']:>9.1f} {heap:>8}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmark deapplefy on a synthetic corpus")
+    parser.add_argument("--frameworks", "-n", type=int, default=100, help="Frameworks to generate")
+    parser.add_argument("--apps", type=int, default=20, help="Consumer .app bundles to generate")
+    parser.add_argument("--classes", type=int, default=20, help="Max ObjC classes per framework")
+    parser.add_argument("--methods", type=int, default=8, help="Methods per class")
+    parser.add_argument("--fat-every", type=int, default=3, help="Make every Nth framework binary universal (0=none)")
+    parser.add_argument("--seed", type=int, default=0, help="Corpus random seed")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds each stand-in tool call sleeps")
+    parser.add_argument("--jobs", "-j", type=int, default=1, help="--jobs for the full main() run")
+    parser.add_argument("--heap", action="store_true", help="Also report the Python heap peak (slows stages down)")
+    parser.add_argument("--workdir", type=Path, help="Keep the corpus and output here instead of a temp dir")
+    parser.add_argument("--json", type=Path, help="Write results as JSON to this file")
+    parser.add_argument("--verbose", "-v", action="store_true", help="Keep deapplefy's INFO logging")
+    args = parser.parse_args(argv)
+
+    if not args.verbose:
+        deapplefy.logger.setLevel(logging.WARNING)
+
+    workdir = args.workdir or Path(tempfile.mkdtemp(prefix="deapplefy-bench-"))
+    try:
+        results = run(args, workdir)
+    finally:
+        if args.workdir is None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print_report(results)
+    if args.json:
+        args.json.write_text(json.dumps({"config": {k: str(v) for k, v in vars(args).items()},
+                                         "results": results}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
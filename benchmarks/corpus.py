@@ -0,0 +1,423 @@
+"""Synthetic framework corpus for benchmarks.
+
+Generates a directory tree shaped like the macOS locations deapplefy scans:
+versioned `.framework` bundles under `System/Library/PrivateFrameworks` with
+small but well-formed Mach-O binaries (thin or fat, with Objective-C class
+metadata and a symbol table), binary and XML plists and CodeResources, plus
+consumer `.app` bundles under `Applications` that link against them.
+"""
+
+import os
+import random
+import hashlib
+import plistlib
+import struct
+from pathlib import Path
+from typing import List, Dict, Optional, Any, Tuple
+
+MH_MAGIC_64 = 0xfeedfacf
+FAT_MAGIC = 0xcafebabe
+MH_EXECUTE = 0x2
+MH_DYLIB = 0x6
+CPU_TYPE_X86_64 = 0x01000007
+CPU_TYPE_ARM64 = 0x0100000c
+CPU_SUBTYPE_X86_64_ALL = 3
+CPU_SUBTYPE_ARM64_ALL = 0
+
+LC_SYMTAB = 0x2
+LC_LOAD_DYLIB = 0xc
+LC_ID_DYLIB = 0xd
+LC_SEGMENT_64 = 0x19
+LC_DYLD_INFO_ONLY = 0x80000022
+LC_DYLD_CHAINED_FIXUPS = 0x80000034
+DYLD_CHAINED_PTR_64_OFFSET = 6
+DYLD_CHAINED_IMPORT = 1
+
+PAGE = 0x4000
+BASE_ADDRESS = 0x100000000
+METHOD_TYPES = ["v16@0:8", "@16@0:8", "v24@0:8@16", "B24@0:8@16", "q16@0:8"]
+
+
+def _align(value: int, alignment: int) -> int:
+    return (value + alignment - 1) // alignment * alignment
+
+
+def _uleb128(value: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = value & 0x7f
+        value >>= 7
+        out.append(byte | (0x80 if value else 0))
+        if not value:
+            return bytes(out)
+
+
+class MachOBuilder:
+    """Assembles a small 64-bit Mach-O dylib or executable.
+
+    Produces the pieces deapplefy reads: segments, LC_ID_DYLIB/LC_LOAD_DYLIB,
+    a symbol table, and Objective-C class metadata in __DATA whose external
+    superclasses are bound via dyld-info bind opcodes, or with `chained=True`
+    via LC_DYLD_CHAINED_FIXUPS (DYLD_CHAINED_PTR_64_OFFSET rebases and binds).
+    Consumers can also carry __objc_selrefs and __objc_classrefs; class refs
+    to classes not defined here are bound the same way.
+    """
+
+    def __init__(self, filetype: int = MH_DYLIB, cputype: int = CPU_TYPE_ARM64,
+                 cpusubtype: int = CPU_SUBTYPE_ARM64_ALL, install_name: Optional[str] = None,
+                 chained: bool = False):
+        self.filetype = filetype
+        self.cputype = cputype
+        self.cpusubtype = cpusubtype
+        self.install_name = install_name
+        self.chained = chained
+        self.libraries: List[str] = []
+        self.symbols: List[Tuple[str, bool]] = []
+        self.classes: List[Tuple[str, str, List[str], List[str]]] = []
+        self.selector_refs: List[str] = []
+        self.class_refs: List[str] = []
+        # Filled by build(): pointer slot address -> target address, or symbol name for binds
+        self.fixups: Dict[int, Any] = {}
+
+    def add_library(self, path: str):
+        self.libraries.append(path)
+
+    def add_symbol(self, name: str, defined: bool = True):
+        self.symbols.append((name, defined))
+
+    def add_class(self, name: str, superclass: str = "NSObject", methods: List[str] = (),
+                  class_methods: List[str] = ()):
+        """Add an ObjC class; a superclass not defined here is bound by name"""
+        self.classes.append((name, superclass, list(methods), list(class_methods)))
+        self.add_symbol(f"_OBJC_CLASS_$_{name}")
+        self.add_symbol(f"_OBJC_METACLASS_$_{name}")
+
+    def add_selector_ref(self, selector: str):
+        self.selector_refs.append(selector)
+
+    def add_class_ref(self, name: str):
+        self.class_refs.append(name)
+
+    def _load_commands_size(self) -> int:
+        size = 3 * 72 + (2 + bool(self.selector_refs) + bool(self.class_refs)) * 80 + (16 if self.chained else 48) + 24
+        names = ([self.install_name] if self.install_name else []) + self.libraries
+        return size + sum(24 + _align(len(n) + 1, 8) for n in names)
+
+    def build(self) -> bytes:
+        # __TEXT: header, load commands, then C strings (class and selector names)
+        text = bytearray()
+        strings: Dict[str, int] = {}
+        text_start = _align(32 + self._load_commands_size(), 16)
+
+        def cstring(value: str) -> int:
+            if value not in strings:
+                strings[value] = BASE_ADDRESS + text_start + len(text)
+                text.extend(value.encode() + b"\0")
+            return strings[value]
+
+        for name, _superclass, methods, class_methods in self.classes:
+            cstring(name)
+            for i, selector in enumerate(methods + class_methods):
+                cstring(selector)
+                cstring(METHOD_TYPES[i % len(METHOD_TYPES)])
+        for selector in self.selector_refs:
+            cstring(selector)
+        text_size = _align(text_start + len(text), PAGE)
+
+        # __DATA: class list followed by class_t / class_ro_t / method lists
+        data_vm = BASE_ADDRESS + text_size
+        data = bytearray(8 * len(self.classes))
+        rebases: List[int] = []
+        binds: List[Tuple[int, str]] = []
+
+        def pointer(offset: int, target: int):
+            struct.pack_into("<Q", data, offset, target)
+            rebases.append(offset)
+
+        def alloc(size: int) -> int:
+            data.extend(b"\0" * (_align(len(data), 8) - len(data)))
+            offset = len(data)
+            data.extend(b"\0" * size)
+            return offset
+
+        def method_list(selectors: List[str]) -> int:
+            if not selectors:
+                return 0
+            offset = alloc(8 + 24 * len(selectors))
+            struct.pack_into("<2I", data, offset, 24, len(selectors))
+            for i, selector in enumerate(selectors):
+                entry = offset + 8 + 24 * i
+                pointer(entry, strings[selector])
+                pointer(entry + 8, strings[METHOD_TYPES[i % len(METHOD_TYPES)]])
+                pointer(entry + 16, BASE_ADDRESS)
+            return data_vm + offset
+
+        def class_ro(name: str, selectors: List[str], meta: bool) -> int:
+            offset = alloc(72)
+            struct.pack_into("<4I", data, offset, 1 if meta else 0, 8, 40 if meta else 16, 0)
+            pointer(offset + 24, strings[name])
+            methods = method_list(selectors)
+            if methods:
+                pointer(offset + 32, methods)
+            return data_vm + offset
+
+        local = {}
+        for name, *_rest in self.classes:
+            local[name] = (alloc(40), alloc(40))
+        for index, (name, superclass, methods, class_methods) in enumerate(self.classes):
+            cls, meta = local[name]
+            pointer(8 * index, data_vm + cls)
+            pointer(cls, data_vm + meta)
+            pointer(cls + 32, class_ro(name, methods, False))
+            pointer(meta + 32, class_ro(name, class_methods, True))
+            if superclass in local:
+                pointer(cls + 8, data_vm + local[superclass][0])
+            elif superclass:
+                binds.append((cls + 8, f"_OBJC_CLASS_$_{superclass}"))
+                self.add_symbol(f"_OBJC_CLASS_$_{superclass}", defined=False)
+        objc_data_end = len(data)
+
+        ref_sections = []
+        if self.selector_refs:
+            selrefs = alloc(8 * len(self.selector_refs))
+            for i, selector in enumerate(self.selector_refs):
+                pointer(selrefs + 8 * i, strings[selector])
+            ref_sections.append(("__objc_selrefs", data_vm + selrefs, 8 * len(self.selector_refs)))
+        if self.class_refs:
+            classrefs = alloc(8 * len(self.class_refs))
+            for i, name in enumerate(self.class_refs):
+                if name in local:
+                    pointer(classrefs + 8 * i, data_vm + local[name][0])
+                else:
+                    binds.append((classrefs + 8 * i, f"_OBJC_CLASS_$_{name}"))
+                    self.add_symbol(f"_OBJC_CLASS_$_{name}", defined=False)
+            ref_sections.append(("__objc_classrefs", data_vm + classrefs, 8 * len(self.class_refs)))
+        data_size = _align(max(len(data), 1), PAGE)
+
+        self.fixups = {data_vm + offset: struct.unpack_from("<Q", data, offset)[0] for offset in rebases}
+        self.fixups.update({data_vm + offset: symbol for offset, symbol in binds})
+
+        # __LINKEDIT: bind opcodes or chained fixups, nlist_64 entries, string table
+        if self.chained:
+            linkedit = self._chained_fixups(data, data_size, text_size, rebases, binds)
+        else:
+            linkedit = bytearray()
+            for offset, symbol in binds:
+                linkedit += bytes([0x11, 0x40]) + symbol.encode() + b"\0" + bytes([0x51, 0x71]) + _uleb128(offset)
+                linkedit.append(0x90)
+            linkedit.append(0)
+        bind_size = len(linkedit)
+        linkedit.extend(b"\0" * (_align(len(linkedit), 8) - len(linkedit)))
+
+        symbols = list(dict.fromkeys(self.symbols))
+        strtab = bytearray(b"\0")
+        symoff = len(linkedit)
+        for name, defined in symbols:
+            linkedit += struct.pack("<IBBHQ", len(strtab), 0xf if defined else 0x1, 1 if defined else 0, 0,
+                                    data_vm if defined else 0)
+            strtab += name.encode() + b"\0"
+        stroff = len(linkedit)
+        linkedit += strtab
+        linkedit_fileoff = text_size + data_size
+
+        # Load commands
+        def segment(name: bytes, vmaddr: int, vmsize: int, fileoff: int, filesize: int, prot: int,
+                    sections: List[Tuple[str, int, int]] = ()) -> bytes:
+            cmd = struct.pack("<2I16s4Q4I", LC_SEGMENT_64, 72 + 80 * len(sections), name, vmaddr, vmsize,
+                              fileoff, filesize, prot, prot, len(sections), 0)
+            for sectname, addr, size in sections:
+                cmd += struct.pack("<16s16s2Q8I", sectname.encode(), name, addr, size,
+                                   addr - vmaddr + fileoff, 3, 0, 0, 0, 0, 0, 0)
+            return cmd
+
+        def dylib(cmd: int, name: str) -> bytes:
+            body = name.encode() + b"\0"
+            body += b"\0" * (_align(len(body), 8) - len(body))
+            return struct.pack("<6I", cmd, 24 + len(body), 24, 2, 0x10000, 0x10000) + body
+
+        commands = [
+            segment(b"__TEXT", BASE_ADDRESS, text_size, 0, text_size, 5),
+            segment(b"__DATA", data_vm, data_size, text_size, data_size, 3,
+                    [("__objc_classlist", data_vm, 8 * len(self.classes)),
+                     ("__objc_data", data_vm + 8 * len(self.classes), objc_data_end - 8 * len(self.classes))]
+                    + ref_sections),
+            segment(b"__LINKEDIT", data_vm + data_size, _align(len(linkedit), PAGE), linkedit_fileoff,
+                    len(linkedit), 1),
+        ]
+        if self.install_name:
+            commands.append(dylib(LC_ID_DYLIB, self.install_name))
+        commands += [dylib(LC_LOAD_DYLIB, lib) for lib in self.libraries]
+        if self.chained:
+            commands.append(struct.pack("<4I", LC_DYLD_CHAINED_FIXUPS, 16, linkedit_fileoff, bind_size))
+        else:
+            commands.append(struct.pack("<12I", LC_DYLD_INFO_ONLY, 48, 0, 0, linkedit_fileoff, bind_size,
+                                        0, 0, 0, 0, 0, 0))
+        commands.append(struct.pack("<6I", LC_SYMTAB, 24, linkedit_fileoff + symoff, len(symbols),
+                                    linkedit_fileoff + stroff, len(strtab)))
+        body = b"".join(commands)
+        assert 32 + len(body) <= text_start
+
+        out = bytearray(linkedit_fileoff)
+        out[0:32] = struct.pack("<8I", MH_MAGIC_64, self.cputype, self.cpusubtype, self.filetype,
+                                len(commands), len(body), 0x100085, 0)
+        out[32:32 + len(body)] = body
+        out[text_start:text_start + len(text)] = text
+        out[text_size:text_size + len(data)] = data
+        return bytes(out + linkedit)
+
+    @staticmethod
+    def _chained_fixups(data: bytearray, data_size: int, segment_offset: int,
+                        rebases: List[int], binds: List[Tuple[int, str]]) -> bytearray:
+        """Encode every __DATA pointer as a DYLD_CHAINED_PTR_64_OFFSET fixup and build the fixups blob"""
+        imports = list(dict.fromkeys(symbol for _offset, symbol in binds))
+        slots = {offset: struct.unpack_from("<Q", data, offset)[0] - BASE_ADDRESS for offset in rebases}
+        slots.update({offset: (1 << 63) | imports.index(symbol) for offset, symbol in binds})
+
+        # Link each page's fixups into a chain (next is in 4-byte strides)
+        order = sorted(slots)
+        page_starts = [0xffff] * (data_size // PAGE)
+        for i, offset in enumerate(order):
+            page = offset // PAGE
+            if page_starts[page] == 0xffff:
+                page_starts[page] = offset % PAGE
+            following = order[i + 1] if i + 1 < len(order) else None
+            step = (following - offset) // 4 if following is not None and following // PAGE == page else 0
+            struct.pack_into("<Q", data, offset, slots[offset] | (step << 51))
+
+        # dyld_chained_starts_in_image for __TEXT, __DATA, __LINKEDIT; only __DATA has fixups
+        segment = struct.pack("<IHHQIH", 22 + 2 * len(page_starts), PAGE, DYLD_CHAINED_PTR_64_OFFSET,
+                              segment_offset, 0, len(page_starts))
+        segment += struct.pack(f"<{len(page_starts)}H", *page_starts)
+        starts = struct.pack("<4I", 3, 0, 16, 0) + segment
+        symbols = bytearray(b"\0")
+        import_table = bytearray()
+        for symbol in imports:
+            import_table += struct.pack("<I", (len(symbols) << 9) | 1)
+            symbols += symbol.encode() + b"\0"
+
+        starts_offset = 32
+        imports_offset = _align(starts_offset + len(starts), 4)
+        symbols_offset = imports_offset + len(import_table)
+        blob = bytearray(struct.pack("<7I", 0, starts_offset, imports_offset, symbols_offset, len(imports),
+                                     DYLD_CHAINED_IMPORT, 0))
+        blob += b"\0" * (starts_offset - len(blob)) + starts
+        blob += b"\0" * (imports_offset - len(blob)) + import_table + symbols
+        return blob
+
+
+def fat_macho(slices: List[Tuple[int, int, bytes]]) -> bytes:
+    """Wrap (cputype, cpusubtype, image) slices into a universal binary"""
+    header = struct.pack(">2I", FAT_MAGIC, len(slices))
+    offset = PAGE
+    body = bytearray()
+    for cputype, cpusubtype, image in slices:
+        header += struct.pack(">5I", cputype, cpusubtype, offset + len(body), len(image), 14)
+        body += image + b"\0" * (_align(len(image), PAGE) - len(image))
+    return header + b"\0" * (offset - len(header)) + bytes(body)
+
+
+def _code_resources(files: Dict[str, bytes]) -> Dict[str, Any]:
+    return {
+        "files": {name: hashlib.sha1(content).digest() for name, content in files.items()},
+        "files2": {name: {"hash2": hashlib.sha256(content).digest()} for name, content in files.items()},
+        "rules": {"^Resources/": True, "^.*\\.lproj/": {"optional": True, "weight": 1000.0}},
+    }
+
+
+def generate(root: Path, frameworks: int = 100, apps: int = 20, classes: int = 20, methods: int = 8,
+             fat_every: int = 3, seed: int = 0) -> Dict[str, Any]:
+    """Write a synthetic corpus under `root` and describe what was generated.
+
+    Every `fat_every`-th framework gets a universal (x86_64 + arm64) binary;
+    the rest are thin arm64. Each app links a random handful of frameworks,
+    references some of their classes and calls some of their selectors.
+    """
+    rng = random.Random(seed)
+    framework_root = root / "System" / "Library" / "PrivateFrameworks"
+    app_root = root / "Applications"
+    framework_root.mkdir(parents=True, exist_ok=True)
+    app_root.mkdir(parents=True, exist_ok=True)
+
+    catalog: List[Tuple[str, str, List[str]]] = []
+    total_bytes = 0
+    for index in range(frameworks):
+        name = f"Bench{index:05d}"
+        install_name = f"/System/Library/PrivateFrameworks/{name}.framework/Versions/A/{name}"
+        class_names = [f"{name}Class{c:03d}" for c in range(rng.randint(max(1, classes // 2), classes))]
+
+        def image(cputype: int, cpusubtype: int) -> bytes:
+            builder = MachOBuilder(MH_DYLIB, cputype, cpusubtype, install_name)
+            builder.add_library("/usr/lib/libobjc.A.dylib")
+            builder.add_library("/System/Library/Frameworks/Foundation.framework/Versions/C/Foundation")
+            for dependency in rng.sample(catalog, min(2, len(catalog))):
+                builder.add_library(dependency[1])
+            for c, class_name in enumerate(class_names):
+                superclass = class_names[c - 1] if c and c % 4 else "NSObject"
+                selectors = [f"method{m}WithValue:" if m % 2 else f"method{m}" for m in range(methods)]
+                builder.add_class(class_name, superclass, selectors, ["sharedInstance"])
+            for s in range(methods):
+                builder.add_symbol(f"_$s{len(name)}{name}{len('Swift')}SwiftC{s}yyF")
+            builder.add_symbol("_objc_msgSend", defined=False)
+            return builder.build()
+
+        version_dir = framework_root / f"{name}.framework" / "Versions" / "A"
+        resources = version_dir / "Resources"
+        resources.mkdir(parents=True, exist_ok=True)
+        if fat_every and index % fat_every == 0:
+            binary = fat_macho([(CPU_TYPE_X86_64, CPU_SUBTYPE_X86_64_ALL, image(CPU_TYPE_X86_64, CPU_SUBTYPE_X86_64_ALL)),
+                                (CPU_TYPE_ARM64, CPU_SUBTYPE_ARM64_ALL, image(CPU_TYPE_ARM64, CPU_SUBTYPE_ARM64_ALL))])
+        else:
+            binary = image(CPU_TYPE_ARM64, CPU_SUBTYPE_ARM64_ALL)
+
+        files = {
+            "Resources/Info.plist": plistlib.dumps({
+                "CFBundleExecutable": name,
+                "CFBundleIdentifier": f"com.apple.{name}",
+                "CFBundleShortVersionString": "1.0",
+                "CFBundlePackageType": "FMWK",
+            }, fmt=plistlib.FMT_BINARY),
+            "Resources/Defaults.plist": plistlib.dumps({
+                f"Key{k}": rng.choice([True, k, f"value{k}", [k, k + 1]]) for k in range(rng.randint(5, 50))
+            }, fmt=plistlib.FMT_XML),
+        }
+        (version_dir / name).write_bytes(binary)
+        for rel, content in files.items():
+            (version_dir / rel).write_bytes(content)
+        (version_dir / "_CodeSignature").mkdir(exist_ok=True)
+        code_resources = plistlib.dumps(_code_resources(files), fmt=plistlib.FMT_XML)
+        (version_dir / "_CodeSignature" / "CodeResources").write_bytes(code_resources)
+
+        bundle = version_dir.parent.parent
+        os.symlink("A", version_dir.parent / "Current")
+        os.symlink(f"Versions/Current/{name}", bundle / name)
+        os.symlink("Versions/Current/Resources", bundle / "Resources")
+        total_bytes += len(binary) + sum(map(len, files.values())) + len(code_resources)
+        catalog.append((name, install_name, class_names))
+
+    for index in range(apps):
+        name = f"BenchApp{index:04d}"
+        contents = app_root / f"{name}.app" / "Contents"
+        (contents / "MacOS").mkdir(parents=True, exist_ok=True)
+        builder = MachOBuilder(MH_EXECUTE)
+        for framework, install_name, class_names in rng.sample(catalog, min(len(catalog), rng.randint(1, 8))):
+            builder.add_library(install_name)
+            for class_name in rng.sample(class_names, min(len(class_names), 3)):
+                builder.add_symbol(f"_OBJC_CLASS_$_{class_name}", defined=False)
+                builder.add_class_ref(class_name)
+        for m in sorted(rng.sample(range(methods), min(methods, 3))):
+            builder.add_selector_ref(f"method{m}WithValue:" if m % 2 else f"method{m}")
+        builder.add_selector_ref("sharedInstance")
+        builder.add_class(f"{name}Delegate", "NSObject", ["applicationDidFinishLaunching:"])
+        binary = builder.build()
+        (contents / "MacOS" / name).write_bytes(binary)
+        (contents / "Info.plist").write_bytes(plistlib.dumps({"CFBundleExecutable": name}, fmt=plistlib.FMT_XML))
+        total_bytes += len(binary)
+
+    return {
+        "root": str(root),
+        "framework_paths": [str(framework_root)],
+        "app_paths": [str(app_root)],
+        "frameworks": frameworks,
+        "apps": apps,
+        "bytes": total_bytes,
+    }
@@ -0,0 +1,121 @@
+"""Stand-in executables for the external tools deapplefy drives.
+
+`install_tools()` writes small Python scripts named `r2`, `rabin2`, `otool`,
+`nm`, `plutil` and `class-dump` into a directory meant to be put first on
+PATH. They speak just enough of each tool's interface for deapplefy's code
+paths to run, and each invocation (or, for r2, each command) sleeps for a
+configurable latency so tool cost can be simulated.
+"""
+
+import os
+import stat
+import sys
+from pathlib import Path
+from typing import Dict
+
+# Read by the stand-ins at run time; overrides the latency baked in at install
+LATENCY_ENV = "DEAPPLEFY_BENCH_LATENCY"
+
+_PRELUDE = '''#!{python}
+import json, os, sys, time
+LATENCY = float(os.environ.get("{env}", {latency!r}))
+args = sys.argv[1:]
+'''
+
+_TOOLS: Dict[str, str] = {
+    # r2pipe protocol: NUL after load, then one NUL-terminated reply per command
+    "r2": '''
+if args == ["-v"]:
+    print("radare2 5.9.0 (benchmark stand-in)")
+    sys.exit(0)
+out = sys.stdout.buffer
+time.sleep(LATENCY)
+out.write(b"\\0")
+out.flush()
+replies = {
+    "iIj": {"arch": "arm", "bits": 64, "bintype": "mach0", "os": "darwin", "lang": "objc"},
+    "ilj": [], "icj": [], "isj": [], "iSj": [], "iij": [], "iEj": [],
+}
+for line in sys.stdin:
+    command = line.strip()
+    if command in ("q", "q!"):
+        break
+    time.sleep(LATENCY)
+    reply = replies.get(command)
+    out.write((json.dumps(reply) if reply is not None else "").encode() + b"\\n\\0")
+    out.flush()
+''',
+    "rabin2": '''
+time.sleep(LATENCY)
+if "-v" in args:
+    print("rabin2 5.9.0 (benchmark stand-in)")
+else:
+    print("[]" if any(a.endswith("j") for a in args) else "")
+''',
+    "otool": '''
+time.sleep(LATENCY)
+if args and args[0] == "--version":
+    print("otool (benchmark stand-in)")
+elif args:
+    print(f"{args[-1]}:")
+    if "-L" in args:
+        print("\\t/usr/lib/libobjc.A.dylib (compatibility version 1.0.0, current version 228.0.0)")
+''',
+    "nm": '''
+time.sleep(LATENCY)
+if args and args[0] in ("-v", "--version"):
+    print("nm (benchmark stand-in)")
+elif args:
+    print("                 U _objc_msgSend")
+''',
+    "plutil": '''
+import plistlib
+time.sleep(LATENCY)
+path = args[-1] if args else "-"
+try:
+    with open(path, "rb") as f:
+        value = plistlib.load(f)
+except Exception as e:
+    print(f"{path}: {e}", file=sys.stderr)
+    sys.exit(1)
+if "-p" in args:
+    print(repr(value))
+else:
+    print(json.dumps(value, default=str))
+''',
+    # Emits a synthetic header dump; DEAPPLEFY_BENCH_CLASSES controls its size
+    "class-dump": '''
+if args == ["--version"]:
+    print("class-dump 3.5 (benchmark stand-in)")
+    sys.exit(0)
+time.sleep(LATENCY)
+name = os.path.basename(args[-1].rstrip("/")).split(".")[0] if args else "Unknown"
+out = sys.stdout
+out.write("//\\n// Generated by class-dump 3.5 (benchmark stand-in).\\n//\\n\\n")
+out.write(f"@protocol {name}Delegate <NSObject>\\n@optional\\n- (void){name.lower()}DidFinish:(id)arg1;\\n@end\\n\\n")
+for c in range(int(os.environ.get("DEAPPLEFY_BENCH_CLASSES", "20"))):
+    out.write(f"@interface {name}Class{c:03d} : NSObject <{name}Delegate>\\n{{\\n    NSString *_name;\\n    long long _count;\\n}}\\n\\n")
+    out.write("+ (id)sharedInstance;\\n")
+    for m in range(8):
+        out.write(f"- (void)method{m}WithValue:(id)arg1 options:(unsigned long long)arg2;\\n")
+    out.write("@property(copy, nonatomic) NSString *name; // @synthesize name=_name;\\n@end\\n\\n")
+''',
+}
+
+
+def install_tools(bin_dir: Path, latency: float = 0.0) -> Path:
+    """Write the stand-in tools into `bin_dir` and return it"""
+    bin_dir.mkdir(parents=True, exist_ok=True)
+    prelude = _PRELUDE.format(python=sys.executable, env=LATENCY_ENV, latency=latency)
+    for name, body in _TOOLS.items():
+        path = bin_dir / name
+        path.write_text(prelude + body)
+        path.chmod(path.stat().st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return bin_dir
+
+
+def tool_environment(bin_dir: Path) -> Dict[str, str]:
+    """os.environ with the stand-ins first on PATH"""
+    env = dict(os.environ)
+    env["PATH"] = f"{bin_dir}{os.pathsep}{env.get('PATH', '')}"
+    return env
@@ -11,13 +11,46 @@ Architecture (4 Layers):
 
 import os
 import sys
+import re
 import json
+import mmap
+import bisect
+import heapq
+import shutil
+import platform
+import sqlite3
+import base64
+import datetime
+import plistlib
+import gzip
+import zlib
+import tempfile
+import struct
 import argparse
+from array import array
+import hashlib
+import functools
+import threading
+import select
 import subprocess
+import resource
+import time
+import asyncio
+import urllib.error
+import urllib.request
+import multiprocessing
+import multiprocessing.connection
+from collections import OrderedDict
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from pathlib import Path
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Tuple, Callable, Iterable, Iterator, Union
 import logging
 
+try:
+    import zstandard  # optional: better compression for `deapplefy pack`
+except ImportError:
+    zstandard = None
+
 # Setup logging
 logging.basicConfig(
     level=logging.INFO,
@@ -25,6 +58,1503 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+__version__ = "0.2.0"
+
+
+class _NullSpan:
+    """Stand-in returned while profiling is off, so instrumented code costs ~nothing"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **args):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def _peak_rss_mb(who: int) -> float:
+    # ru_maxrss is bytes on macOS and KiB on Linux
+    rss = resource.getrusage(who).ru_maxrss
+    return round(rss / ((1 << 20) if sys.platform == "darwin" else (1 << 10)), 1)
+
+
+class _Span:
+    """One timed region; recorded as a Chrome trace "complete" event on exit"""
+
+    __slots__ = ("profiler", "name", "cat", "args", "start", "perf", "cpu", "rss")
+
+    def __init__(self, profiler: "Profiler", name: str, cat: str, args: Dict[str, Any]):
+        self.profiler = profiler
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.time()
+        self.perf = time.perf_counter()
+        if self.cat == "subprocess":
+            usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+            self.cpu = usage.ru_utime + usage.ru_stime
+            self.rss = _peak_rss_mb(resource.RUSAGE_CHILDREN)
+        else:
+            self.cpu = time.thread_time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        wall = time.perf_counter() - self.perf
+        if self.cat == "subprocess":
+            # CPU of the children reaped during the span
+            usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+            cpu = usage.ru_utime + usage.ru_stime - self.cpu
+            # The children's peak covers every child reaped so far: it only says something
+            # about this span's tool when that tool raised it
+            rss = _peak_rss_mb(resource.RUSAGE_CHILDREN)
+            rss = rss if rss > self.rss else None
+        else:
+            cpu = time.thread_time() - self.cpu
+            rss = _peak_rss_mb(resource.RUSAGE_SELF)
+        if exc_type is subprocess.TimeoutExpired:
+            self.args["timeout"] = True
+        elif exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.args.update({"wall_s": round(wall, 6), "cpu_s": round(cpu, 6)})
+        if rss is not None:
+            self.args["peak_rss_mb"] = rss
+        self.profiler.events.append({
+            "name": self.name, "cat": self.cat, "ph": "X",
+            "ts": int(self.start * 1e6), "dur": int(wall * 1e6),
+            "pid": os.getpid(), "tid": threading.get_ident() & 0xffffffff,
+            "args": self.args,
+        })
+        return False
+
+    def set(self, **args):
+        """Attach results known only at the end (output bytes, timeouts...)"""
+        self.args.update(args)
+
+
+class Profiler:
+    """Collects spans around analyzer layers and tool runs (`--profile` / `--trace`).
+
+    Disabled by default, in which case `span()` hands back a shared no-op
+    context manager. Pipeline workers send their spans back with each result
+    so the parent can merge them into one trace.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.events: List[Dict[str, Any]] = []
+
+    def enable(self):
+        self.enabled = True
+
+    def span(self, name: str, cat: str, **args):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, cat, args)
+
+    def drain(self) -> List[Dict[str, Any]]:
+        events, self.events = self.events, []
+        return events
+
+    def extend(self, events: List[Dict[str, Any]]):
+        self.events.extend(events)
+
+    def write_trace(self, path: Path):
+        """Write all spans in Chrome trace-event format (chrome://tracing, Perfetto)"""
+        metadata = [{"name": "process_name", "ph": "M", "pid": pid, "tid": 0,
+                     "args": {"name": "deapplefy" if pid == os.getpid() else f"worker {pid}"}}
+                    for pid in sorted({e["pid"] for e in self.events})]
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({"traceEvents": metadata + self.events, "displayTimeUnit": "ms"}, f)
+
+    def summary(self, top: int = 10) -> List[str]:
+        """Text table of the slowest frameworks and the per-tool totals"""
+        frameworks = sorted((e for e in self.events if e["cat"] == "framework"),
+                            key=lambda e: e["dur"], reverse=True)[:top]
+        tools: Dict[str, Dict[str, float]] = {}
+        for e in self.events:
+            if e["cat"] not in ("subprocess", "layer"):
+                continue
+            stats = tools.setdefault(f"{e['cat']}:{e['name']}",
+                                     {"calls": 0, "wall": 0.0, "cpu": 0.0, "max": 0.0, "bytes": 0, "timeouts": 0})
+            stats["calls"] += 1
+            stats["wall"] += e["args"]["wall_s"]
+            stats["cpu"] += e["args"]["cpu_s"]
+            stats["max"] = max(stats["max"], e["args"]["wall_s"])
+            stats["bytes"] += e["args"].get("output_bytes", 0)
+            stats["timeouts"] += bool(e["args"].get("timeout"))
+
+        lines = [f"Slowest frameworks (top {top}):",
+                 f"  {'framework':<40} {'wall s':>9} {'cpu s':>9} {'rss MB':>8}"]
+        for e in frameworks:
+            a = e["args"]
+            lines.append(f"  {e['name']:<40} {a['wall_s']:>9.2f} {a['cpu_s']:>9.2f} {a['peak_rss_mb']:>8.1f}")
+        lines.append("Layers and tools:")
+        lines.append(f"  {'name':<28} {'calls':>6} {'wall s':>9} {'cpu s':>9} {'max s':>8} {'out MB':>8} {'t/o':>4}")
+        for name, s in sorted(tools.items(), key=lambda kv: kv[1]["wall"], reverse=True):
+            lines.append(f"  {name:<28} {s['calls']:>6} {s['wall']:>9.2f} {s['cpu']:>9.2f} {s['max']:>8.2f} "
+                         f"{s['bytes'] / (1 << 20):>8.2f} {s['timeouts']:>4}")
+        return lines
+
+
+profiler = Profiler()
+
+
+def run_tool(cmd: List[str], **kwargs) -> subprocess.CompletedProcess:
+    """subprocess.run with a profiling span named after the tool"""
+    with profiler.span(os.path.basename(cmd[0]), "subprocess", argv=" ".join(cmd[1:])[:200]) as span:
+        result = subprocess.run(cmd, **kwargs)
+        span.set(output_bytes=len(result.stdout or b"") + len(result.stderr or b""), returncode=result.returncode)
+        return result
+
+
+class MachOFile:
+    """Pure-Python Mach-O reader working directly on an mmap (no subprocesses).
+
+    Handles thin and fat/universal files; for fat files one slice is selected
+    (the first match in ARCH_PREFERENCE unless `arch` is given, so results
+    don't depend on the host). Only the parts
+    deapplefy needs are decoded: header, load commands, segments/sections,
+    linked dylibs and the symbol/string tables.
+    """
+
+    MH_MAGIC = 0xfeedface
+    MH_MAGIC_64 = 0xfeedfacf
+    FAT_MAGIC = 0xcafebabe
+    FAT_MAGIC_64 = 0xcafebabf
+
+    LC_REQ_DYLD = 0x80000000
+    LC_SEGMENT = 0x1
+    LC_SYMTAB = 0x2
+    LC_LOAD_DYLIB = 0xc
+    LC_ID_DYLIB = 0xd
+    LC_LOAD_DYLINKER = 0xe
+    LC_UUID = 0x1b
+    LC_SEGMENT_64 = 0x19
+    LC_CODE_SIGNATURE = 0x1d
+    LC_LAZY_LOAD_DYLIB = 0x20
+    LC_ENCRYPTION_INFO = 0x21
+    LC_DYLD_INFO = 0x22
+    LC_ENCRYPTION_INFO_64 = 0x2c
+    LC_BUILD_VERSION = 0x32
+    LC_LOAD_WEAK_DYLIB = 0x18 | LC_REQ_DYLD
+    LC_RPATH = 0x1c | LC_REQ_DYLD
+    LC_REEXPORT_DYLIB = 0x1f | LC_REQ_DYLD
+    LC_DYLD_INFO_ONLY = 0x22 | LC_REQ_DYLD
+    LC_LOAD_UPWARD_DYLIB = 0x23 | LC_REQ_DYLD
+    LC_MAIN = 0x28 | LC_REQ_DYLD
+    LC_DYLD_CHAINED_FIXUPS = 0x34 | LC_REQ_DYLD
+
+    DYLIB_COMMANDS = (LC_LOAD_DYLIB, LC_LOAD_WEAK_DYLIB, LC_REEXPORT_DYLIB,
+                      LC_LAZY_LOAD_DYLIB, LC_LOAD_UPWARD_DYLIB)
+
+    MH_EXECUTE = 0x2
+    MH_DYLIB = 0x6
+    MH_BUNDLE = 0x8
+    MH_PIE = 0x200000
+
+    N_STAB = 0xe0
+    N_TYPE = 0x0e
+    N_EXT = 0x01
+    N_UNDF = 0x0
+
+    CPU_TYPES = {
+        7: "x86", 0x01000007: "x86_64", 12: "arm", 0x0100000c: "arm64",
+        0x0200000c: "arm64_32", 18: "ppc", 0x01000012: "ppc64",
+    }
+    PLATFORMS = {1: "macos", 2: "ios", 3: "tvos", 4: "watchos", 5: "bridgeos",
+                 6: "maccatalyst", 7: "ios", 8: "tvos", 9: "watchos", 11: "visionos"}
+    # Preference order when picking a slice from a fat binary
+    ARCH_PREFERENCE = ["arm64e", "arm64", "x86_64", "arm64_32", "x86"]
+    # Base of direct selector offsets in relative method lists (only set for dyld cache images)
+    selector_base: Optional[int] = None
+
+    def __init__(self, buf, header_offset: int = 0, base: Optional[int] = None, size: Optional[int] = None):
+        self._buf = buf
+        self._hdr = header_offset
+        # File offsets in load commands are relative to the start of the slice
+        self._base = header_offset if base is None else base
+        self.size = size if size is not None else len(buf) - header_offset
+
+        magic_le = struct.unpack_from("<I", buf, header_offset)[0]
+        if magic_le in (self.MH_MAGIC, self.MH_MAGIC_64):
+            self._e = "<"
+        elif struct.unpack_from(">I", buf, header_offset)[0] in (self.MH_MAGIC, self.MH_MAGIC_64):
+            self._e = ">"
+        else:
+            raise ValueError("not a thin Mach-O header")
+
+        magic, self.cputype, self.cpusubtype, self.filetype, self.ncmds, self.sizeofcmds, self.flags = \
+            struct.unpack_from(self._e + "7I", buf, header_offset)
+        self.is64 = magic == self.MH_MAGIC_64
+        self._lc_start = header_offset + (32 if self.is64 else 28)
+
+        self.load_commands: List[Tuple[int, int, int]] = []
+        self.segments: List[Dict[str, Any]] = []
+        self.dylibs: List[Tuple[int, str]] = []
+        self.install_name: Optional[str] = None
+        self.dylinker: Optional[str] = None
+        self.rpaths: List[str] = []
+        self.uuid: Optional[str] = None
+        self.platform: Optional[int] = None
+        self.symtab: Optional[Tuple[int, int, int, int]] = None
+        self.encrypted = False
+        self.has_code_signature = False
+        self.fat_archs: List[str] = []
+        self._parse_load_commands()
+
+    @classmethod
+    def open(cls, path: Path, arch: Optional[str] = None) -> Optional["MachOFile"]:
+        """mmap a file and return a reader for its preferred slice, or None if it is not Mach-O.
+
+        Paths that don't exist on disk are looked up in the registered dyld
+        shared cache, if any.
+        """
+        if DyldSharedCache.current is not None and not os.path.isfile(path):
+            return DyldSharedCache.current.image(str(path))
+        try:
+            with open(path, "rb") as f:
+                buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+
+        try:
+            magic = struct.unpack_from(">I", buf, 0)[0]
+            if magic in (cls.FAT_MAGIC, cls.FAT_MAGIC_64):
+                slices = cls.fat_slices(buf)
+                if not slices:
+                    raise ValueError("empty fat binary")
+                chosen = slices[0]
+                names = {s["arch"]: s for s in slices}
+                for wanted in ([arch] if arch else []) + cls.ARCH_PREFERENCE:
+                    if wanted in names:
+                        chosen = names[wanted]
+                        break
+                macho = cls(buf, chosen["offset"], size=chosen["size"])
+                macho.fat_archs = [s["arch"] for s in slices]
+            else:
+                macho = cls(buf)
+            return macho
+        except (ValueError, struct.error, IndexError) as e:
+            logger.debug(f"    Not a readable Mach-O {path}: {e}")
+            buf.close()
+            return None
+
+    @classmethod
+    def fat_slices(cls, buf) -> List[Dict[str, Any]]:
+        """List the slices of a fat/universal binary"""
+        magic, nfat = struct.unpack_from(">2I", buf, 0)
+        # Java class files share the 0xcafebabe magic; they have a large "count"
+        if nfat > 32:
+            return []
+        slices = []
+        pos = 8
+        for _ in range(nfat):
+            if magic == cls.FAT_MAGIC_64:
+                cputype, cpusubtype, offset, size, _align, _res = struct.unpack_from(">2I2Q2I", buf, pos)
+                pos += 32
+            else:
+                cputype, cpusubtype, offset, size, _align = struct.unpack_from(">5I", buf, pos)
+                pos += 20
+            slices.append({"arch": cls.arch_name(cputype, cpusubtype), "offset": offset, "size": size})
+        return slices
+
+    @classmethod
+    def arch_name(cls, cputype: int, cpusubtype: int) -> str:
+        name = cls.CPU_TYPES.get(cputype, f"cpu{cputype:#x}")
+        if name == "arm64" and (cpusubtype & 0xff) == 2:
+            return "arm64e"
+        return name
+
+    def close(self):
+        try:
+            self._buf.close()
+        except (AttributeError, BufferError):
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # -- low level helpers -------------------------------------------------
+
+    def _file_view(self, offset: int) -> Tuple[Any, int]:
+        """(buffer, absolute position) for a file offset from a load command"""
+        return self._buf, self._base + offset
+
+    def _unpack(self, fmt: str, offset: int) -> Tuple:
+        """Unpack at a file offset (relative to the slice start)"""
+        buf, pos = self._file_view(offset)
+        return struct.unpack_from(self._e + fmt, buf, pos)
+
+    def _cstring(self, abs_offset: int, limit: Optional[int] = None, buf=None) -> str:
+        buf = self._buf if buf is None else buf
+        end = buf.find(b"\0", abs_offset, limit if limit is not None else len(buf))
+        if end < 0:
+            end = limit if limit is not None else len(buf)
+        return bytes(buf[abs_offset:end]).decode("utf-8", errors="replace")
+
+    def _parse_load_commands(self):
+        pos = self._lc_start
+        end = pos + self.sizeofcmds
+        for _ in range(self.ncmds):
+            if pos + 8 > end:
+                break
+            cmd, cmdsize = struct.unpack_from(self._e + "2I", self._buf, pos)
+            if cmdsize < 8:
+                break
+            self.load_commands.append((cmd, pos, cmdsize))
+
+            if cmd in (self.LC_SEGMENT_64, self.LC_SEGMENT):
+                self.segments.append(self._parse_segment(cmd, pos))
+            elif cmd in self.DYLIB_COMMANDS or cmd == self.LC_ID_DYLIB:
+                name_off = struct.unpack_from(self._e + "I", self._buf, pos + 8)[0]
+                name = self._cstring(pos + name_off, pos + cmdsize)
+                if cmd == self.LC_ID_DYLIB:
+                    self.install_name = name
+                else:
+                    self.dylibs.append((cmd, name))
+            elif cmd == self.LC_LOAD_DYLINKER:
+                name_off = struct.unpack_from(self._e + "I", self._buf, pos + 8)[0]
+                self.dylinker = self._cstring(pos + name_off, pos + cmdsize)
+            elif cmd == self.LC_RPATH:
+                path_off = struct.unpack_from(self._e + "I", self._buf, pos + 8)[0]
+                self.rpaths.append(self._cstring(pos + path_off, pos + cmdsize))
+            elif cmd == self.LC_UUID:
+                self.uuid = bytes(self._buf[pos + 8:pos + 24]).hex().upper()
+            elif cmd == self.LC_SYMTAB:
+                self.symtab = struct.unpack_from(self._e + "4I", self._buf, pos + 8)
+            elif cmd == self.LC_BUILD_VERSION:
+                self.platform = struct.unpack_from(self._e + "I", self._buf, pos + 8)[0]
+            elif cmd in (self.LC_ENCRYPTION_INFO, self.LC_ENCRYPTION_INFO_64):
+                self.encrypted = struct.unpack_from(self._e + "I", self._buf, pos + 16)[0] != 0
+            elif cmd == self.LC_CODE_SIGNATURE:
+                self.has_code_signature = True
+            pos += cmdsize
+
+    def _parse_segment(self, cmd: int, pos: int) -> Dict[str, Any]:
+        if cmd == self.LC_SEGMENT_64:
+            segname, vmaddr, vmsize, fileoff, filesize, _maxprot, _initprot, nsects, _flags = \
+                struct.unpack_from(self._e + "16s4Q4I", self._buf, pos + 8)
+            sect_fmt, sect_size, sect_pos = "16s16s2Q7I", 80, pos + 72
+        else:
+            segname, vmaddr, vmsize, fileoff, filesize, _maxprot, _initprot, nsects, _flags = \
+                struct.unpack_from(self._e + "16s8I", self._buf, pos + 8)
+            sect_fmt, sect_size, sect_pos = "16s16s9I", 68, pos + 56
+
+        sections = []
+        for i in range(nsects):
+            fields = struct.unpack_from(self._e + sect_fmt, self._buf, sect_pos + i * sect_size)
+            sections.append({
+                "name": fields[0].rstrip(b"\0").decode("ascii", errors="replace"),
+                "segment": fields[1].rstrip(b"\0").decode("ascii", errors="replace"),
+                "addr": fields[2],
+                "size": fields[3],
+                "offset": fields[4],
+                "flags": fields[8],
+            })
+        return {
+            "name": segname.rstrip(b"\0").decode("ascii", errors="replace"),
+            "vmaddr": vmaddr,
+            "vmsize": vmsize,
+            "fileoff": fileoff,
+            "filesize": filesize,
+            "sections": sections,
+        }
+
+    # -- queries -----------------------------------------------------------
+
+    @property
+    def arch(self) -> str:
+        return self.arch_name(self.cputype, self.cpusubtype)
+
+    @property
+    def libraries(self) -> List[str]:
+        """Install names of every linked dylib (load, weak, re-export, lazy, upward)"""
+        return [name for _cmd, name in self.dylibs]
+
+    def has_load_command(self, cmd: int) -> bool:
+        return any(c == cmd for c, _pos, _size in self.load_commands)
+
+    def segment(self, name: str) -> Optional[Dict[str, Any]]:
+        for seg in self.segments:
+            if seg["name"] == name:
+                return seg
+        return None
+
+    def section(self, segment: str, name: str) -> Optional[Dict[str, Any]]:
+        for seg in self.segments:
+            for sect in seg["sections"]:
+                if sect["name"] == name and (sect["segment"] == segment or seg["name"] == segment):
+                    return sect
+        return None
+
+    def sections_named(self, name: str) -> List[Dict[str, Any]]:
+        """Sections with this name in any segment (e.g. __objc_classlist in __DATA or __DATA_CONST)"""
+        return [sect for seg in self.segments for sect in seg["sections"] if sect["name"] == name]
+
+    def vm_view(self, addr: int) -> Optional[Tuple[Any, int]]:
+        """(buffer, absolute position) for a virtual address, or None if it isn't backed by file data"""
+        for seg in self.segments:
+            if seg["vmaddr"] <= addr < seg["vmaddr"] + seg["filesize"]:
+                return self._file_view(seg["fileoff"] + addr - seg["vmaddr"])
+        return None
+
+    def read_u32(self, addr: int) -> Optional[int]:
+        view = self.vm_view(addr)
+        return struct.unpack_from(self._e + "I", *view)[0] if view else None
+
+    def read_cstring(self, addr: Optional[int]) -> Optional[str]:
+        if not addr:
+            return None
+        view = self.vm_view(addr)
+        return self._cstring(view[1], min(view[1] + 4096, len(view[0])), view[0]) if view else None
+
+    def read_pointer(self, addr: int) -> Tuple[Optional[int], Optional[str]]:
+        """Read a pointer-sized slot: (target address, None) for rebases or (None, symbol) for binds.
+
+        Chained fixups (including arm64e authenticated pointers) and classic
+        dyld-info binds are decoded; plain pointers are returned as stored.
+        """
+        view = self.vm_view(addr)
+        if view is None:
+            return None, None
+        if not self.is64:
+            raw = struct.unpack_from(self._e + "I", *view)[0]
+            bound = self._classic_binds().get(addr)
+            return (None, bound) if bound else (raw or None, None)
+        raw = struct.unpack_from(self._e + "Q", *view)[0]
+        fmt = self._chained_format()
+        if fmt is not None:
+            return self._decode_chained(raw, fmt)
+        bound = self._classic_binds().get(addr)
+        if bound:
+            return None, bound
+        return (raw & 0x00ffffffffffffff) or None, None
+
+    # Chained pointer formats (mach-o/fixup-chains.h)
+    PTR_ARM64E = 1
+    PTR_64 = 2
+    PTR_64_OFFSET = 6
+    PTR_ARM64E_USERLAND = 9
+    PTR_ARM64E_USERLAND24 = 12
+
+    def _decode_chained(self, raw: int, fmt: int) -> Tuple[Optional[int], Optional[str]]:
+        if not raw:
+            # NULL slots are not part of any chain
+            return None, None
+        base = self._image_base()
+        if fmt in (self.PTR_ARM64E, self.PTR_ARM64E_USERLAND, self.PTR_ARM64E_USERLAND24):
+            auth = raw >> 63
+            if (raw >> 62) & 1:
+                # USERLAND24 widens the ordinal of both the plain and the auth bind to 24 bits
+                ordinal = raw & (0xffffff if fmt == self.PTR_ARM64E_USERLAND24 else 0xffff)
+                return None, self._chained_imports()[ordinal] if ordinal < len(self._chained_imports()) else None
+            if auth:
+                return base + (raw & 0xffffffff), None
+            target = raw & ((1 << 43) - 1)
+            high8 = (raw >> 43) & 0xff
+            if fmt != self.PTR_ARM64E:
+                target += base
+            return target | (high8 << 56), None
+        # DYLD_CHAINED_PTR_64 / _64_OFFSET
+        if raw >> 63:
+            ordinal = raw & 0xffffff
+            return None, self._chained_imports()[ordinal] if ordinal < len(self._chained_imports()) else None
+        target = raw & ((1 << 36) - 1)
+        high8 = (raw >> 36) & 0xff
+        if fmt == self.PTR_64_OFFSET:
+            target += base
+        return target | (high8 << 56), None
+
+    def _image_base(self) -> int:
+        text = self.segment("__TEXT")
+        return text["vmaddr"] if text else 0
+
+    def _linkedit_command(self, cmd: int) -> Optional[Tuple[int, int]]:
+        for c, pos, _size in self.load_commands:
+            if c == cmd:
+                return struct.unpack_from(self._e + "2I", self._buf, pos + 8)
+        return None
+
+    def _chained_header(self) -> Optional[Tuple[int, ...]]:
+        if not hasattr(self, "_chained_hdr"):
+            self._chained_hdr = None
+            cmd = self._linkedit_command(self.LC_DYLD_CHAINED_FIXUPS)
+            if cmd and cmd[1]:
+                # fixups_version, starts_offset, imports_offset, symbols_offset,
+                # imports_count, imports_format, symbols_format
+                self._chained_hdr = (cmd[0],) + self._unpack("7I", cmd[0])
+        return self._chained_hdr
+
+    def _chained_format(self) -> Optional[int]:
+        if not hasattr(self, "_chained_fmt"):
+            self._chained_fmt = None
+            hdr = self._chained_header()
+            if hdr:
+                dataoff, starts = hdr[0], hdr[0] + hdr[2]
+                seg_count = self._unpack("I", starts)[0]
+                for i in range(seg_count):
+                    seg_info = self._unpack("I", starts + 4 + 4 * i)[0]
+                    if seg_info:
+                        self._chained_fmt = self._unpack("H", starts + seg_info + 6)[0]
+                        break
+        return self._chained_fmt
+
+    def _chained_imports(self) -> List[str]:
+        if not hasattr(self, "_chained_import_names"):
+            names = []
+            hdr = self._chained_header()
+            if hdr:
+                dataoff, _ver, _starts, imports_off, symbols_off, count, imports_format, _sym_fmt = hdr
+                buf, sym_base = self._file_view(dataoff + symbols_off)
+                for i in range(count):
+                    if imports_format == 3:
+                        entry = self._unpack("Q", dataoff + imports_off + 16 * i)[0]
+                        name_off = entry >> 32
+                    else:
+                        stride = 8 if imports_format == 2 else 4
+                        entry = self._unpack("I", dataoff + imports_off + stride * i)[0]
+                        name_off = entry >> 9
+                    names.append(self._cstring(sym_base + name_off, None, buf))
+            self._chained_import_names = names
+        return self._chained_import_names
+
+    def _classic_binds(self) -> Dict[int, str]:
+        """Address -> symbol for the dyld-info bind and weak-bind opcode streams"""
+        if hasattr(self, "_binds"):
+            return self._binds
+        binds: Dict[int, str] = {}
+        info = None
+        for c, pos, _size in self.load_commands:
+            if c in (self.LC_DYLD_INFO, self.LC_DYLD_INFO_ONLY):
+                info = struct.unpack_from(self._e + "10I", self._buf, pos + 8)
+        if info:
+            for off, size in ((info[2], info[3]), (info[4], info[5])):
+                if size:
+                    self._run_bind_opcodes(off, size, binds)
+        self._binds = binds
+        return binds
+
+    def _run_bind_opcodes(self, off: int, size: int, binds: Dict[int, str]):
+        buf, pos = self._file_view(off)
+        end = pos + size
+        ptr_size = 8 if self.is64 else 4
+        symbol = None
+        addr = 0
+
+        def uleb() -> int:
+            nonlocal pos
+            result = shift = 0
+            while True:
+                byte = buf[pos]
+                pos += 1
+                result |= (byte & 0x7f) << shift
+                shift += 7
+                if byte < 0x80:
+                    return result
+
+        while pos < end:
+            byte = buf[pos]
+            pos += 1
+            opcode, imm = byte & 0xf0, byte & 0x0f
+            if opcode == 0x00:  # DONE (ends one entry in weak/lazy streams)
+                continue
+            elif opcode in (0x10, 0x30, 0x50):  # dylib ordinal / special / type immediates
+                pass
+            elif opcode == 0x20:  # SET_DYLIB_ORDINAL_ULEB
+                uleb()
+            elif opcode == 0x40:  # SET_SYMBOL_TRAILING_FLAGS_IMM
+                name_end = buf.find(b"\0", pos, end)
+                symbol = bytes(buf[pos:name_end]).decode("utf-8", errors="replace")
+                pos = name_end + 1
+            elif opcode == 0x60:  # SET_ADDEND_SLEB
+                while buf[pos] & 0x80:
+                    pos += 1
+                pos += 1
+            elif opcode == 0x70:  # SET_SEGMENT_AND_OFFSET_ULEB
+                seg = self.segments[imm] if imm < len(self.segments) else None
+                addr = (seg["vmaddr"] if seg else 0) + uleb()
+            elif opcode == 0x80:  # ADD_ADDR_ULEB
+                addr = (addr + uleb()) & 0xffffffffffffffff
+            elif opcode == 0x90:  # DO_BIND
+                binds[addr] = symbol
+                addr += ptr_size
+            elif opcode == 0xa0:  # DO_BIND_ADD_ADDR_ULEB
+                binds[addr] = symbol
+                addr = (addr + uleb() + ptr_size) & 0xffffffffffffffff
+            elif opcode == 0xb0:  # DO_BIND_ADD_ADDR_IMM_SCALED
+                binds[addr] = symbol
+                addr += imm * ptr_size + ptr_size
+            elif opcode == 0xc0:  # DO_BIND_ULEB_TIMES_SKIPPING_ULEB
+                count, skip = uleb(), uleb()
+                for _ in range(count):
+                    binds[addr] = symbol
+                    addr += skip + ptr_size
+            else:
+                # THREADED binds predate chained fixups on arm64e; not decoded
+                break
+
+    def iter_symbols(self):
+        """Yield (name, n_type, n_sect, n_desc, n_value) from the symbol table, lazily"""
+        if not self.symtab:
+            return
+        symoff, nsyms, stroff, strsize = self.symtab
+        entry_fmt = self._e + ("IBBHQ" if self.is64 else "IBBHI")
+        entry_size = 16 if self.is64 else 12
+        str_buf, str_start = self._file_view(stroff)
+        str_end = min(str_start + strsize, len(str_buf))
+        sym_buf, pos = self._file_view(symoff)
+        for _ in range(nsyms):
+            n_strx, n_type, n_sect, n_desc, n_value = struct.unpack_from(entry_fmt, sym_buf, pos)
+            pos += entry_size
+            name = self._cstring(str_start + n_strx, str_end, str_buf) if 0 < n_strx < strsize else ""
+            yield name, n_type, n_sect, n_desc, n_value
+
+    def undefined_symbols(self) -> List[str]:
+        """Imported symbols, equivalent to `nm -u`"""
+        return [
+            name for name, n_type, _sect, _desc, _value in self.iter_symbols()
+            if not (n_type & self.N_STAB) and (n_type & self.N_TYPE) == self.N_UNDF and n_type & self.N_EXT and name
+        ]
+
+    def info(self) -> Dict[str, Any]:
+        """Binary summary with the same keys as `rabin2 -I -j`"""
+        text = self.segment("__TEXT")
+        undefined = set(self.undefined_symbols()) if self.symtab else set()
+        has_objc = any(s["name"].startswith("__objc_") for seg in self.segments for s in seg["sections"])
+        has_swift = any(s["name"].startswith("__swift5") for seg in self.segments for s in seg["sections"])
+        local_symbols = any(
+            not (t & self.N_STAB) and not (t & self.N_EXT) for _n, t, _s, _d, _v in self.iter_symbols()
+        ) if self.symtab else False
+        arch = self.arch
+        return {
+            "arch": "arm" if arch.startswith("arm") else "x86" if arch.startswith("x86") else arch,
+            "baddr": text["vmaddr"] if text else 0,
+            "binsz": self.size,
+            "bintype": "mach0",
+            "bits": 64 if self.is64 else 32,
+            "canary": "___stack_chk_guard" in undefined or "___stack_chk_fail" in undefined,
+            "injprot": False,
+            "class": "MACH064" if self.is64 else "MACH0",
+            "compiled": "",
+            "compiler": "clang",
+            "crypto": self.encrypted,
+            "dbg_file": "",
+            "endian": "little" if self._e == "<" else "big",
+            "havecode": True,
+            "guid": self.uuid or "",
+            "intrp": self.dylinker or "",
+            "laddr": 0,
+            "lang": "swift" if has_swift else "objc" if has_objc else "c",
+            "linenum": False,
+            "lsyms": local_symbols,
+            "machine": arch,
+            "nx": False,
+            "os": self.PLATFORMS.get(self.platform, "darwin") if self.platform else "darwin",
+            "cc": "",
+            "pic": bool(self.flags & self.MH_PIE) or self.filetype in (self.MH_DYLIB, self.MH_BUNDLE),
+            "relocs": False,
+            "rpath": ":".join(self.rpaths),
+            "sanitize": False,
+            "static": self.dylinker is None and self.filetype == self.MH_EXECUTE,
+            "stripped": not local_symbols,
+            "subsys": "darwin",
+            "va": True,
+            "checksums": {},
+        }
+
+
+class DyldSharedCache:
+    """mmap-based reader for dyld_shared_cache files.
+
+    Lists the cached images and hands out DyldCacheImage readers that work
+    directly on the mapped cache (nothing is extracted to disk). Split caches
+    are supported: the sub-caches listed in the main header (`.01`, `.02`, ...
+    or the older `.1`, `.2`, ...) are mapped alongside the main file and their
+    mappings merged into a single address space.
+    """
+
+    DEFAULT_DIRS = [
+        "/System/Volumes/Preboot/Cryptexes/OS/System/Library/dyld",
+        "/System/Library/dyld",
+    ]
+    # Header field offsets (dyld_cache_format.h)
+    HEADER_MAPPING_OFFSET = 16
+    HEADER_IMAGES_OLD = 24
+    HEADER_UUID = 88
+    HEADER_SLIDE_MAPPINGS = 312
+    HEADER_SUBCACHES = 392
+    HEADER_IMAGES = 448
+    HEADER_CACHE_SUBTYPE = 456
+    HEADER_OBJC_OPTS = 464
+    # ObjCOptimizationHeader.relativeMethodSelectorBaseAddressOffset
+    OBJC_OPTS_SELECTOR_BASE = 48
+
+    # The cache registered for this process (see MachOFile.open)
+    current: Optional["DyldSharedCache"] = None
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._files: List[Tuple[Path, mmap.mmap]] = []
+        self._mappings: List[Tuple[int, int, int, mmap.mmap]] = []
+
+        main = self._map_file(path)
+        magic = bytes(main[:16]).rstrip(b"\0")
+        if not magic.startswith(b"dyld_v1"):
+            self.close()
+            raise ValueError(f"not a dyld shared cache: {path}")
+        self.arch = magic.split()[-1].decode("ascii", errors="replace")
+        self.uuid = bytes(main[self.HEADER_UUID:self.HEADER_UUID + 16]).hex().upper()
+        self._add_mappings(main)
+
+        for suffix in self._subcache_suffixes(main):
+            sub_path = Path(str(path) + suffix)
+            try:
+                self._add_mappings(self._map_file(sub_path))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Missing dyld sub-cache {sub_path.name}: {e}")
+        self._mappings.sort(key=lambda m: m[0])
+        self._starts = [m[0] for m in self._mappings]
+        self.base_address = self._starts[0] if self._starts else 0
+        self.slide_version, self._value_add, self._delta_mask = self._read_slide_info()
+        self._images = self._read_images(main)
+        self.selector_base = self._read_selector_base(main)
+        if self.selector_base is None:
+            logger.warning(f"No ObjC selector base in {path.name}; methods with direct selectors stay unresolved")
+
+    @classmethod
+    def find_default(cls) -> Optional[Path]:
+        """Locate the host's shared cache for its native architecture"""
+        machine = platform.machine()
+        names = ["dyld_shared_cache_arm64e", "dyld_shared_cache_arm64"] if machine.startswith("arm") \
+            else ["dyld_shared_cache_x86_64h", "dyld_shared_cache_x86_64"]
+        for directory in cls.DEFAULT_DIRS:
+            for name in names:
+                path = Path(directory) / name
+                if path.is_file():
+                    return path
+        return None
+
+    @classmethod
+    def register(cls, path: Optional[Path]) -> Optional["DyldSharedCache"]:
+        """Open a cache and make MachOFile.open fall back to it for this process"""
+        if path is None:
+            cls.current = None
+            return None
+        try:
+            cls.current = cls(path)
+            logger.info(f"Using dyld shared cache {path} ({len(cls.current._images)} images)")
+        except (OSError, ValueError, struct.error) as e:
+            logger.warning(f"Cannot read dyld shared cache {path}: {e}")
+            cls.current = None
+        return cls.current
+
+    def _map_file(self, path: Path) -> mmap.mmap:
+        with open(path, "rb") as f:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._files.append((path, buf))
+        return buf
+
+    def _add_mappings(self, buf: mmap.mmap):
+        mapping_offset, mapping_count = struct.unpack_from("<2I", buf, self.HEADER_MAPPING_OFFSET)
+        for i in range(mapping_count):
+            address, size, file_offset, _max_prot, _init_prot = \
+                struct.unpack_from("<3Q2I", buf, mapping_offset + i * 32)
+            self._mappings.append((address, size, file_offset, buf))
+
+    def _read_slide_info(self) -> Tuple[int, int, int]:
+        """(version, value_add, delta_mask) of the first slide info found in any (sub-)cache file"""
+        for _path, buf in self._files:
+            header_size = struct.unpack_from("<I", buf, self.HEADER_MAPPING_OFFSET)[0]
+            if header_size <= self.HEADER_SLIDE_MAPPINGS + 4:
+                continue
+            offset, count = struct.unpack_from("<2I", buf, self.HEADER_SLIDE_MAPPINGS)
+            for i in range(count):
+                # dyld_cache_mapping_and_slide_info
+                slide_offset, slide_size = struct.unpack_from("<2Q", buf, offset + i * 56 + 24)
+                if not slide_size:
+                    continue
+                version = struct.unpack_from("<I", buf, slide_offset)[0]
+                if version == 2:
+                    delta_mask, value_add = struct.unpack_from("<2Q", buf, slide_offset + 24)
+                    return version, value_add, delta_mask
+                if version in (3, 5):
+                    return version, struct.unpack_from("<Q", buf, slide_offset + 16)[0], 0
+                return version, 0, 0
+        return 0, 0, 0
+
+    def _read_selector_base(self, buf: mmap.mmap) -> Optional[int]:
+        """Address that direct selector offsets in relative method lists are relative to"""
+        header_size = struct.unpack_from("<I", buf, self.HEADER_MAPPING_OFFSET)[0]
+        if header_size < self.HEADER_OBJC_OPTS + 16:
+            return None
+        offset, size = struct.unpack_from("<2Q", buf, self.HEADER_OBJC_OPTS)
+        if not offset or size < self.OBJC_OPTS_SELECTOR_BASE + 8:
+            return None
+        view = self.resolve(self.base_address + offset)
+        if view is None:
+            return None
+        relative = struct.unpack_from("<Q", view[0], view[1] + self.OBJC_OPTS_SELECTOR_BASE)[0]
+        return self.base_address + relative if relative else None
+
+    def decode_pointer(self, raw: int) -> Optional[int]:
+        """Turn an on-disk pointer slot into a cache address using the slide info format"""
+        if self.slide_version == 3:
+            if raw >> 63:
+                return (self._value_add or self.base_address) + (raw & 0xffffffff)
+            top8 = raw & 0x0007f80000000000
+            bottom43 = raw & 0x000007ffffffffff
+            return ((top8 << 13) | bottom43) & 0x00ffffffffffffff or None
+        if self.slide_version == 5:
+            offset = raw & ((1 << 34) - 1)
+            return (self._value_add or self.base_address) + offset if raw else None
+        if self.slide_version == 2:
+            value = raw & ~self._delta_mask & 0xffffffffffffffff
+            return value + self._value_add if value else None
+        return (raw & 0x00ffffffffffffff) or None
+
+    def _subcache_suffixes(self, buf: mmap.mmap) -> List[str]:
+        header_size = struct.unpack_from("<I", buf, self.HEADER_MAPPING_OFFSET)[0]
+        if header_size <= self.HEADER_SUBCACHES + 4:
+            return []
+        offset, count = struct.unpack_from("<2I", buf, self.HEADER_SUBCACHES)
+        if not offset or not count:
+            return []
+        suffixes = []
+        if header_size > self.HEADER_CACHE_SUBTYPE:
+            # dyld_subcache_entry: uuid[16], cacheVMOffset, fileSuffix[32]
+            for i in range(count):
+                raw = bytes(buf[offset + i * 56 + 24:offset + i * 56 + 56])
+                suffixes.append(raw.split(b"\0", 1)[0].decode("ascii", errors="replace"))
+        else:
+            # dyld_subcache_entry_v1: uuid[16], cacheVMOffset; files are numbered from 1
+            suffixes = [f".{i + 1}" for i in range(count)]
+        return suffixes
+
+    def _read_images(self, buf: mmap.mmap) -> Dict[str, int]:
+        header_size = struct.unpack_from("<I", buf, self.HEADER_MAPPING_OFFSET)[0]
+        offset, count = 0, 0
+        if header_size > self.HEADER_IMAGES:
+            offset, count = struct.unpack_from("<2I", buf, self.HEADER_IMAGES)
+        if not count:
+            offset, count = struct.unpack_from("<2I", buf, self.HEADER_IMAGES_OLD)
+        images = {}
+        for i in range(count):
+            address, _mtime, _inode, path_offset, _pad = struct.unpack_from("<3Q2I", buf, offset + i * 32)
+            end = buf.find(b"\0", path_offset)
+            images[bytes(buf[path_offset:end]).decode("utf-8", errors="replace")] = address
+        return images
+
+    def resolve(self, address: int) -> Optional[Tuple[mmap.mmap, int]]:
+        """Map a cache virtual address to (mapped file, offset)"""
+        i = bisect.bisect_right(self._starts, address) - 1
+        if i < 0:
+            return None
+        start, size, file_offset, buf = self._mappings[i]
+        if address >= start + size:
+            return None
+        return buf, file_offset + (address - start)
+
+    def images(self) -> List[str]:
+        return sorted(self._images)
+
+    def has_image(self, install_path: str) -> bool:
+        return install_path in self._images
+
+    def image(self, install_path: str) -> Optional["DyldCacheImage"]:
+        address = self._images.get(install_path)
+        if address is None:
+            return None
+        try:
+            return DyldCacheImage(self, install_path, address)
+        except (ValueError, struct.error, IndexError, TypeError) as e:
+            logger.debug(f"    Cannot read cached image {install_path}: {e}")
+            return None
+
+    def close(self):
+        for _path, buf in self._files:
+            try:
+                buf.close()
+            except BufferError:
+                pass
+        self._files = []
+        self._mappings = []
+
+
+class DyldCacheImage(MachOFile):
+    """A Mach-O image inside a dyld shared cache, read in place.
+
+    Load commands sit right after the header; file offsets they contain
+    (symbol and string tables) are translated through the image's own
+    segments into cache addresses, so they resolve in whichever sub-cache
+    holds the __LINKEDIT data.
+    """
+
+    def __init__(self, cache: DyldSharedCache, install_path: str, address: int):
+        resolved = cache.resolve(address)
+        if resolved is None:
+            raise ValueError(f"unmapped image address {address:#x}")
+        buf, offset = resolved
+        self.cache = cache
+        self.path = install_path
+        self.address = address
+        self.selector_base = cache.selector_base
+        super().__init__(buf, offset, base=0)
+        self.size = sum(seg["vmsize"] for seg in self.segments if seg["name"] != "__LINKEDIT")
+
+    def _file_view(self, offset: int) -> Tuple[Any, int]:
+        for seg in self.segments:
+            if seg["fileoff"] <= offset < seg["fileoff"] + max(seg["filesize"], 1):
+                resolved = self.cache.resolve(seg["vmaddr"] + offset - seg["fileoff"])
+                if resolved is not None:
+                    return resolved
+        raise ValueError(f"file offset {offset:#x} outside {self.path}")
+
+    def vm_view(self, addr: int) -> Optional[Tuple[Any, int]]:
+        # Any cache address is readable, including data shared across images
+        return self.cache.resolve(addr)
+
+    def read_pointer(self, addr: int) -> Tuple[Optional[int], Optional[str]]:
+        view = self.cache.resolve(addr)
+        if view is None:
+            return None, None
+        # Binds are already resolved to the target's cache address
+        return self.cache.decode_pointer(struct.unpack_from("<Q", *view)[0]), None
+
+    def close(self):
+        # The mapping belongs to the cache
+        pass
+
+
+class ObjCMetadataReader:
+    """In-process Objective-C metadata extractor for a Mach-O image.
+
+    Walks __objc_classlist, __objc_catlist, __objc_protolist and
+    __objc_selrefs directly in the mapped binary, so runtime grows with the
+    size of those sections instead of depending on an analyzer. Pointers go
+    through MachOFile.read_pointer, which handles chained fixups, arm64e
+    pointer authentication and binds to classes in other images. Classes are
+    returned in the same shape as r2's `icj` (classname/super/methods) with
+    type encodings, ivars, properties and protocols added.
+
+    Relative method lists in the dyld cache may use direct selectors: offsets
+    from the cache's selector base rather than from the entry. Without a
+    `selector_base` those methods are left out and counted in the class's
+    `unresolved_methods`.
+    """
+
+    # Part of the static layer's cache key; bump when the extracted metadata changes
+    VERSION = 2
+    FAST_DATA_MASK = 0x00007ffffffffff8
+    RO_META = 0x1
+    SMALL_METHODS = 0x80000000
+    DIRECT_SELECTORS = 0x40000000
+    LIST_FLAG_MASK = 0xffff0003
+    CLASS_PREFIX = "_OBJC_CLASS_$_"
+    METACLASS_PREFIX = "_OBJC_METACLASS_$_"
+
+    def __init__(self, macho: MachOFile, selector_base: Optional[int] = None):
+        self.macho = macho
+        self.selector_base = selector_base if selector_base is not None else macho.selector_base
+        self.unresolved_methods = 0
+        self._class_names: Dict[int, Optional[str]] = {}
+        self._protocols: Dict[int, Dict[str, Any]] = {}
+
+    def has_objc(self) -> bool:
+        return any(self.macho.sections_named(name) for name in
+                   ("__objc_classlist", "__objc_catlist", "__objc_protolist", "__objc_selrefs"))
+
+    def read(self) -> Dict[str, Any]:
+        classes = list(self.iter_classes())
+        return {
+            "classes": classes,
+            "protocols": self.protocols(),
+            "selector_refs": sum(sect["size"] // 8 for sect in self.macho.sections_named("__objc_selrefs")),
+        }
+
+    def iter_classes(self) -> Iterator[Dict[str, Any]]:
+        """Yield classes, then categories, as they are read; protocols() is complete once this is exhausted"""
+        for p in self._pointer_list("__objc_classlist"):
+            record = self._read_class(p)
+            if record:
+                yield record
+        for p in self._pointer_list("__objc_catlist"):
+            record = self._read_category(p)
+            if record:
+                yield record
+        for p in self._pointer_list("__objc_protolist"):
+            self._read_protocol(p)
+        if self.unresolved_methods:
+            logger.debug(f"    {self.unresolved_methods} methods with unresolved direct selectors")
+
+    def protocols(self) -> List[Dict[str, Any]]:
+        """Protocols declared in the image or adopted by what has been read so far"""
+        return list(self._protocols.values())
+
+    def selectors(self) -> List[str]:
+        """Selector names referenced from __objc_selrefs"""
+        return [name for name in (self.macho.read_cstring(p) for p in self._pointer_list("__objc_selrefs")) if name]
+
+    def class_refs(self, imported_only: bool = False) -> List[str]:
+        """Class names referenced from __objc_classrefs (imported or local)"""
+        names = []
+        for sect in self.macho.sections_named("__objc_classrefs"):
+            for addr in range(sect["addr"], sect["addr"] + sect["size"], 8):
+                target, bound = self.macho.read_pointer(addr)
+                if imported_only and not bound:
+                    continue
+                name = self._symbol_class(bound) if bound else self._class_name(target)
+                if name:
+                    names.append(name)
+        return names
+
+    # -- helpers -------------------------------------------------------------
+
+    def _pointer_list(self, section: str) -> List[int]:
+        pointers = []
+        for sect in self.macho.sections_named(section):
+            for addr in range(sect["addr"], sect["addr"] + sect["size"], 8):
+                target, _bound = self.macho.read_pointer(addr)
+                if target:
+                    pointers.append(target & 0x00ffffffffffffff)
+        return pointers
+
+    def _ptr(self, addr: int) -> Optional[int]:
+        target, _bound = self.macho.read_pointer(addr)
+        return target & 0x00ffffffffffffff if target else None
+
+    def _u32s(self, addr: int, count: int) -> Optional[Tuple[int, ...]]:
+        view = self.macho.vm_view(addr)
+        if view is None:
+            return None
+        return struct.unpack_from(f"<{count}I", *view)
+
+    def _rel32(self, addr: int, base: Optional[int] = None) -> Optional[int]:
+        """Target of a signed 32-bit offset stored at `addr`, relative to `base` (default: `addr`)"""
+        view = self.macho.vm_view(addr)
+        if view is None:
+            return None
+        offset = struct.unpack_from("<i", *view)[0]
+        return (addr if base is None else base) + offset if offset or base is not None else None
+
+    def _read_method_lists(self, record: Dict[str, Any], key: str, lists: List[Tuple[Optional[int], bool]]):
+        """Store the methods of several lists under `key`, noting how many could not be resolved"""
+        before = self.unresolved_methods
+        record[key] = [m for list_addr, class_methods in lists for m in self._read_methods(list_addr, class_methods)]
+        if self.unresolved_methods > before:
+            record["unresolved_methods"] = record.get("unresolved_methods", 0) + self.unresolved_methods - before
+
+    def _symbol_class(self, symbol: Optional[str]) -> Optional[str]:
+        if not symbol:
+            return None
+        for prefix in (self.CLASS_PREFIX, self.METACLASS_PREFIX):
+            if symbol.startswith(prefix):
+                return symbol[len(prefix):]
+        return symbol
+
+    def _class_ro(self, cls_addr: int) -> Optional[int]:
+        data = self._ptr(cls_addr + 32)
+        return data & self.FAST_DATA_MASK if data else None
+
+    def _class_name(self, cls_addr: Optional[int]) -> Optional[str]:
+        if not cls_addr:
+            return None
+        if cls_addr not in self._class_names:
+            ro = self._class_ro(cls_addr)
+            self._class_names[cls_addr] = self.macho.read_cstring(self._ptr(ro + 24)) if ro else None
+        return self._class_names[cls_addr]
+
+    # -- structures ----------------------------------------------------------
+
+    def _read_class(self, cls_addr: int) -> Optional[Dict[str, Any]]:
+        ro = self._class_ro(cls_addr)
+        if not ro:
+            return None
+        name = self.macho.read_cstring(self._ptr(ro + 24))
+        if not name:
+            return None
+
+        super_target, super_bound = self.macho.read_pointer(cls_addr + 8)
+        superclass = self._symbol_class(super_bound) if super_bound else self._class_name(
+            super_target & 0x00ffffffffffffff if super_target else None)
+
+        meta = self._ptr(cls_addr)
+        meta_ro = self._class_ro(meta) if meta else None
+        flags, instance_start, instance_size = self._u32s(ro, 3) or (0, 0, 0)
+        record = {
+            "classname": name,
+            "addr": cls_addr,
+            "lang": "objc",
+            "super": [superclass] if superclass else [],
+        }
+        self._read_method_lists(record, "methods", [(self._ptr(ro + 32), False),
+                                                    (self._ptr(meta_ro + 32) if meta_ro else None, True)])
+        record.update({
+            "fields": self._read_ivars(self._ptr(ro + 48)),
+            "properties": self._read_properties(self._ptr(ro + 64)),
+            "protocols": self._read_protocol_list(self._ptr(ro + 40)),
+            "instance_size": instance_size,
+        })
+        return record
+
+    def _read_category(self, cat_addr: int) -> Optional[Dict[str, Any]]:
+        name = self.macho.read_cstring(self._ptr(cat_addr))
+        if not name:
+            return None
+        cls_target, cls_bound = self.macho.read_pointer(cat_addr + 8)
+        cls_name = self._symbol_class(cls_bound) if cls_bound else self._class_name(
+            cls_target & 0x00ffffffffffffff if cls_target else None)
+        record = {
+            "classname": f"{cls_name or '?'}({name})",
+            "addr": cat_addr,
+            "lang": "objc",
+            "category": True,
+            "super": [cls_name] if cls_name else [],
+        }
+        self._read_method_lists(record, "methods", [(self._ptr(cat_addr + 16), False),
+                                                    (self._ptr(cat_addr + 24), True)])
+        record.update({
+            "fields": [],
+            "properties": self._read_properties(self._ptr(cat_addr + 40)),
+            "protocols": self._read_protocol_list(self._ptr(cat_addr + 32)),
+        })
+        return record
+
+    def _read_methods(self, list_addr: Optional[int], class_methods: bool) -> List[Dict[str, Any]]:
+        if not list_addr:
+            return []
+        header = self._u32s(list_addr, 2)
+        if not header:
+            return []
+        entsize_flags, count = header
+        entsize = entsize_flags & ~self.LIST_FLAG_MASK & 0xffffffff
+        methods = []
+        for i in range(min(count, 1 << 16)):
+            entry = list_addr + 8 + i * entsize
+            if entsize_flags & self.SMALL_METHODS:
+                # Relative method list: int32 offsets to selector ref (or string), types, imp
+                if entsize_flags & self.DIRECT_SELECTORS:
+                    # The selector string is relative to the cache's selector base, not the entry
+                    if self.selector_base is None:
+                        self.unresolved_methods += 1
+                        continue
+                    name = self.macho.read_cstring(self._rel32(entry, self.selector_base))
+                else:
+                    name_ref = self._rel32(entry)
+                    name = self.macho.read_cstring(self._ptr(name_ref)) if name_ref else None
+                types = self.macho.read_cstring(self._rel32(entry + 4))
+                imp = self._rel32(entry + 8)
+            else:
+                name = self.macho.read_cstring(self._ptr(entry))
+                types = self.macho.read_cstring(self._ptr(entry + 8))
+                imp = self._ptr(entry + 16)
+            if name:
+                methods.append({"name": name, "types": types, "addr": imp or 0, "class_method": class_methods})
+        return methods
+
+    def _read_ivars(self, list_addr: Optional[int]) -> List[Dict[str, Any]]:
+        if not list_addr:
+            return []
+        header = self._u32s(list_addr, 2)
+        if not header:
+            return []
+        entsize, count = header
+        ivars = []
+        for i in range(min(count, 1 << 16)):
+            entry = list_addr + 8 + i * entsize
+            offset_ptr = self._ptr(entry)
+            ivars.append({
+                "name": self.macho.read_cstring(self._ptr(entry + 8)),
+                "type": self.macho.read_cstring(self._ptr(entry + 16)),
+                "offset": self.macho.read_u32(offset_ptr) if offset_ptr else None,
+                "size": (self._u32s(entry + 28, 1) or (0,))[0],
+            })
+        return ivars
+
+    def _read_properties(self, list_addr: Optional[int]) -> List[Dict[str, Any]]:
+        if not list_addr:
+            return []
+        header = self._u32s(list_addr, 2)
+        if not header:
+            return []
+        entsize, count = header
+        props = []
+        for i in range(min(count, 1 << 16)):
+            entry = list_addr + 8 + i * entsize
+            name = self.macho.read_cstring(self._ptr(entry))
+            if name:
+                props.append({"name": name, "attributes": self.macho.read_cstring(self._ptr(entry + 8))})
+        return props
+
+    def _read_protocol_list(self, list_addr: Optional[int]) -> List[str]:
+        if not list_addr:
+            return []
+        view = self.macho.vm_view(list_addr)
+        if view is None:
+            return []
+        count = struct.unpack_from("<Q", *view)[0]
+        names = []
+        for i in range(min(count, 1 << 12)):
+            proto = self._ptr(list_addr + 8 + i * 8)
+            if proto:
+                names.append(self._read_protocol(proto).get("name"))
+        return [n for n in names if n]
+
+    def _read_protocol(self, proto_addr: int) -> Dict[str, Any]:
+        if proto_addr in self._protocols:
+            return self._protocols[proto_addr]
+        # Guard against cycles while the adopted protocols are read
+        self._protocols[proto_addr] = record = {"name": self.macho.read_cstring(self._ptr(proto_addr + 8))}
+        record["protocols"] = self._read_protocol_list(self._ptr(proto_addr + 16))
+        self._read_method_lists(record, "methods", [(self._ptr(proto_addr + 24), False),
+                                                    (self._ptr(proto_addr + 32), True)])
+        self._read_method_lists(record, "optional_methods", [(self._ptr(proto_addr + 40), False),
+                                                             (self._ptr(proto_addr + 48), True)])
+        record["properties"] = self._read_properties(self._ptr(proto_addr + 56))
+        if not record["name"]:
+            del self._protocols[proto_addr]
+        return record
+
+
+class FileSnapshot:
+    """Shared, incremental inventory of the framework and consumer trees.
+
+    One `os.scandir` crawl, run in parallel across the top-level entries of
+    every root, records each directory's listing and an inode/mtime/size stat
+    for every file (symlinked files are stat'ed through the link, symlinked
+    directories such as Versions/Current are not followed). When loaded from a
+    previous run, directories whose mtime is unchanged are not listed again and
+    only their files are re-stat'ed; `changed` collects files that are new,
+    gone or whose stat differs (and directories that are gone), so a caller can
+    tell which subtrees need no work at all. The scanner, the static layer's structure scan and the
+    usage layer all read from the snapshot instead of walking on their own.
+    """
+
+    VERSION = 1
+
+    def __init__(self, workers: int = 8):
+        self.workers = workers
+        # directory -> {"mtime": ns, "dirs": [names], "files": {name: [ino, mtime_ns, size, is_link]}}
+        self.dirs: Dict[str, Dict[str, Any]] = {}
+        self.roots: List[str] = []
+        self.changed: set = set()
+        self.relisted = 0
+        self._previous: Dict[str, Dict[str, Any]] = {}
+        # Every directory at or above a changed path, built on first use
+        self._changed_dirs: Optional[set] = None
+
+    def crawl(self, roots: Dict[str, Tuple[str, ...]], quiet: bool = False) -> "FileSnapshot":
+        """Crawl roots (root -> directory suffixes not to descend into) not yet in this snapshot"""
+        start = time.monotonic()
+        tasks = []
+        for root, prune in roots.items():
+            root = os.path.abspath(str(root))
+            if self.covers(root):
+                continue
+            entry, changed, relisted = self._list(root, tuple(prune))
+            if entry is None:
+                continue
+            self.roots.append(root)
+            self.dirs[root] = entry
+            self.changed.update(changed)
+            self._changed_dirs = None
+            self.relisted += relisted
+            tasks += [(os.path.join(root, name), tuple(prune)) for name in entry["dirs"]]
+        if not tasks:
+            return self
+
+        with profiler.span("crawl", "scan", roots=len(roots)):
+            if len(tasks) == 1:
+                results = [self._crawl_tree(*tasks[0])]
+            else:
+                with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                    results = list(pool.map(lambda task: self._crawl_tree(*task), tasks))
+            for dirs, changed, relisted in results:
+                self.dirs.update(dirs)
+                self.changed.update(changed)
+                self._changed_dirs = None
+                self.relisted += relisted
+        if quiet:
+            return self
+        files = sum(len(entry["files"]) for entry in self.dirs.values())
+        logger.info(f"Crawled {len(self.roots)} roots: {len(self.dirs)} directories ({self.relisted} listed), "
+                    f"{files} files ({len(self.changed)} new or changed) in {time.monotonic() - start:.1f}s")
+        return self
+
+    def _crawl_tree(self, top: str, prune: Tuple[str, ...]) -> Tuple[Dict[str, Any], List[str], int]:
+        dirs, changed, relisted = {}, [], 0
+        stack = [top]
+        while stack:
+            path = stack.pop()
+            entry, entry_changed, listed = self._list(path, prune)
+            if entry is None:
+                continue
+            dirs[path] = entry
+            changed += entry_changed
+            relisted += listed
+            stack.extend(os.path.join(path, name) for name in entry["dirs"])
+        return dirs, changed, relisted
+
+    def _list(self, path: str, prune: Tuple[str, ...]) -> Tuple[Optional[Dict[str, Any]], List[str], int]:
+        """One directory's entry; the previous listing is reused while the directory mtime is unchanged"""
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return None, [], 0
+        old = self._previous.get(path)
+        old_files = old["files"] if old else {}
+        changed = []
+
+        if old is not None and old["mtime"] == mtime:
+            files = {}
+            for name, before in old_files.items():
+                full = os.path.join(path, name)
+                try:
+                    st = os.stat(full)
+                except OSError:
+                    changed.append(full)
+                    continue
+                after = [st.st_ino, st.st_mtime_ns, st.st_size, before[3]]
+                if after != before:
+                    changed.append(full)
+                files[name] = after
+            return {"mtime": mtime, "dirs": old["dirs"], "files": files}, changed, 0
+
+        dirs, files = [], {}
+        try:
+            with os.scandir(path) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except PermissionError:
+            logger.warning(f"Permission denied accessing: {path}")
+            entries = []
+        except OSError as e:
+            logger.debug(f"    Cannot list {path}: {e}")
+            entries = []
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if not entry.name.endswith(prune):
+                        dirs.append(entry.name)
+                    continue
+                if not entry.is_file():
+                    continue
+                st = entry.stat()
+                after = [st.st_ino, st.st_mtime_ns, st.st_size, int(entry.is_symlink())]
+            except OSError:
+                continue
+            if old_files.get(entry.name) != after:
+                changed.append(entry.path)
+            files[entry.name] = after
+        if old is not None:
+            changed += [os.path.join(path, name) for name in old_files if name not in files]
+            changed += [os.path.join(path, name) for name in old["dirs"] if name not in dirs]
+        return {"mtime": mtime, "dirs": dirs, "files": files}, changed, 1
+
+    @property
+    def incremental(self) -> bool:
+        """Whether `changed` is relative to a previous snapshot (otherwise every file counts as new)"""
+        return bool(self._previous)
+
+    def changed_under(self, top) -> bool:
+        """Whether any file or directory at or under `top` is new, gone or changed"""
+        if self._changed_dirs is None:
+            dirs = set()
+            for path in self.changed:
+                while path not in dirs:
+                    dirs.add(path)
+                    parent = os.path.dirname(path)
+                    if parent == path:
+                        break
+                    path = parent
+            self._changed_dirs = dirs
+        return os.path.abspath(str(top)) in self._changed_dirs
+
+    def covers(self, path) -> bool:
+        """Whether `path` lies under a root crawled into this snapshot"""
+        path = os.path.abspath(str(path))
+        return any(path == root or path.startswith(root.rstrip(os.sep) + os.sep) for root in self.roots)
+
+    def ensure(self, path, prune: Tuple[str, ...] = ()) -> "FileSnapshot":
+        """Crawl `path` unless it is already covered"""
+        if not self.covers(path):
+            self.crawl({str(path): prune}, quiet=True)
+        return self
+
+    def listing(self, directory) -> Optional[Dict[str, Any]]:
+        return self.dirs.get(os.path.abspath(str(directory)))
+
+    def stat(self, path) -> Optional[List[int]]:
+        """[inode, mtime_ns, size, is_link] of a file, or None if the snapshot has no such file"""
+        parent, name = os.path.split(os.path.abspath(str(path)))
+        entry = self.dirs.get(parent)
+        return entry["files"].get(name) if entry else None
+
+    def walk(self, top, skip: Tuple[str, ...] = (), max_depth: Optional[int] = None):
+        """Yield (directory, depth, entry) under `top`, in name order, not descending into `skip` suffixes"""
+        stack = [(os.path.abspath(str(top)), 0)]
+        while stack:
+            path, depth = stack.pop()
+            entry = self.dirs.get(path)
+            if entry is None:
+                continue
+            yield path, depth, entry
+            if max_depth is None or depth < max_depth:
+                stack.extend((os.path.join(path, name), depth + 1) for name in reversed(entry["dirs"])
+                             if not (skip and name.endswith(skip)))
+
+    def files(self, top):
+        """Yield (path relative to top, absolute path, stat) for every file under `top`"""
+        top = os.path.abspath(str(top))
+        for path, _depth, entry in self.walk(top):
+            for name, st in entry["files"].items():
+                full = os.path.join(path, name)
+                yield os.path.relpath(full, top), full, st
+
+    def fingerprint(self, top) -> str:
+        """Digest of the relative path and stat of every file under `top`; changes with any of them"""
+        digest = hashlib.sha256()
+        for rel, _full, st in self.files(top):
+            digest.update(f"{rel}\0{st[0]}:{st[1]}:{st[2]}\n".encode("utf-8", errors="surrogateescape"))
+        return digest.hexdigest()
+
+    def subset(self, top) -> "FileSnapshot":
+        """The part of the snapshot under `top`, e.g. to hand one framework to a worker"""
+        part = FileSnapshot(self.workers)
+        part.roots = [os.path.abspath(str(top))]
+        part.dirs = {path: entry for path, _depth, entry in self.walk(top)}
+        return part
+
+    def save(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump({"version": self.VERSION, "roots": self.roots, "dirs": self.dirs}, f,
+                      separators=(",", ":"))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path, workers: int = 8) -> "FileSnapshot":
+        """A snapshot that crawls incrementally against the one saved at `path` (if readable)"""
+        snapshot = cls(workers)
+        try:
+            with open(path) as f:
+                raw = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return snapshot
+        if raw.get("version") == cls.VERSION:
+            snapshot._previous = raw.get("dirs", {})
+        return snapshot
+
 
 class FrameworkScanner:
     """Scans for private frameworks on macOS"""
@@ -34,27 +1564,35 @@ class FrameworkScanner:
         # "/System/Library/Frameworks",
     ]
     
-    def __init__(self):
+    # Nested bundles carry their own executables (XPC services, helpers, plugins)
+    NESTED_BUNDLE_SUFFIXES = (".xpc", ".app", ".appex", ".bundle", ".framework", ".plugin", ".kext")
+    MAX_DISCOVERY_DEPTH = 4
+    
+    def __init__(self, snapshot: Optional[FileSnapshot] = None):
         self.frameworks: List[Path] = []
+        self._binary_cache: Dict[str, Optional[Path]] = {}
+        self.snapshot = snapshot if snapshot is not None else FileSnapshot()
+
+    @classmethod
+    def crawl_roots(cls) -> Dict[str, Tuple[str, ...]]:
+        return {path: () for path in cls.FRAMEWORK_PATHS}
     
     def scan(self) -> List[Path]:
         """Scan for frameworks in standard locations"""
         logger.info("Scanning for frameworks...")
+        self.snapshot.crawl(self.crawl_roots())
         
         for base_path in self.FRAMEWORK_PATHS:
-            path = Path(base_path)
-            if not path.exists():
+            listing = self.snapshot.listing(base_path)
+            if listing is None:
                 logger.warning(f"Path does not exist: {base_path}")
                 continue
             
             # Find .framework directories
-            try:
-                for item in path.iterdir():
-                    if item.is_dir() and item.suffix == ".framework":
-                        self.frameworks.append(item)
-                        logger.debug(f"Found framework: {item.name}")
-            except PermissionError:
-                logger.warning(f"Permission denied accessing: {base_path}")
+            for name in listing["dirs"]:
+                if name.endswith(".framework"):
+                    self.frameworks.append(Path(base_path) / name)
+                    logger.debug(f"Found framework: {name}")
         
         logger.info(f"Found {len(self.frameworks)} frameworks")
         return self.frameworks
@@ -80,113 +1618,698 @@ class FrameworkScanner:
             return False
 
     def get_binary_path(self, framework_path: Path) -> Optional[Path]:
-        """Get the main binary path from a framework"""
-        framework_name = framework_path.stem
-        
-        # 1. Try standard locations first (fast path)
-        candidates = [
-            framework_path / framework_name,
-            framework_path / "Versions" / "A" / framework_name,
-            framework_path / "Versions" / "Current" / framework_name,
-        ]
+        """Get the main binary path from a framework (cached for the rest of the run)"""
+        key = str(framework_path)
+        if key not in self._binary_cache:
+            self._binary_cache[key] = self._discover_binary(framework_path)
+        return self._binary_cache[key]
+
+    def binary_size(self, binary_path: Path) -> int:
+        """Size of a binary on disk, or of its image in the dyld shared cache"""
+        try:
+            return binary_path.stat().st_size
+        except OSError:
+            macho = MachOFile.open(binary_path)
+            if macho is None:
+                return 0
+            try:
+                return macho.size
+            finally:
+                macho.close()
+
+    def remember_binary(self, framework_path: Path, binary_path: Optional[Path]):
+        """Seed the discovery cache, e.g. with a path resolved by another process"""
+        self._binary_cache[str(framework_path)] = binary_path
+
+    def _discover_binary(self, framework_path: Path) -> Optional[Path]:
+        framework_name = framework_path.stem
+        
+        # 1. Try standard locations first (fast path), starting with what
+        #    Info.plist declares as the executable
+        names = [framework_name]
+        executable = self._bundle_executable(framework_path)
+        if executable and executable != framework_name:
+            names.insert(0, executable)
+        candidates = []
+        for name in names:
+            candidates += [
+                framework_path / name,
+                framework_path / "Versions" / "A" / name,
+                framework_path / "Versions" / "Current" / name,
+            ]
         
         for c in candidates:
-            if c.exists() and self.is_macho(c):
+            if self.is_macho(c):
                 return c
+
+        # 2. On current macOS most framework binaries only exist in the dyld shared cache
+        cache = DyldSharedCache.current
+        if cache is not None:
+            for name in names:
+                for install_path in (framework_path / "Versions" / "A" / name, framework_path / name):
+                    if cache.has_image(str(install_path)):
+                        return install_path
         
-        # 2. Search recursively for Mach-O files
+        # 3. Bounded walk for Mach-O files that belong to this bundle; nested
+        #    bundles carry their own executables, links point back into Versions/A
         macho_files = []
-        try:
-            for p in framework_path.rglob("*"):
-                if self.is_macho(p):
-                    macho_files.append(p)
-        except PermissionError:
-            pass
+        self.snapshot.ensure(framework_path)
+        for directory, _depth, entry in self.snapshot.walk(framework_path, self.NESTED_BUNDLE_SUFFIXES,
+                                                          self.MAX_DISCOVERY_DEPTH):
+            for name, st in entry["files"].items():
+                if not st[3] and self.is_macho(Path(directory) / name):
+                    macho_files.append((Path(directory) / name, st[2]))
             
         if not macho_files:
             return None
             
-        # 3. Heuristics to pick the "main" binary
-        for p in macho_files:
-            if p.name == framework_name:
+        # 4. Heuristics to pick the "main" binary
+        for p, _size in macho_files:
+            if p.name in names:
                 return p
                 
-        return max(macho_files, key=lambda p: p.stat().st_size)
+        return max(macho_files, key=lambda f: f[1])[0]
+
+    def _bundle_executable(self, framework_path: Path) -> Optional[str]:
+        """CFBundleExecutable from the framework's Info.plist, if any"""
+        for plist in (framework_path / "Resources" / "Info.plist",
+                      framework_path / "Versions" / "A" / "Resources" / "Info.plist",
+                      framework_path / "Info.plist"):
+            try:
+                with open(plist, "rb") as f:
+                    value = plistlib.load(f).get("CFBundleExecutable")
+            except (OSError, plistlib.InvalidFileException, ValueError, AttributeError):
+                continue
+            if isinstance(value, str) and value:
+                return value
+        return None
+
+
+class R2Session:
+    """A long-lived radare2 process for one binary, driven over a pipe.
+
+    Uses the r2pipe protocol (`r2 -q0`): each command is written as a line
+    and its output is terminated by a NUL byte. The binary is loaded once and
+    every command reuses that work. A command that exceeds its timeout kills
+    the process; the next command transparently starts a fresh session.
+    """
+
+    def __init__(self, binary_path: Path, timeout: float = 30):
+        self.binary_path = binary_path
+        self.timeout = timeout
+        self._proc: Optional[subprocess.Popen] = None
+
+    def _start(self):
+        self._proc = subprocess.Popen(
+            ["r2", "-q0", "-e", "scr.color=0", "-e", "scr.interactive=false", str(self.binary_path)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL
+        )
+        # r2 signals that the binary is loaded with an initial NUL
+        with profiler.span("r2", "subprocess", argv=f"(load) {self.binary_path.name}"):
+            self._read_reply(self.timeout)
+
+    def _read_reply(self, timeout: float) -> bytes:
+        fd = self._proc.stdout.fileno()
+        deadline = time.monotonic() + timeout
+        chunks = []
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self.close(kill=True)
+                raise subprocess.TimeoutExpired(["r2", str(self.binary_path)], timeout)
+            ready, _, _ = select.select([fd], [], [], remaining)
+            if not ready:
+                continue
+            chunk = os.read(fd, 1 << 16)
+            if not chunk:
+                self.close(kill=True)
+                raise OSError(f"r2 exited while reading {self.binary_path.name}")
+            end = chunk.find(b"\0")
+            if end >= 0:
+                chunks.append(chunk[:end])
+                return b"".join(chunks)
+            chunks.append(chunk)
+
+    def cmd(self, command: str, timeout: Optional[float] = None) -> str:
+        if self._proc is None or self._proc.poll() is not None:
+            self._start()
+        with profiler.span("r2", "subprocess", argv=command) as span:
+            self._proc.stdin.write(command.encode() + b"\n")
+            self._proc.stdin.flush()
+            reply = self._read_reply(timeout or self.timeout)
+            span.set(output_bytes=len(reply))
+        return reply.decode("utf-8", errors="replace")
+
+    def cmdj(self, command: str, timeout: Optional[float] = None) -> Any:
+        """Run a JSON command; returns None when the output is empty or not JSON"""
+        out = self.cmd(command, timeout).strip()
+        if not out:
+            return None
+        try:
+            return json.loads(out)
+        except json.JSONDecodeError:
+            return None
+
+    def close(self, kill: bool = False):
+        proc, self._proc = self._proc, None
+        if proc is None:
+            return
+        try:
+            if not kill and proc.poll() is None:
+                proc.stdin.write(b"q!\n")
+                proc.stdin.flush()
+                proc.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            pass
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+        for stream in (proc.stdin, proc.stdout):
+            try:
+                stream.close()
+            except OSError:
+                pass
+
+
+class R2SessionManager:
+    """Hands out one R2Session per binary, keeping a bounded number open"""
+
+    def __init__(self, max_sessions: int = 2, timeout: float = 30):
+        self.max_sessions = max_sessions
+        self.timeout = timeout
+        self._sessions: "OrderedDict[str, R2Session]" = OrderedDict()
+
+    def session(self, binary_path: Path) -> R2Session:
+        key = str(binary_path)
+        if key in self._sessions:
+            self._sessions.move_to_end(key)
+            return self._sessions[key]
+        while len(self._sessions) >= self.max_sessions:
+            _, oldest = self._sessions.popitem(last=False)
+            oldest.close()
+        session = R2Session(binary_path, self.timeout)
+        self._sessions[key] = session
+        return session
+
+    def release(self, binary_path: Path):
+        session = self._sessions.pop(str(binary_path), None)
+        if session is not None:
+            session.close()
+
+    def close_all(self):
+        while self._sessions:
+            _, session = self._sessions.popitem()
+            session.close()
+
+
+class PlistParser:
+    """In-process plist parsing for the structure scan.
+
+    Handles binary and XML plists via plistlib (no `plutil` launches), parses
+    files concurrently, skips files over a size cap, and caches results by
+    content hash so identical files are only decoded once per process. Values
+    are converted to JSON-safe types; very large plists are reduced to a
+    summary of their top-level keys.
+    """
+
+    def __init__(self, max_workers: int = 8, max_file_bytes: int = 16 << 20,
+                 summarize_over: int = 1 << 20, cache_entries: int = 4096):
+        self.max_workers = max_workers
+        self.max_file_bytes = max_file_bytes
+        self.summarize_over = summarize_over
+        self.cache_entries = cache_entries
+        self._cache: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def parse_many(self, paths: List[Path]) -> Dict[Path, Any]:
+        return dict(self.iter_parsed(paths))
+
+    def iter_parsed(self, paths: List[Path]) -> Iterator[Tuple[Path, Any]]:
+        """Yield (path, parsed value) in order of `paths`, each as soon as it and those before it are done"""
+        if len(paths) <= 1:
+            yield from ((p, self.parse(p)) for p in paths)
+            return
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(paths))) as pool:
+            yield from zip(paths, pool.map(self.parse, paths))
+
+    def parse(self, path: Path) -> Optional[Any]:
+        try:
+            size = path.stat().st_size
+            if size > self.max_file_bytes:
+                logger.debug(f"    Skipping oversized plist {path.name} ({size} bytes)")
+                return {"_truncated": True, "size": size}
+            raw = path.read_bytes()
+        except OSError as e:
+            logger.warning(f"    Failed to read plist {path.name}: {e}")
+            return None
+
+        digest = hashlib.sha256(raw).hexdigest()
+        with self._lock:
+            if digest in self._cache:
+                self._cache.move_to_end(digest)
+                return self._cache[digest]
+
+        try:
+            value = plistlib.loads(raw)
+        except Exception as e:
+            logger.warning(f"    Failed to parse plist {path.name}: {e}")
+            return None
+
+        if size > self.summarize_over:
+            value = self._summarize(value, size)
+        else:
+            value = self._to_json(value)
+
+        with self._lock:
+            self._cache[digest] = value
+            while len(self._cache) > self.cache_entries:
+                self._cache.popitem(last=False)
+        return value
+
+    def _to_json(self, value: Any) -> Any:
+        """Convert plist values to what `plutil -convert json` would emit"""
+        if isinstance(value, dict):
+            return {str(k): self._to_json(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [self._to_json(v) for v in value]
+        if isinstance(value, bytes):
+            return base64.b64encode(value).decode("ascii")
+        if isinstance(value, datetime.datetime):
+            return value.isoformat()
+        if isinstance(value, plistlib.UID):
+            return {"CF$UID": value.data}
+        return value
+
+    def _summarize(self, value: Any, size: int) -> Dict[str, Any]:
+        summary: Dict[str, Any] = {"_summary": True, "size": size, "type": type(value).__name__}
+        if isinstance(value, dict):
+            summary["key_count"] = len(value)
+            summary["keys"] = [str(k) for k in list(value)[:200]]
+        elif isinstance(value, list):
+            summary["length"] = len(value)
+        return summary
+
+
+class RecordSpool:
+    """A list of JSON records kept in a JSON Lines file instead of in memory.
+
+    Producers append() records as they are made and consumers iterate them
+    back one at a time, so a layer can hand over any number of records at a
+    constant memory cost. A new spool lives in a temp file that it owns and
+    deletes on discard(); one opened over an existing file (a cache entry)
+    leaves the file alone. Spools pickle as their path, so a pipeline worker
+    can pass one to the parent. A `mapping` spool holds [key, value] records
+    and stands in for a dict rather than a list.
+    """
+
+    def __init__(self, path: Optional[Path] = None, count: int = 0, mapping: bool = False):
+        self.owned = path is None
+        if path is None:
+            fd, name = tempfile.mkstemp(prefix="deapplefy-", suffix=".jsonl")
+            os.close(fd)
+            path = Path(name)
+        self.path = path
+        self.count = count
+        self.mapping = mapping
+        self._file = None
+
+    def append(self, record: Any):
+        if self._file is None:
+            self._file = open(self.path, "a")
+        self._file.write(json.dumps(record, separators=(",", ":"), default=str) + "\n")
+        self.count += 1
+
+    def close(self):
+        """Finish writing; appending again reopens the file"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def discard(self):
+        self.close()
+        if self.owned:
+            try:
+                self.path.unlink()
+            except OSError:
+                pass
+            self.owned = False
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __iter__(self):
+        self.close()
+        with open(self.path) as f:
+            for line in f:
+                yield json.loads(line)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        self.close()
+        return {"path": self.path, "count": self.count, "mapping": self.mapping, "owned": self.owned, "_file": None}
+
+    @staticmethod
+    def nested(value: Any):
+        """Yield (key path, spool) for every spool in a tree of dicts"""
+        if isinstance(value, RecordSpool):
+            yield [], value
+        elif isinstance(value, dict):
+            for key, item in value.items():
+                for path, spool in RecordSpool.nested(item):
+                    yield [key] + path, spool
+
+    @staticmethod
+    def discard_all(data: Dict[str, Any]):
+        """Discard the spools in a framework result's layers once it has been written"""
+        for _path, spool in RecordSpool.nested(data):
+            spool.discard()
+
+
+class SpoolBudget:
+    """Memory ceiling for the record lists of one layer result.
+
+    Lists are built with add() or collect(): records stay in a plain list (or
+    dict) while the encoded size of everything collected against the budget
+    is within `ceiling` bytes. Past it, the list in hand moves into a
+    RecordSpool and its remaining records go straight to disk, so a layer
+    holds at most about `ceiling` bytes of records however large the
+    framework. A ceiling of None never spills.
+    """
+
+    DEFAULT_CEILING = 32 << 20
+
+    def __init__(self, ceiling: Optional[int] = DEFAULT_CEILING):
+        self.ceiling = ceiling
+        self.used = 0
+
+    @staticmethod
+    def _size(record: Any) -> int:
+        # Close enough to the JSON Lines size for the common scalar records
+        if isinstance(record, str):
+            return len(record) + 3
+        if isinstance(record, int):
+            return len(str(record)) + 1
+        return len(json.dumps(record, separators=(",", ":"), default=str)) + 1
+
+    def add(self, items: Union[List[Any], RecordSpool], record: Any) -> Union[List[Any], RecordSpool]:
+        """Append `record` and return what to keep appending to (a spool once the ceiling is passed)"""
+        if self.ceiling is not None and isinstance(items, list):
+            self.used += self._size(record)
+            if self.used > self.ceiling:
+                spool = RecordSpool()
+                for item in items:
+                    spool.append(item)
+                items = spool
+        items.append(record)
+        return items
+
+    def collect(self, records: Iterable[Any], mapping: bool = False) -> Union[List[Any], Dict[str, Any], RecordSpool]:
+        """A list of `records` (a dict of (key, value) pairs with `mapping`), spilled if the budget runs out"""
+        items: Union[List[Any], RecordSpool] = []
+        try:
+            for record in records:
+                items = self.add(items, list(record) if mapping else record)
+        except BaseException:
+            if isinstance(items, RecordSpool):
+                items.discard()
+            raise
+        if isinstance(items, RecordSpool):
+            items.mapping = mapping
+            items.close()
+            return items
+        return dict(items) if mapping else items
+
+
+class SwiftSymbolTable:
+    """Complete Swift symbol set of one binary, stored compactly.
+
+    Symbols are classified as they stream in: only mangled Swift names are
+    kept, interned, with small integer codes for their kind (derived from the
+    mangling suffix) and type, and addresses in an array. Serialized as
+    parallel columns. Demangling is deferred to `demangle()`, which consumers
+    that show Swift names (the SQLite index, `deapplefy diff`) call with just
+    the names they need; it batches them through `swift-demangle` and keeps
+    results in a bounded LRU cache.
+    """
+
+    PREFIXES = ("_$s", "$s", "_$S", "$S", "_$e", "$e", "_T0", "_Tt")
+    TYPES = ["FUNC", "OBJ", "IMPORT"]
+    # Mangling suffix -> symbol kind; longest suffixes are matched first
+    KIND_SUFFIXES = [
+        ("Mn", "nominal_type_descriptor"),
+        ("Mp", "protocol_descriptor"),
+        ("Mc", "protocol_conformance_descriptor"),
+        ("Ma", "metadata_accessor"),
+        ("Mf", "full_metadata"),
+        ("Mm", "metaclass"),
+        ("Mo", "class_metadata_base_offset"),
+        ("Mu", "method_lookup_function"),
+        ("MV", "value_witness_table"),
+        ("N", "type_metadata"),
+        ("Tq", "method_descriptor"),
+        ("Tj", "dispatch_thunk"),
+        ("TW", "protocol_witness"),
+        ("Tu", "async_function_pointer"),
+        ("WP", "protocol_witness_table"),
+        ("Wv", "field_offset"),
+        ("fC", "allocating_init"),
+        ("fc", "init"),
+        ("fD", "deallocating_deinit"),
+        ("fd", "deinit"),
+        ("vg", "getter"),
+        ("vs", "setter"),
+        ("vM", "modify_coroutine"),
+        ("F", "function"),
+    ]
+    KINDS = ["other"] + [kind for _suffix, kind in KIND_SUFFIXES]
+
+    DEMANGLERS = [["swift-demangle", "--compact"], ["xcrun", "swift-demangle", "--compact"]]
+    DEMANGLE_CACHE_SIZE = 1 << 16
+    _demangled: "OrderedDict[str, str]" = OrderedDict()
+    # The demangler command that worked; [] once none did
+    _demangler: Optional[List[str]] = None
+
+    def __init__(self, budget: Optional[SpoolBudget] = None):
+        # With a budget, the name column moves to disk once the budget runs out
+        self.budget = budget
+        self.names: Union[List[str], RecordSpool] = []
+        self.kinds = array("B")
+        self.types = array("B")
+        self.addrs = array("Q")
+        self._kind_codes = {kind: i for i, kind in enumerate(self.KINDS)}
+        self._type_codes = {t: i for i, t in enumerate(self.TYPES)}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @classmethod
+    def is_swift(cls, name: str) -> bool:
+        return name.startswith(cls.PREFIXES)
+
+    def classify(self, name: str) -> int:
+        for suffix, kind in self.KIND_SUFFIXES:
+            if name.endswith(suffix):
+                return self._kind_codes[kind]
+        return 0
+
+    def add(self, name: str, sym_type: str, addr: int = 0):
+        if not name or not self.is_swift(name):
+            return
+        if self.budget is not None:
+            self.names = self.budget.add(self.names, sys.intern(name))
+        else:
+            self.names.append(sys.intern(name))
+        self.kinds.append(self.classify(name))
+        self.types.append(self._type_codes.get(sym_type, 1))
+        self.addrs.append(addr or 0)
+
+    def add_macho(self, macho: MachOFile):
+        """Stream a Mach-O symbol table through the classifier"""
+        code_sections = [bool(sect["flags"] & 0x80000000) for seg in macho.segments for sect in seg["sections"]]
+        for name, n_type, n_sect, _desc, n_value in macho.iter_symbols():
+            if n_type & MachOFile.N_STAB or not self.is_swift(name):
+                continue
+            if (n_type & MachOFile.N_TYPE) == MachOFile.N_UNDF:
+                sym_type = "IMPORT"
+            elif 0 < n_sect <= len(code_sections) and code_sections[n_sect - 1]:
+                sym_type = "FUNC"
+            else:
+                sym_type = "OBJ"
+            self.add(name, sym_type, n_value)
+
+    def to_dict(self) -> Dict[str, Any]:
+        columns = {"kind": self.kinds, "type": self.types, "addr": self.addrs}
+        if self.budget is None:
+            columns = {key: column.tolist() for key, column in columns.items()}
+        else:
+            columns = {key: self.budget.collect(column) for key, column in columns.items()}
+        if isinstance(self.names, RecordSpool):
+            self.names.close()
+        return {
+            "is_swift": len(self.names) > 0,
+            "symbol_count": len(self.names),
+            "kinds": self.KINDS,
+            "types": self.TYPES,
+            "symbols": {"name": self.names, **columns},
+        }
+
+    def discard(self):
+        """Drop the name column's spool of a table that won't be used"""
+        if isinstance(self.names, RecordSpool):
+            self.names.discard()
+
+    @classmethod
+    def iter_records(cls, metadata: Dict[str, Any]):
+        """Yield {"name", "kind", "type", "addr"} dicts from either the columnar or the older list form"""
+        symbols = (metadata or {}).get("symbols") or []
+        if isinstance(symbols, list):
+            for sym in symbols:
+                yield {"name": sym.get("name"), "kind": None, "type": sym.get("type"), "addr": sym.get("vaddr"),
+                       "demangled": sym.get("demname")}
+            return
+        kinds = metadata.get("kinds") or cls.KINDS
+        types = metadata.get("types") or cls.TYPES
+        for name, kind, sym_type, addr in zip(symbols.get("name", []), symbols.get("kind", []),
+                                              symbols.get("type", []), symbols.get("addr", [])):
+            yield {"name": name, "kind": kinds[kind], "type": types[sym_type], "addr": addr}
+
+    @classmethod
+    def demangle(cls, names: List[str]) -> Dict[str, str]:
+        """Demangle names with one `swift-demangle` call; without the tool names map to themselves"""
+        result, missing = {}, []
+        for name in dict.fromkeys(names):
+            if name in cls._demangled:
+                cls._demangled.move_to_end(name)
+                result[name] = cls._demangled[name]
+            else:
+                missing.append(name)
+        if missing:
+            demangled = cls._run_demangler(missing)
+            if demangled is None:
+                result.update(zip(missing, missing))
+            else:
+                for name, text in zip(missing, demangled):
+                    result[name] = cls._demangled[name] = text
+                while len(cls._demangled) > cls.DEMANGLE_CACHE_SIZE:
+                    cls._demangled.popitem(last=False)
+        return result
+
+    @classmethod
+    def _run_demangler(cls, names: List[str]) -> Optional[List[str]]:
+        if cls._demangler == []:
+            return None
+        for cmd in [cls._demangler] if cls._demangler else cls.DEMANGLERS:
+            try:
+                res = run_tool(cmd, input="\n".join(names) + "\n", capture_output=True,
+                               text=True, timeout=60 + len(names) // 1000)
+            except (OSError, subprocess.TimeoutExpired):
+                continue
+            lines = res.stdout.splitlines()
+            if res.returncode == 0 and len(lines) == len(names):
+                cls._demangler = cmd
+                return lines
+        if cls._demangler is None:
+            logger.debug("swift-demangle not available; Swift symbols stay mangled")
+            cls._demangler = []
+        return None
 
 
 class StaticAnalyzer:
-    """Layer 1: Static Analysis using radare2"""
+    """Layer 1: Static Analysis with the native Mach-O readers, radare2 as the fallback.
+
+    Classes, Swift symbols, the file list and parsed plists are handed to a
+    SpoolBudget as they are read, so past `spool_ceiling` bytes they go to
+    disk instead of accumulating in the result.
+    """
     
-    def __init__(self):
-        self._check_tools()
+    def __init__(self, snapshot: Optional[FileSnapshot] = None,
+                 spool_ceiling: Optional[int] = SpoolBudget.DEFAULT_CEILING):
+        self.spool_ceiling = spool_ceiling
+        self.has_r2 = self._check_tools()
+        self.r2 = R2SessionManager()
+        self.plists = PlistParser()
+        self.snapshot = snapshot if snapshot is not None else FileSnapshot()
         
-    def _check_tools(self):
+    def _check_tools(self) -> bool:
         try:
-            subprocess.run(["r2", "-v"], capture_output=True, check=True)
-            subprocess.run(["rabin2", "-v"], capture_output=True, check=True)
-        except (subprocess.CalledProcessError, FileNotFoundError):
-            logger.error("radare2/rabin2 not installed.")
-            sys.exit(1)
+            run_tool(["r2", "-v"], capture_output=True, check=True)
+        except (subprocess.CalledProcessError, OSError):
+            logger.warning("radare2 not installed; binaries the Mach-O reader can't parse get no r2 fallback")
+            return False
+        return True
 
     def analyze(self, framework_path: Path, binary_path: Path) -> Dict[str, Any]:
         logger.info(f"  [Layer 1] Analyzing {framework_path.name}...")
         
-        info = self._get_binary_info(binary_path)
-        classes = self._extract_classes(binary_path)
-        structure = self._scan_structure(framework_path)
-        
-        swift_metadata = self._extract_swift_metadata(binary_path)
+        # r2 needs a file; images that only live in the dyld shared cache are
+        # read in place by the Mach-O reader instead
+        on_disk = binary_path.is_file()
+        budget = SpoolBudget(self.spool_ceiling)
+        parts: Dict[str, Any] = {}
+        try:
+            parts["info"] = self._get_binary_info(binary_path)
+            parts["objc"] = self._extract_objc(binary_path, budget)
+            if parts["objc"] is None:
+                classes = self._extract_classes(binary_path) if on_disk else []
+                parts["objc"] = {"classes": budget.collect(classes), "protocols": []}
+            parts["structure"] = self._scan_structure(framework_path, budget)
+            
+            parts["swift_metadata"] = self._extract_swift_metadata(binary_path, budget)
+        except BaseException:
+            RecordSpool.discard_all(parts)
+            raise
+        finally:
+            # All queries for this binary are done; don't keep r2 around
+            self.r2.release(binary_path)
         
         return {
             "layer": "static",
-            "binary_info": info,
-            "classes": classes,
-            "swift_metadata": swift_metadata,
-            "protocols": [],
-            "structure": structure
+            "binary_info": parts["info"],
+            "classes": parts["objc"]["classes"],
+            "swift_metadata": parts["swift_metadata"],
+            "protocols": parts["objc"]["protocols"],
+            "structure": parts["structure"]
         }
 
-    def _extract_swift_metadata(self, binary_path: Path) -> Dict[str, Any]:
-        """Extract Swift-specific metadata"""
-        metadata = {
-            "is_swift": False,
-            "symbols": []
-        }
+    def _extract_swift_metadata(self, binary_path: Path, budget: SpoolBudget) -> Dict[str, Any]:
+        """Extract Swift-specific metadata (the complete Swift symbol set, in compact form)"""
+        table = SwiftSymbolTable(budget)
         
+        macho = MachOFile.open(binary_path)
+        if macho is not None:
+            # Stream straight off the symbol table; nothing but Swift symbols is kept
+            try:
+                table.add_macho(macho)
+                return table.to_dict()
+            except (ValueError, struct.error, IndexError) as e:
+                logger.debug(f"    Mach-O symbol table unreadable for {binary_path.name}: {e}")
+                table.discard()
+                table = SwiftSymbolTable(budget)
+            except BaseException:
+                table.discard()
+                raise
+            finally:
+                macho.close()
+
+        if not binary_path.is_file() or not self.has_r2:
+            return table.to_dict()
+
         try:
-            # Check for Swift symbols using nm or r2
-            # We'll use r2 'isj' (symbols) and look for Swift mangling
-            result = subprocess.run(
-                ["r2", "-q", "-c", "isj", str(binary_path)],
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
-            
-            if result.returncode == 0 and result.stdout.strip():
-                try:
-                    symbols = json.loads(result.stdout)
-                    swift_symbols = []
-                    for sym in symbols:
-                        name = sym.get('name', '')
-                        # Swift symbols often start with _$s or $s (demangled might differ)
-                        # checking for 'Swift' in demangled name or specific prefixes
-                        if '_$s' in name or '$s' in name or 'Swift' in sym.get('demname', ''):
-                            swift_symbols.append(sym)
-                            
-                    if swift_symbols:
-                        metadata["is_swift"] = True
-                        metadata["symbols"] = swift_symbols[:100] # Limit for now
-                        
-                except json.JSONDecodeError:
-                    pass
+            # Not a Mach-O we can read: fall back to r2 'isj' (symbols)
+            symbols = self.r2.session(binary_path).cmdj("isj")
+            for sym in symbols or []:
+                table.add(sym.get("name", ""), "IMPORT" if sym.get("is_imported") else sym.get("type", "OBJ"),
+                          sym.get("vaddr", 0))
                     
+        except subprocess.TimeoutExpired:
+            logger.warning(f"    Timeout extracting Swift metadata for {binary_path.name}")
         except Exception as e:
             logger.error(f"    Error extracting Swift metadata: {e}")
             
-        return metadata
+        return table.to_dict()
 
-    def _scan_structure(self, framework_path: Path) -> Dict[str, Any]:
+    def _scan_structure(self, framework_path: Path, budget: SpoolBudget) -> Dict[str, Any]:
         """Scan framework directory structure including plists and CodeResources"""
         structure = {
             "files": [],
@@ -194,74 +2317,92 @@ class StaticAnalyzer:
             "code_resources": None
         }
         
+        plist_files = {}
+        code_resources = []
+
+        def files():
+            for rel_path, full_path, _st in self.snapshot.ensure(framework_path).files(framework_path):
+                p = Path(full_path)
+                if p.suffix.lower() == '.plist':
+                    plist_files[p] = rel_path
+                if p.name == "CodeResources":
+                    code_resources.append(p)
+                yield rel_path
+
+        structure["files"] = budget.collect(files())
+
+        # Parse every plist in-process and concurrently (binary and XML formats),
+        # handing each to the budget as soon as it is parsed
+        def plists():
+            for p, value in self.plists.iter_parsed(list(plist_files) + code_resources):
+                if value is None:
+                    continue
+                if p in plist_files:
+                    yield plist_files[p], value
+                else:
+                    structure["code_resources"] = value
+
         try:
-            for p in framework_path.rglob("*"):
-                if p.is_file():
-                    rel_path = str(p.relative_to(framework_path))
-                    structure["files"].append(rel_path)
-                    
-                    if p.suffix.lower() == '.plist':
-                        try:
-                            # Use plutil to convert binary plists to json for easy reading
-                            res = subprocess.run(
-                                ["plutil", "-convert", "json", "-o", "-", str(p)],
-                                capture_output=True,
-                                text=True
-                            )
-                            if res.returncode == 0:
-                                structure["plists"][rel_path] = json.loads(res.stdout)
-                        except Exception as e:
-                            logger.warning(f"    Failed to parse plist {rel_path}: {e}")
-                            
-                    if p.name == "CodeResources":
-                        try:
-                            # CodeResources is usually a plist
-                            res = subprocess.run(
-                                ["plutil", "-convert", "json", "-o", "-", str(p)],
-                                capture_output=True,
-                                text=True
-                            )
-                            if res.returncode == 0:
-                                structure["code_resources"] = json.loads(res.stdout)
-                        except Exception:
-                            pass
-                            
-        except Exception as e:
-            logger.error(f"    Error scanning structure: {e}")
-            
+            structure["plists"] = budget.collect(plists(), mapping=True)
+        except BaseException:
+            RecordSpool.discard_all(structure)
+            raise
         return structure
 
     def _get_binary_info(self, binary_path: Path) -> Dict[str, Any]:
+        macho = MachOFile.open(binary_path)
+        if macho is not None:
+            try:
+                return {"info": {"info": macho.info()}, "libraries": {"libs": macho.libraries}}
+            except (ValueError, struct.error, IndexError) as e:
+                logger.debug(f"    Mach-O reader failed on {binary_path.name}, falling back to r2: {e}")
+            finally:
+                macho.close()
+        if not self.has_r2:
+            return {}
+
         try:
-            # rabin2 -I (info)
-            res_info = subprocess.run(["rabin2", "-I", "-j", str(binary_path)], capture_output=True, text=True)
-            info = json.loads(res_info.stdout) if res_info.stdout.strip() else {}
+            # Same data as `rabin2 -I -j` / `rabin2 -l -j`, from the shared r2 session
+            session = self.r2.session(binary_path)
+            info = session.cmdj("iIj") or {}
+            libs = session.cmdj("ilj") or []
             
-            # rabin2 -l (libs)
-            res_libs = subprocess.run(["rabin2", "-l", "-j", str(binary_path)], capture_output=True, text=True)
-            libs = json.loads(res_libs.stdout) if res_libs.stdout.strip() else []
-            
-            return {"info": info, "libraries": libs}
+            return {
+                "info": info if "info" in info else {"info": info},
+                "libraries": libs if isinstance(libs, dict) else {"libs": libs}
+            }
         except Exception as e:
             logger.error(f"    Error getting binary info: {e}")
             return {}
 
-    def _extract_classes(self, binary_path: Path) -> List[Dict[str, Any]]:
+    def _extract_objc(self, binary_path: Path, budget: SpoolBudget) -> Optional[Dict[str, Any]]:
+        """Classes, categories and protocols from the native ObjC metadata reader.
+
+        Returns None when the binary can't be read natively so r2 can be tried.
+        """
+        macho = MachOFile.open(binary_path)
+        if macho is None:
+            return None
         try:
-            # r2 -c icj (classes in json)
-            # We use a timeout because r2 can hang on complex binaries
-            result = subprocess.run(
-                ["r2", "-q", "-c", "icj", str(binary_path)],
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
-            if result.returncode == 0 and result.stdout.strip():
-                try:
-                    return json.loads(result.stdout)
-                except json.JSONDecodeError:
-                    pass
+            reader = ObjCMetadataReader(macho)
+            if not reader.has_objc():
+                return {"classes": [], "protocols": []}
+            classes = budget.collect(reader.iter_classes())
+            return {"classes": classes, "protocols": budget.collect(reader.protocols())}
+        except (ValueError, struct.error, IndexError, TypeError) as e:
+            logger.warning(f"    Native ObjC parsing failed for {binary_path.name}, falling back to r2: {e}")
+            return None
+        finally:
+            macho.close()
+
+    def _extract_classes(self, binary_path: Path) -> List[Dict[str, Any]]:
+        if not self.has_r2:
             return []
+        try:
+            # icj (classes in json)
+            # The session applies a per-command timeout because r2 can hang on complex binaries
+            classes = self.r2.session(binary_path).cmdj("icj")
+            return classes if isinstance(classes, list) else []
         except subprocess.TimeoutExpired:
             logger.warning(f"    Timeout extracting classes for {binary_path.name}")
             return []
@@ -270,74 +2411,265 @@ class StaticAnalyzer:
             return []
 
 
+class UsageIndex:
+    """Reverse index of consumer binaries for the usage layer.
+
+    Built in a single pass over the consumer bundles: each binary is read once
+    and the index maps framework install names to the binaries linking them and
+    `_OBJC_CLASS_$_` imports to the binaries importing them. Each entry also
+    keeps the binary's referenced selectors (__objc_selrefs, interned so they
+    are shared between binaries) for selector-level usage. Per-binary entries
+    carry mtime (ns)/size so a saved index can be refreshed by re-reading only the
+    binaries that changed.
+    """
+
+    VERSION = 4
+    CLASS_PREFIX = "_OBJC_CLASS_$_"
+
+    def __init__(self):
+        # binary path -> {"bundle", "mtime", "size", "libs", "classes", "selectors"}
+        self.binaries: Dict[str, Dict[str, Any]] = {}
+        self.linked_by: Dict[str, List[str]] = {}
+        self.class_importers: Dict[str, List[str]] = {}
+        self._by_framework: Dict[str, List[str]] = {}
+        self._digest: Optional[str] = None
+
+    def build(self, bundles: List[Tuple[Path, Path]], snapshot: Optional[FileSnapshot] = None) -> "UsageIndex":
+        """Index (bundle, binary) pairs, reusing entries whose binary is unchanged.
+
+        Stats come from the snapshot when it has the binary.
+        """
+        previous = self.binaries
+        self.binaries = {}
+        reused = 0
+        for bundle, binary in bundles:
+            st = snapshot.stat(binary) if snapshot is not None else None
+            if st is not None:
+                mtime, size = st[1], st[2]
+            else:
+                try:
+                    stat = binary.stat()
+                except OSError:
+                    continue
+                mtime, size = stat.st_mtime_ns, stat.st_size
+            key = str(binary)
+            old = previous.get(key)
+            if old and old["mtime"] == mtime and old["size"] == size:
+                self.binaries[key] = old
+                reused += 1
+                continue
+            entry = self._index_binary(binary)
+            if entry is not None:
+                entry.update({"bundle": str(bundle), "mtime": mtime, "size": size})
+                self.binaries[key] = entry
+
+        self._build_reverse_maps()
+        logger.info(f"Usage index: {len(self.binaries)} consumer binaries ({reused} unchanged)")
+        return self
+
+    def _index_binary(self, binary: Path) -> Optional[Dict[str, Any]]:
+        macho = MachOFile.open(binary)
+        if macho is None:
+            return None
+        try:
+            classes = {
+                name[len(self.CLASS_PREFIX):] for name in macho.undefined_symbols()
+                if name.startswith(self.CLASS_PREFIX)
+            }
+            libs = macho.libraries
+        except (ValueError, struct.error, IndexError) as e:
+            logger.debug(f"    Failed to index {binary}: {e}")
+            macho.close()
+            return None
+
+        selectors = []
+        try:
+            reader = ObjCMetadataReader(macho)
+            classes.update(reader.class_refs(imported_only=True))
+            selectors = sorted({sys.intern(name) for name in reader.selectors()})
+        except (ValueError, struct.error, IndexError, TypeError) as e:
+            logger.debug(f"    Unreadable ObjC references in {binary}: {e}")
+        finally:
+            macho.close()
+        return {"libs": libs, "classes": sorted(classes), "selectors": selectors}
+
+    def _build_reverse_maps(self):
+        self._digest = None
+        self.linked_by = {}
+        self.class_importers = {}
+        self._by_framework = {}
+        for binary, entry in self.binaries.items():
+            for lib in entry["libs"]:
+                self.linked_by.setdefault(lib, []).append(binary)
+                # .../FrameworkName.framework/FrameworkName; the innermost bundle owns
+                # nested ones like Outer.framework/Frameworks/Inner.framework/Inner
+                marker = lib.rfind(".framework/")
+                if marker > 0:
+                    name = lib[lib.rfind("/", 0, marker) + 1:marker]
+                    self._by_framework.setdefault(name, []).append(binary)
+            for cls in entry["classes"]:
+                self.class_importers.setdefault(cls, []).append(binary)
+
+    def digest(self) -> str:
+        """Hash of every indexed binary's path, mtime and size"""
+        if self._digest is None:
+            h = hashlib.sha256()
+            for binary in sorted(self.binaries):
+                entry = self.binaries[binary]
+                h.update(f"{binary}\0{entry['mtime']}\0{entry['size']}\0".encode("utf-8", errors="surrogateescape"))
+            self._digest = h.hexdigest()
+        return self._digest
+
+    def consumers_of(self, framework_name: str) -> List[str]:
+        """Binaries linking against any install name of the framework"""
+        return sorted(set(self._by_framework.get(framework_name, [])))
+
+    def save(self, path: Path):
+        # Selectors are stored once in a table and referenced by position
+        table: Dict[str, int] = {}
+        binaries = {}
+        for binary, entry in self.binaries.items():
+            ids = [table.setdefault(name, len(table)) for name in entry.get("selectors", [])]
+            binaries[binary] = {**entry, "selectors": ids}
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump({"version": self.VERSION, "selectors": list(table), "binaries": binaries}, f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["UsageIndex"]:
+        try:
+            with open(path) as f:
+                raw = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        if raw.get("version") != cls.VERSION:
+            return None
+        index = cls()
+        table = [sys.intern(name) for name in raw.get("selectors", [])]
+        index.binaries = raw.get("binaries", {})
+        for entry in index.binaries.values():
+            entry["selectors"] = [table[i] for i in entry.get("selectors", [])]
+        index._build_reverse_maps()
+        return index
+
+
 class UsageAnalyzer:
     """Layer 2: Usage Analysis"""
     
     SCAN_PATHS = [
         "/System/Applications",
         "/System/Library/CoreServices",
-        # "/Applications" # Too slow for now
+        "/Applications",
     ]
+    # Bundles with their own executable, at any depth (XPC services, extensions, plugins, login items)
+    CONSUMER_SUFFIXES = (".app", ".appex", ".xpc", ".bundle", ".plugin")
+    # Localizations, nibs and models never contain code
+    PRUNE_SUFFIXES = (".lproj", ".nib", ".storyboardc", ".momd", ".dSYM")
+    # Entries in a framework's most-called selector ranking
+    RANKING_SIZE = 100
+
+    def __init__(self, index: Optional[UsageIndex] = None, index_path: Optional[Path] = None,
+                 snapshot: Optional[FileSnapshot] = None,
+                 spool_ceiling: Optional[int] = SpoolBudget.DEFAULT_CEILING):
+        self.index = index
+        self.index_path = index_path
+        self.snapshot = snapshot if snapshot is not None else FileSnapshot()
+        self.spool_ceiling = spool_ceiling
+
+    @classmethod
+    def crawl_roots(cls) -> Dict[str, Tuple[str, ...]]:
+        return {path: cls.PRUNE_SUFFIXES for path in cls.SCAN_PATHS}
+
+    def get_index(self) -> UsageIndex:
+        """Return the consumer index, loading/refreshing or building it on first use"""
+        if self.index is None:
+            index = UsageIndex.load(self.index_path) if self.index_path else None
+            self.index = (index or UsageIndex()).build(self.find_consumers(), self.snapshot)
+            if self.index_path:
+                self.index.save(self.index_path)
+        return self.index
+
+    def find_consumers(self) -> List[Tuple[Path, Path]]:
+        """List (bundle, binary) pairs for every bundle under SCAN_PATHS, including nested ones"""
+        self.snapshot.crawl(self.crawl_roots())
+        consumers = []
+        for base_path in self.SCAN_PATHS:
+            for directory, _depth, entry in self.snapshot.walk(base_path):
+                for name in entry["dirs"]:
+                    if name.endswith(self.CONSUMER_SUFFIXES):
+                        bundle = Path(directory) / name
+                        binary = self._get_bundle_binary(bundle)
+                        if binary:
+                            consumers.append((bundle, binary))
+        return consumers
     
     def analyze(self, framework_name: str, static_data: Dict[str, Any]) -> Dict[str, Any]:
         logger.info(f"  [Layer 2] Analyzing usage for {framework_name}...")
         
-        used_by = []
-        known_classes = set()
-        if static_data and "classes" in static_data:
-            for cls in static_data["classes"]:
-                if "name" in cls:
-                    known_classes.add(cls["name"])
+        index = self.get_index()
+        known_classes = self.known_classes(static_data)
+        method_sets = self.method_sets(static_data)
+        all_selectors = frozenset().union(*method_sets.values())
         
-        # We'll scan a limited set of paths for now to avoid performance issues
-        for base_path in self.SCAN_PATHS:
-            path = Path(base_path)
-            if not path.exists():
-                continue
-                
-            try:
-                # Find all bundles/executables
-                for item in path.iterdir():
-                    if item.suffix in ['.app', '.bundle']:
-                        binary = self._get_bundle_binary(item)
-                        if binary and self._links_against(binary, framework_name):
-                            usage_info = {
-                                "path": str(item),
-                                "binary": str(binary),
-                                "used_classes": self._find_used_classes(binary, known_classes)
-                            }
-                            used_by.append(usage_info)
-            except Exception as e:
-                logger.warning(f"    Error scanning {base_path}: {e}")
-                
+        callers: Dict[Tuple[str, str], int] = {}
+
+        def consumers():
+            for binary in index.consumers_of(framework_name):
+                entry = index.binaries[binary]
+                used_classes = [c for c in entry["classes"] if c in known_classes]
+                # A framework selector counts as a call on a class only if the
+                # binary also references that class
+                called = all_selectors.intersection(entry.get("selectors", ()))
+                calls = {}
+                if called:
+                    for cls in used_classes:
+                        selectors = method_sets.get(cls, frozenset()) & called
+                        if selectors:
+                            calls[cls] = sorted(selectors)
+                            for selector in selectors:
+                                callers[(cls, selector)] = callers.get((cls, selector), 0) + 1
+                yield {
+                    "path": entry["bundle"],
+                    "binary": binary,
+                    "used_classes": used_classes,
+                    "calls": calls
+                }
+
+        # Consumers are handed to the budget one at a time; the per-API
+        # counts are all that is kept of them for the ranking
+        used_by = SpoolBudget(self.spool_ceiling).collect(consumers())
+        ranking = heapq.nsmallest(self.RANKING_SIZE, callers.items(), key=lambda item: (-item[1], item[0]))
         return {
             "layer": "usage",
-            "used_by": used_by
+            "used_by": used_by,
+            "api_ranking": [{"class": cls, "selector": selector, "callers": count}
+                            for (cls, selector), count in ranking]
         }
 
-    def _find_used_classes(self, binary_path: Path, known_classes: set) -> List[str]:
-        """Find which framework classes are used by the binary"""
-        used = []
-        if not known_classes:
-            return []
-            
-        try:
-            # nm -u to find undefined symbols (imports)
-            result = subprocess.run(
-                ["nm", "-u", str(binary_path)],
-                capture_output=True,
-                text=True
-            )
-            if result.returncode == 0:
-                for line in result.stdout.splitlines():
-                    # ObjC class refs look like _OBJC_CLASS_$_ClassName
-                    if "_OBJC_CLASS_$_" in line:
-                        cls_name = line.split("_OBJC_CLASS_$_")[-1].strip()
-                        if cls_name in known_classes:
-                            used.append(cls_name)
-        except Exception:
-            pass
-        return list(set(used))
+    def method_sets(self, static_data: Dict[str, Any]) -> Dict[str, frozenset]:
+        """Selectors implemented per class (category methods count for their base class)"""
+        methods: Dict[str, set] = {}
+        for cls in (static_data or {}).get("classes") or []:
+            name = cls.get("classname") or cls.get("name")
+            if cls.get("category"):
+                name = (cls.get("super") or [None])[0]
+            if not name:
+                continue
+            methods.setdefault(name, set()).update(m["name"] for m in cls.get("methods") or [] if m.get("name"))
+        return {name: frozenset(selectors) for name, selectors in methods.items()}
+
+    def known_classes(self, static_data: Dict[str, Any]) -> set:
+        """Class names defined by the framework according to the static layer"""
+        known_classes = set()
+        if static_data and "classes" in static_data:
+            for cls in static_data["classes"]:
+                # r2 reports "classname"
+                name = cls.get("classname") or cls.get("name")
+                if name:
+                    known_classes.add(name)
+        return known_classes
 
     def _get_bundle_binary(self, bundle_path: Path) -> Optional[Path]:
         """Get the main binary of a bundle"""
@@ -348,237 +2680,3158 @@ class UsageAnalyzer:
             bundle_path / name
         ]
         for c in candidates:
-            if c.exists():
+            if self.snapshot.stat(c) is not None:
                 return c
+        # Executable named differently from the bundle: the only file in Contents/MacOS
+        listing = self.snapshot.listing(bundle_path / "Contents" / "MacOS")
+        if listing and len(listing["files"]) == 1:
+            return bundle_path / "Contents" / "MacOS" / next(iter(listing["files"]))
         return None
 
-    def _links_against(self, binary_path: Path, framework_name: str) -> bool:
-        """Check if a binary links against the framework"""
-        try:
-            # use otool -L or rabin2 -l
-            # otool is usually faster/standard on mac
-            result = subprocess.run(
-                ["otool", "-L", str(binary_path)],
-                capture_output=True,
-                text=True
-            )
-            if result.returncode == 0:
-                # Check if framework name appears in output
-                # Frameworks are usually referenced as .../FrameworkName.framework/FrameworkName
-                return f"/{framework_name}.framework/" in result.stdout
-        except Exception:
-            pass
-        return False
 
+def iter_lines(proc: subprocess.Popen, idle_timeout: float, total_timeout: Optional[float] = None):
+    """Yield a subprocess's stdout line by line (as bytes) under a watchdog.
 
-class RuntimeAnalyzer:
-    """Layer 3: Runtime Analysis"""
-    
-    def analyze(self, framework_path: Path) -> Dict[str, Any]:
-        logger.info(f"  [Layer 3] Analyzing runtime for {framework_path.stem}...")
-        
-        # Try class-dump first (most robust for "runtime-like" headers)
-        if self._has_class_dump():
-            return self._analyze_with_class_dump(framework_path)
-            
-        # Fallback to ctypes/objc runtime (experimental)
-        return self._analyze_with_ctypes(framework_path)
+    Raises subprocess.TimeoutExpired (after killing the process) when no
+    output arrives for `idle_timeout` seconds or the total runtime exceeds
+    `total_timeout`.
+    """
+    fd = proc.stdout.fileno()
+    start = time.monotonic()
+    pending = b""
+    while True:
+        now = time.monotonic()
+        wait = idle_timeout
+        if total_timeout is not None:
+            wait = min(wait, start + total_timeout - now)
+        ready, _, _ = select.select([fd], [], [], max(0.0, wait))
+        if not ready:
+            proc.kill()
+            raise subprocess.TimeoutExpired(proc.args, idle_timeout if wait == idle_timeout else total_timeout)
+        chunk = os.read(fd, 1 << 16)
+        if not chunk:
+            if pending:
+                yield pending
+            return
+        pending += chunk
+        lines = pending.split(b"\n")
+        pending = lines.pop()
+        for line in lines:
+            yield line + b"\n"
 
-    def _has_class_dump(self) -> bool:
-        try:
-            subprocess.run(["class-dump", "--version"], capture_output=True)
-            return True
-        except FileNotFoundError:
-            return False
 
-    def _analyze_with_class_dump(self, framework_path: Path) -> Dict[str, Any]:
-        data = {"method": "class-dump", "headers": []}
-        try:
-            # class-dump -H -o <tmp> <framework>
-            # We'll just dump to stdout for now to parse, or skip -H and just list
-            # class-dump <framework> gives a full dump
-            result = subprocess.run(
-                ["class-dump", str(framework_path)],
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
-            if result.returncode == 0:
-                # Very basic parsing or just storing the raw dump (it's huge)
-                # Let's just store the size or first few lines for now to prove it works
-                data["dump_size"] = len(result.stdout)
-                data["preview"] = result.stdout[:500]
-        except Exception as e:
-            logger.warning(f"    class-dump failed: {e}")
-        return data
+class ClassDumpParser:
+    """Incremental parser for class-dump header output.
 
-    def _analyze_with_ctypes(self, framework_path: Path) -> Dict[str, Any]:
-        """Attempt to load framework and inspect via ObjC runtime (in a subprocess)"""
-        
-        # Only attempt this for System frameworks to avoid crashes
-        if not str(framework_path).startswith("/System/"):
-            return {"method": "ctypes", "status": "skipped_unsafe"}
+    Fed one line at a time, it returns a structured record for every
+    `@interface` (class or category) and `@protocol` block as soon as its
+    `@end` is seen, and parse() yields them from a stream of lines, so
+    memory does not depend on the size of the dump.
+    """
 
-        # Get binary path
-        scanner = FrameworkScanner()
-        binary_path = scanner.get_binary_path(framework_path)
-        if not binary_path:
-            return {"method": "ctypes", "status": "skipped_no_binary"}
+    INTERFACE_RE = re.compile(r"^@interface\s+(\w+)\s*(?:\((\w*)\))?\s*(?::\s*(\w+))?\s*(?:<([^>]*)>)?")
+    PROTOCOL_RE = re.compile(r"^@protocol\s+(\w+)\s*(?:<([^>]*)>)?\s*$")
+    PROPERTY_RE = re.compile(r"^@property\s*(?:\(([^)]*)\))?\s*(.+?)\s*;")
+    SELECTOR_PART_RE = re.compile(r"(\w+)\s*:")
 
-        # Create a small script to run in subprocess
-        script = f"""
-import ctypes
-import sys
+    def __init__(self):
+        self.records = 0
+        self._current: Optional[Dict[str, Any]] = None
+        self._in_ivars = False
+        self._optional = False
+        self._in_comment = False
 
-try:
-    # RTLD_LAZY = 1
-    ctypes.CDLL("{str(binary_path)}", mode=1)
-    print("loaded")
-except OSError:
-    print("load_failed")
-except Exception as e:
-    print(f"error: {{e}}")
-"""
-        
-        try:
-            # Run the script in a separate process
-            result = subprocess.run(
-                [sys.executable, "-c", script],
-                capture_output=True,
-                text=True,
-                timeout=5  # Short timeout for loading
-            )
-            
-            output = result.stdout.strip()
-            if result.returncode != 0:
-                # Subprocess crashed (likely assertion failure or segfault)
-                return {
-                    "method": "ctypes", 
-                    "status": "crashed", 
-                    "error": "Subprocess crashed (likely +load assertion)"
-                }
-            
-            if output == "loaded":
-                return {"method": "ctypes", "status": "loaded"}
-            elif output == "load_failed":
-                return {"method": "ctypes", "status": "load_failed"}
+    def parse(self, lines: Iterable[str]) -> Iterator[Dict[str, Any]]:
+        """Yield a record for every block as soon as it is complete"""
+        for line in lines:
+            record = self.feed(line)
+            if record is not None:
+                yield record
+        record = self.close()
+        if record is not None:
+            yield record
+
+    def feed(self, line: str) -> Optional[Dict[str, Any]]:
+        """Consume one line; returns the block it completes, if any"""
+        line = line.strip()
+        if self._in_comment:
+            if "*/" in line:
+                self._in_comment = False
+                line = line.split("*/", 1)[1].strip()
             else:
-                return {"method": "ctypes", "status": "error", "error": output}
-                
-        except subprocess.TimeoutExpired:
-            return {"method": "ctypes", "status": "timeout"}
-        except Exception as e:
-            logger.warning(f"    Runtime analysis failed: {e}")
-            return {"method": "ctypes", "status": "error", "error": str(e)}
+                return None
+        if line.startswith("/*"):
+            if "*/" not in line:
+                self._in_comment = True
+                return None
+            line = line.split("*/", 1)[1].strip()
+        if "//" in line:
+            line = line.split("//", 1)[0].strip()
+        if not line:
+            return None
 
+        if self._current is None:
+            self._start_block(line)
+            return None
 
-class AIDocumenter:
-    """Layer 4: AI Documentation (Basic Placeholder)"""
-    
-    def __init__(self, output_dir: Path):
-        self.output_dir = output_dir
-        self.output_dir.mkdir(parents=True, exist_ok=True)
+        if line == "@end":
+            return self._finish()
+        elif self._in_ivars:
+            if line.startswith("}"):
+                self._in_ivars = False
+            elif line.endswith(";"):
+                self._current["ivars"].append(self._split_declaration(line[:-1]))
+        elif line == "{":
+            self._in_ivars = True
+        elif line in ("@optional", "@required"):
+            self._optional = line == "@optional"
+        elif line.startswith("@property"):
+            match = self.PROPERTY_RE.match(line)
+            if match:
+                prop = self._split_declaration(match.group(2))
+                prop["attributes"] = [a.strip() for a in (match.group(1) or "").split(",") if a.strip()]
+                self._current["properties"].append(prop)
+        elif line[0] in "+-":
+            method = self._parse_method(line)
+            if method:
+                method["optional"] = self._optional
+                self._current["methods"].append(method)
+        return None
 
-    def generate(self, framework_name: str, data: Dict[str, Any]):
-        # Save raw JSON data
-        json_file = self.output_dir / f"{framework_name}.json"
-        with open(json_file, "w") as f:
-            json.dump(data, f, indent=2, default=str)
-        logger.info(f"  [Layer 4] Saved data to {json_file}")
-        
-        # Generate Markdown
-        md_content = self._generate_simple_markdown(framework_name, data)
+    def close(self) -> Optional[Dict[str, Any]]:
+        """Return the block left open by a truncated dump, if any"""
+        if self._current is None:
+            return None
+        self._current["truncated"] = True
+        return self._finish()
+
+    def _start_block(self, line: str):
+        match = self.INTERFACE_RE.match(line)
+        if match:
+            name, category, superclass, protocols = match.groups()
+            self._current = {
+                "kind": "category" if category is not None else "interface",
+                "name": name,
+                "category": category or None,
+                "superclass": superclass,
+                "protocols": self._split_list(protocols),
+            }
+        else:
+            match = self.PROTOCOL_RE.match(line)
+            if not match:
+                return
+            self._current = {"kind": "protocol", "name": match.group(1),
+                             "protocols": self._split_list(match.group(2))}
+        self._current.update({"ivars": [], "properties": [], "methods": []})
+        self._in_ivars = line.endswith("{")
+        self._optional = False
+
+    def _finish(self) -> Dict[str, Any]:
+        record, self._current = self._current, None
+        self.records += 1
+        self._in_ivars = False
+        return record
+
+    @staticmethod
+    def _split_list(text: Optional[str]) -> List[str]:
+        return [p.strip() for p in (text or "").split(",") if p.strip()]
+
+    @staticmethod
+    def _split_declaration(decl: str) -> Dict[str, str]:
+        """Split `Type *name` / `Type name` into its type and name"""
+        match = re.match(r"^(.*?)([A-Za-z_]\w*)\s*(\[[^\]]*\])?$", decl.strip())
+        if not match:
+            return {"type": decl.strip(), "name": ""}
+        return {"type": (match.group(1) + (match.group(3) or "")).strip(), "name": match.group(2)}
+
+    def _parse_method(self, line: str) -> Optional[Dict[str, Any]]:
+        body = line[1:].strip().rstrip(";").strip()
+        return_type = ""
+        if body.startswith("("):
+            depth = 0
+            for i, ch in enumerate(body):
+                depth += ch == "("
+                depth -= ch == ")"
+                if depth == 0:
+                    return_type, body = body[1:i], body[i + 1:].strip()
+                    break
+        # Drop parenthesised argument types so only `name:` parts remain
+        stripped, depth = [], 0
+        for ch in body:
+            if ch == "(":
+                depth += 1
+            elif ch == ")":
+                depth -= 1
+            elif depth == 0:
+                stripped.append(ch)
+        parts = self.SELECTOR_PART_RE.findall("".join(stripped))
+        selector = "".join(f"{p}:" for p in parts) if parts else body.split()[0] if body else ""
+        if not selector:
+            return None
+        return {"name": selector, "return_type": return_type, "signature": line.rstrip(";"),
+                "class_method": line[0] == "+"}
+
+
+class LoadServer:
+    """Pre-warmed fork server for the ctypes runtime layer.
+
+    A single helper interpreter is started once and imports ctypes (and the
+    ObjC runtime, where available) up front. Every load request is served by
+    a forked child, so a framework that crashes or hangs in its initializers
+    only takes that child down. Requests are JSON lines over the helper's
+    stdin/stdout and can be in flight concurrently.
+    """
+
+    # Seconds past a request's own timeout before the server counts as wedged
+    REPLY_MARGIN = 10
+
+    def __init__(self):
+        self._proc: Optional[subprocess.Popen] = None
+        self._lock = threading.Lock()
+        # Server generation -> request id -> future; a generation's entry goes once its server exits
+        self._pending: Dict[int, Dict[int, Future]] = {}
+        self._generation = 0
+        self._next_id = 0
+
+    def _start(self):
+        bootstrap = (
+            "import importlib.util, sys\n"
+            f"spec = importlib.util.spec_from_file_location('deapplefy_loader', {os.path.abspath(__file__)!r})\n"
+            "module = importlib.util.module_from_spec(spec)\n"
+            "spec.loader.exec_module(module)\n"
+            "module.LoadServer.serve()\n"
+        )
+        self._proc = subprocess.Popen(
+            [sys.executable, "-c", bootstrap],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL
+        )
+        self._generation += 1
+        self._pending[self._generation] = {}
+        threading.Thread(target=self._read_replies, args=(self._proc, self._generation), daemon=True).start()
+
+    def _read_replies(self, proc: subprocess.Popen, generation: int):
+        for line in proc.stdout:
+            try:
+                reply = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            with self._lock:
+                future = self._pending[generation].pop(reply.pop("id", None), None)
+            if future is not None:
+                future.set_result(reply)
+            elif reply.get("status") == "error":
+                logger.debug(f"    Load server: {reply.get('error')}")
+        # This server went away: fail what was sent to it, not what a restarted one is serving
+        with self._lock:
+            pending = self._pending.pop(generation)
+        for future in pending.values():
+            future.set_result({"status": "error", "error": "load server exited"})
+
+    def submit(self, binary_path: Path, timeout: float = 5) -> Future:
+        """Queue a load of `binary_path`; the future resolves to the child's report"""
+        return self._send(binary_path, timeout)[2]
+
+    def _send(self, binary_path: Path, timeout: float) -> Tuple[int, int, Future]:
+        future = Future()
+        with self._lock:
+            if self._proc is None or self._proc.poll() is not None or self._generation not in self._pending:
+                self._start()
+            self._next_id += 1
+            self._pending[self._generation][self._next_id] = future
+            request = {"id": self._next_id, "path": str(binary_path), "timeout": timeout}
+            try:
+                self._proc.stdin.write(json.dumps(request).encode() + b"\n")
+                self._proc.stdin.flush()
+            except OSError:
+                # Died since the check; its reply reader fails the future
+                pass
+            return self._generation, self._next_id, future
+
+    def load(self, binary_path: Path, timeout: float = 5) -> Dict[str, Any]:
+        with profiler.span("ctypes-load", "subprocess", argv=Path(binary_path).name) as span:
+            generation, request_id, future = self._send(binary_path, timeout)
+            # The server enforces the timeout itself; the margin only guards against a wedged server
+            try:
+                report = future.result(timeout + self.REPLY_MARGIN)
+            except FutureTimeoutError:
+                self._abandon(generation, request_id)
+                raise
+            span.set(status=report.get("status"), timeout=report.get("status") == "timeout")
+        return report
+
+    def _abandon(self, generation: int, request_id: int):
+        """Drop a request a wedged server never answered and replace that server"""
+        with self._lock:
+            self._pending.get(generation, {}).pop(request_id, None)
+            if generation != self._generation or self._proc is None:
+                return
+            proc = self._proc
+            self._start()
+        logger.warning(f"Load server did not answer request {request_id}; restarting it")
+        # Its reply reader fails the rest of that generation's requests once it is gone
+        proc.kill()
+        proc.wait()
+
+    def close(self):
+        with self._lock:
+            proc, self._proc = self._proc, None
+        if proc is not None and proc.poll() is None:
+            proc.stdin.close()
+            try:
+                proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.wait()
+
+    # -- server side (runs inside the helper interpreter) --
+
+    @staticmethod
+    def _objc_runtime():
+        import ctypes
+        import ctypes.util
+        path = ctypes.util.find_library("objc")
+        if not path:
+            return None
+        try:
+            objc = ctypes.CDLL(path)
+            objc.objc_getClassList.restype = ctypes.c_int
+            objc.objc_getClassList.argtypes = [ctypes.c_void_p, ctypes.c_int]
+            objc.class_getName.restype = ctypes.c_char_p
+            objc.class_getName.argtypes = [ctypes.c_void_p]
+            return objc
+        except (OSError, AttributeError):
+            return None
+
+    @staticmethod
+    def _class_names(objc) -> List[str]:
+        import ctypes
+        if objc is None:
+            return []
+        count = objc.objc_getClassList(None, 0)
+        classes = (ctypes.c_void_p * count)()
+        count = objc.objc_getClassList(classes, count)
+        return [objc.class_getName(classes[i]).decode("utf-8", errors="replace") for i in range(count)]
+
+    @staticmethod
+    def _image_names() -> List[str]:
+        import ctypes
+        if sys.platform == "darwin":
+            libc = ctypes.CDLL(None)
+            libc._dyld_get_image_name.restype = ctypes.c_char_p
+            return [libc._dyld_get_image_name(i).decode("utf-8", errors="replace")
+                    for i in range(libc._dyld_image_count())]
+        images = []
+        try:
+            with open("/proc/self/maps") as maps:
+                for line in maps:
+                    parts = line.split(None, 5)
+                    if len(parts) == 6 and parts[5].startswith("/") and parts[5].strip() not in images:
+                        images.append(parts[5].strip())
+        except OSError:
+            pass
+        return images
+
+    @classmethod
+    def _load_in_child(cls, path: str, objc, classes_before: set, images_before: set) -> Dict[str, Any]:
+        import ctypes
+        try:
+            # RTLD_LAZY = 1
+            ctypes.CDLL(path, mode=1)
+        except OSError as e:
+            return {"status": "load_failed", "error": str(e)}
+        except Exception as e:
+            return {"status": "error", "error": str(e)}
+        return {
+            "status": "loaded",
+            "classes": sorted(set(cls._class_names(objc)) - classes_before),
+            "images": [i for i in cls._image_names() if i not in images_before],
+        }
+
+    @classmethod
+    def serve(cls):
+        """Helper main loop: fork a child per request and report how it ended"""
+        import signal
+        objc = cls._objc_runtime()
+        classes_before = set(cls._class_names(objc))
+        images_before = set(cls._image_names())
+        stdin, stdout = sys.stdin.buffer.fileno(), sys.stdout.buffer
+        children: Dict[int, Dict[str, Any]] = {}   # result pipe fd -> child state
+        buffered = b""
+
+        def send(reply: Dict[str, Any]):
+            stdout.write(json.dumps(reply).encode() + b"\n")
+            stdout.flush()
+
+        def finish(fd: int, reply: Dict[str, Any]):
+            child = children.pop(fd)
+            os.close(fd)
+            reply["id"] = child["id"]
+            send(reply)
+
+        while True:
+            now = time.monotonic()
+            for fd, child in list(children.items()):
+                if now >= child["deadline"]:
+                    os.kill(child["pid"], signal.SIGKILL)
+                    os.waitpid(child["pid"], 0)
+                    finish(fd, {"status": "timeout"})
+            wait = min((c["deadline"] for c in children.values()), default=now + 60) - now
+            readable = [stdin] if stdin is not None else []
+            if not readable and not children:
+                break
+            ready, _, _ = select.select(readable + list(children), [], [], max(0.0, wait))
+
+            for fd in ready:
+                if fd == stdin:
+                    chunk = os.read(stdin, 1 << 16)
+                    if not chunk:
+                        stdin = None
+                        continue
+                    buffered += chunk
+                    *lines, buffered = buffered.split(b"\n")
+                    for line in lines:
+                        if not line.strip():
+                            continue
+                        request = None
+                        try:
+                            request = json.loads(line)
+                            path, timeout = str(request["path"]), float(request.get("timeout", 5))
+                        except (ValueError, TypeError, KeyError) as e:
+                            request_id = request.get("id") if isinstance(request, dict) else None
+                            send({"id": request_id, "status": "error", "error": f"Malformed request: {e!r}"})
+                            continue
+                        read_fd, write_fd = os.pipe()
+                        try:
+                            pid = os.fork()
+                        except OSError as e:
+                            os.close(read_fd)
+                            os.close(write_fd)
+                            send({"id": request.get("id"), "status": "error", "error": f"fork failed: {e}"})
+                            continue
+                        if pid == 0:
+                            # Never return into the server loop from the child, whatever happens
+                            code = 1
+                            try:
+                                os.close(read_fd)
+                                report = json.dumps(cls._load_in_child(path, objc, classes_before,
+                                                                       images_before)).encode()
+                                while report:
+                                    report = report[os.write(write_fd, report):]
+                                code = 0
+                            finally:
+                                os._exit(code)
+                        os.close(write_fd)
+                        children[read_fd] = {"id": request.get("id"), "pid": pid, "output": b"",
+                                             "deadline": time.monotonic() + timeout}
+                    continue
+
+                child = children[fd]
+                chunk = os.read(fd, 1 << 16)
+                if chunk:
+                    child["output"] += chunk
+                    continue
+                _, status = os.waitpid(child["pid"], 0)
+                if os.WIFEXITED(status) and os.WEXITSTATUS(status) == 0 and child["output"]:
+                    finish(fd, json.loads(child["output"]))
+                else:
+                    signum = os.WTERMSIG(status) if os.WIFSIGNALED(status) else None
+                    finish(fd, {"status": "crashed", "signal": signum,
+                                "error": "Subprocess crashed (likely +load assertion)"})
+
+
+class RuntimeAnalyzer:
+    """Layer 3: Runtime Analysis"""
+
+    # class-dump gets killed if it produces no output for this long...
+    CLASS_DUMP_IDLE_TIMEOUT = 30
+    # ...or if the whole dump takes longer than this
+    CLASS_DUMP_TOTAL_TIMEOUT = 600
+
+    def __init__(self, scanner: Optional[FrameworkScanner] = None):
+        # Shares the run's binary discovery cache instead of searching again
+        self.scanner = scanner or FrameworkScanner()
+        # Fork server for ctypes loads, started on first use
+        self._loader: Optional[LoadServer] = None
+    
+    def analyze(self, framework_path: Path) -> Dict[str, Any]:
+        logger.info(f"  [Layer 3] Analyzing runtime for {framework_path.stem}...")
         
-        # Save Markdown file
-        # output_dir is 'data/', so parent is root. We want 'content/docs/'
-        md_file = self.output_dir.parent / "content" / "docs" / f"{framework_name}.md"
-        md_file.parent.mkdir(parents=True, exist_ok=True)
-        with open(md_file, "w") as f:
-            f.write(md_content)
+        # Try class-dump first (most robust for "runtime-like" headers)
+        if self._has_class_dump():
+            return self._analyze_with_class_dump(framework_path)
             
-    def _generate_simple_markdown(self, name: str, data: Dict[str, Any]) -> str:
-        md = []
-        md.append(f"---\ntitle: {name}\nweight: 1\n---\n")
-        
-        md.append("## Raw Data\n")
-        md.append(f"Full analysis data is available in [`data/{name}.json`](../../data/{name}.json).\n")
+        # Fallback to ctypes/objc runtime (experimental)
+        return self._analyze_with_ctypes(framework_path)
+
+    def _has_class_dump(self) -> bool:
+        try:
+            run_tool(["class-dump", "--version"], capture_output=True)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def _analyze_with_class_dump(self, framework_path: Path) -> Dict[str, Any]:
+        # Header records go to a spool as they are parsed, so neither the
+        # dump nor its records are ever held in memory
+        headers = RecordSpool()
+        data = {"method": "class-dump", "headers": headers}
+        parser = ClassDumpParser()
+        dump_size = 0
+
+        def decoded(proc: subprocess.Popen):
+            nonlocal dump_size
+            for line in iter_lines(proc, self.CLASS_DUMP_IDLE_TIMEOUT, self.CLASS_DUMP_TOTAL_TIMEOUT):
+                dump_size += len(line)
+                yield line.decode("utf-8", errors="replace")
+
+        try:
+            # class-dump <framework> gives a full dump; parse it as it streams
+            # instead of buffering the whole (huge) output
+            with profiler.span("class-dump", "subprocess", argv=framework_path.name) as span:
+                proc = subprocess.Popen(
+                    ["class-dump", str(framework_path)],
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.DEVNULL
+                )
+                try:
+                    for record in parser.parse(decoded(proc)):
+                        headers.append(record)
+                finally:
+                    if proc.poll() is None:
+                        proc.kill()
+                    proc.wait()
+                    proc.stdout.close()
+                    span.set(output_bytes=dump_size, returncode=proc.returncode)
+            data["dump_size"] = dump_size
+            if proc.returncode != 0:
+                data["error"] = f"class-dump exited with {proc.returncode}"
+        except subprocess.TimeoutExpired as e:
+            logger.warning(f"    class-dump stalled on {framework_path.name} ({e.timeout:g}s)")
+            record = parser.close()
+            if record is not None:
+                headers.append(record)
+            data["dump_size"] = dump_size
+            data["error"] = "timeout"
+        except Exception as e:
+            logger.warning(f"    class-dump failed: {e}")
+        headers.close()
+        return data
+
+    def _analyze_with_ctypes(self, framework_path: Path) -> Dict[str, Any]:
+        """Attempt to load framework and inspect via ObjC runtime (in a forked child)"""
         
-        md.append("## Summary\n")
-        md.append("```json")
-        # Create a summary dict to avoid dumping huge strings
-        summary = {
-            "binary_path": data.get("binary_path"),
-            "static": {
-                "classes_count": len(data.get("static", {}).get("classes", [])),
-                "swift_enabled": data.get("static", {}).get("swift_metadata", {}).get("is_swift", False),
-            },
-            "usage": {
-                "used_by_count": len(data.get("usage", {}).get("used_by", []))
-            },
-            "runtime": data.get("runtime")
+        # Only attempt this for System frameworks to avoid crashes
+        if not str(framework_path).startswith("/System/"):
+            return {"method": "ctypes", "status": "skipped_unsafe"}
+
+        # Get binary path
+        binary_path = self.scanner.get_binary_path(framework_path)
+        if not binary_path:
+            return {"method": "ctypes", "status": "skipped_no_binary"}
+
+        try:
+            if self._loader is None:
+                self._loader = LoadServer()
+            report = self._loader.load(binary_path, timeout=5)  # Short timeout for loading
+        except Exception as e:
+            logger.warning(f"    Runtime analysis failed: {e}")
+            return {"method": "ctypes", "status": "error", "error": str(e)}
+        return {"method": "ctypes", **report}
+
+    def close(self):
+        if self._loader is not None:
+            self._loader.close()
+            self._loader = None
+
+
+class IndexDatabase:
+    """Global SQLite index of classes, methods, symbols and linkage.
+
+    One database covers every analyzed framework so lookups such as "which
+    framework defines class X" or "who imports symbol Y" don't need to load
+    the per-framework JSON. Rows for a framework are replaced as a unit and
+    commits are batched across frameworks.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS frameworks (
+            id INTEGER PRIMARY KEY,
+            name TEXT UNIQUE NOT NULL,
+            binary_path TEXT,
+            is_swift INTEGER NOT NULL DEFAULT 0,
+            class_count INTEGER NOT NULL DEFAULT 0,
+            runtime_status TEXT,
+            updated REAL
+        );
+        CREATE TABLE IF NOT EXISTS classes (
+            id INTEGER PRIMARY KEY,
+            framework_id INTEGER NOT NULL REFERENCES frameworks(id),
+            name TEXT NOT NULL,
+            superclass TEXT
+        );
+        CREATE TABLE IF NOT EXISTS methods (
+            class_id INTEGER NOT NULL REFERENCES classes(id),
+            framework_id INTEGER NOT NULL REFERENCES frameworks(id),
+            name TEXT NOT NULL,
+            addr INTEGER
+        );
+        CREATE TABLE IF NOT EXISTS symbols (
+            framework_id INTEGER NOT NULL REFERENCES frameworks(id),
+            name TEXT NOT NULL,
+            demangled TEXT,
+            kind TEXT
+        );
+        CREATE TABLE IF NOT EXISTS libraries (
+            framework_id INTEGER NOT NULL REFERENCES frameworks(id),
+            path TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS usage (
+            framework_id INTEGER NOT NULL REFERENCES frameworks(id),
+            consumer TEXT NOT NULL,
+            binary TEXT NOT NULL,
+            class_name TEXT
+        );
+        CREATE TABLE IF NOT EXISTS calls (
+            framework_id INTEGER NOT NULL REFERENCES frameworks(id),
+            consumer TEXT NOT NULL,
+            binary TEXT NOT NULL,
+            class_name TEXT NOT NULL,
+            selector TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS names_meta (
+            id INTEGER PRIMARY KEY,
+            framework_id INTEGER NOT NULL REFERENCES frameworks(id),
+            name TEXT NOT NULL,
+            kind TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS classes_name ON classes(name);
+        CREATE INDEX IF NOT EXISTS classes_framework ON classes(framework_id);
+        CREATE INDEX IF NOT EXISTS methods_name ON methods(name);
+        CREATE INDEX IF NOT EXISTS methods_class ON methods(class_id);
+        CREATE INDEX IF NOT EXISTS methods_framework ON methods(framework_id);
+        CREATE INDEX IF NOT EXISTS symbols_name ON symbols(name);
+        CREATE INDEX IF NOT EXISTS symbols_demangled ON symbols(demangled);
+        CREATE INDEX IF NOT EXISTS symbols_framework ON symbols(framework_id);
+        CREATE INDEX IF NOT EXISTS libraries_path ON libraries(path);
+        CREATE INDEX IF NOT EXISTS libraries_framework ON libraries(framework_id);
+        CREATE INDEX IF NOT EXISTS usage_class ON usage(class_name);
+        CREATE INDEX IF NOT EXISTS usage_binary ON usage(binary);
+        CREATE INDEX IF NOT EXISTS usage_framework ON usage(framework_id);
+        CREATE INDEX IF NOT EXISTS calls_selector ON calls(selector);
+        CREATE INDEX IF NOT EXISTS calls_framework ON calls(framework_id);
+        CREATE INDEX IF NOT EXISTS names_meta_framework ON names_meta(framework_id);
+    """
+
+    def __init__(self, path: Path, batch_size: int = 16):
+        self.path = path
+        self.batch_size = batch_size
+        self._pending = 0
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(path))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(self.SCHEMA)
+        # Full-text index over names_meta, so a framework's names are found (and
+        # deleted) through the indexed framework_id instead of a scan of the index
+        try:
+            columns = [row[1] for row in self.conn.execute("PRAGMA table_info(names)")]
+            if "framework" in columns:
+                self.conn.execute("DROP TABLE names")
+            self.conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS names USING fts5(name, content='names_meta', content_rowid='id')"
+            )
+            self.has_fts = True
+            if "framework" in columns:
+                self._rebuild_names()
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5; `search` falls back to LIKE
+            self.has_fts = False
+        self.conn.commit()
+
+    def _rebuild_names(self):
+        """Fill names_meta and the full-text index from the other tables (databases from before names_meta)"""
+        self.conn.executescript("""
+            DELETE FROM names_meta;
+            INSERT INTO names_meta (framework_id, name, kind) SELECT framework_id, name, 'class' FROM classes;
+            INSERT INTO names_meta (framework_id, name, kind) SELECT framework_id, name, 'method' FROM methods;
+            INSERT INTO names_meta (framework_id, name, kind) SELECT framework_id, name, 'symbol' FROM symbols;
+            INSERT INTO names_meta (framework_id, name, kind)
+                SELECT framework_id, demangled, 'symbol' FROM symbols WHERE demangled IS NOT NULL;
+            INSERT INTO names (names) VALUES ('rebuild');
+        """)
+
+    def add_framework(self, name: str, data: Dict[str, Any]):
+        """Replace every row belonging to the framework with the rows from `data`"""
+        static = data.get("static") or {}
+        classes = static.get("classes") or []
+        swift = static.get("swift_metadata") or {}
+        libs = (static.get("binary_info") or {}).get("libraries") or {}
+        libs = libs.get("libs", []) if isinstance(libs, dict) else libs
+        cur = self.conn.cursor()
+
+        self._delete_framework(cur, name)
+        cur.execute(
+            "INSERT INTO frameworks (name, binary_path, is_swift, class_count, runtime_status, updated) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (name, data.get("binary_path"), int(bool(swift.get("is_swift"))), len(classes),
+             (data.get("runtime") or {}).get("status"), time.time())
+        )
+        fid = cur.lastrowid
+
+        names = []
+        for cls in classes:
+            cls_name = cls.get("classname") or cls.get("name")
+            if not cls_name:
+                continue
+            superclass = cls.get("super")
+            if isinstance(superclass, list):
+                superclass = superclass[0] if superclass else None
+            cur.execute("INSERT INTO classes (framework_id, name, superclass) VALUES (?, ?, ?)",
+                        (fid, cls_name, superclass))
+            cid = cur.lastrowid
+            methods = [(cid, fid, m.get("name"), m.get("addr")) for m in cls.get("methods") or [] if m.get("name")]
+            cur.executemany("INSERT INTO methods (class_id, framework_id, name, addr) VALUES (?, ?, ?, ?)", methods)
+            names.append((fid, cls_name, "class"))
+            names.extend((fid, m[2], "method") for m in methods)
+
+        records = [sym for sym in SwiftSymbolTable.iter_records(swift) if sym["name"]]
+        readable = SwiftSymbolTable.demangle([sym["name"] for sym in records if not sym.get("demangled")])
+        symbols = []
+        for sym in records:
+            demangled = sym.get("demangled") or readable.get(sym["name"])
+            symbols.append((fid, sym["name"], demangled if demangled != sym["name"] else None,
+                            sym["kind"] or sym["type"]))
+        cur.executemany("INSERT INTO symbols (framework_id, name, demangled, kind) VALUES (?, ?, ?, ?)", symbols)
+        names.extend((fid, sym[1], "symbol") for sym in symbols)
+        names.extend((fid, sym[2], "symbol") for sym in symbols if sym[2])
+
+        cur.executemany("INSERT INTO libraries (framework_id, path) VALUES (?, ?)", [(fid, lib) for lib in libs])
+
+        edges, calls = [], []
+        for consumer in (data.get("usage") or {}).get("used_by") or []:
+            used = consumer.get("used_classes") or [None]
+            edges.extend((fid, consumer.get("path"), consumer.get("binary"), cls) for cls in used)
+            for cls, selectors in (consumer.get("calls") or {}).items():
+                calls.extend((fid, consumer.get("path"), consumer.get("binary"), cls, sel) for sel in selectors)
+        cur.executemany("INSERT INTO usage (framework_id, consumer, binary, class_name) VALUES (?, ?, ?, ?)", edges)
+        cur.executemany("INSERT INTO calls (framework_id, consumer, binary, class_name, selector) "
+                        "VALUES (?, ?, ?, ?, ?)", calls)
+
+        if self.has_fts:
+            cur.executemany("INSERT INTO names_meta (framework_id, name, kind) VALUES (?, ?, ?)", names)
+            cur.execute("INSERT INTO names (rowid, name) SELECT id, name FROM names_meta WHERE framework_id = ?",
+                        (fid,))
+
+        self._pending += 1
+        if self._pending >= self.batch_size:
+            self.commit()
+
+    def _delete_framework(self, cur: sqlite3.Cursor, name: str):
+        row = cur.execute("SELECT id FROM frameworks WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            return
+        for table in ("methods", "classes", "symbols", "libraries", "usage", "calls"):
+            cur.execute(f"DELETE FROM {table} WHERE framework_id = ?", (row[0],))
+        if self.has_fts:
+            # External content: the index is told which rowids and values to drop
+            cur.execute("INSERT INTO names (names, rowid, name) "
+                        "SELECT 'delete', id, name FROM names_meta WHERE framework_id = ?", (row[0],))
+            cur.execute("DELETE FROM names_meta WHERE framework_id = ?", (row[0],))
+        cur.execute("DELETE FROM frameworks WHERE id = ?", (row[0],))
+
+    def commit(self):
+        self.conn.commit()
+        self._pending = 0
+
+    def close(self):
+        self.commit()
+        self.conn.close()
+
+    # -- lookups -----------------------------------------------------------
+
+    def query(self, kind: str, term: str, limit: int = 100) -> List[Dict[str, Any]]:
+        queries = {
+            "class": "SELECT f.name AS framework, c.name AS class, c.superclass FROM classes c "
+                     "JOIN frameworks f ON f.id = c.framework_id WHERE c.name = ?",
+            "method": "SELECT f.name AS framework, c.name AS class, m.name AS method FROM methods m "
+                      "JOIN classes c ON c.id = m.class_id JOIN frameworks f ON f.id = m.framework_id "
+                      "WHERE m.name = ?",
+            "symbol": "SELECT f.name AS framework, s.name AS symbol, s.demangled, s.kind FROM symbols s "
+                      "JOIN frameworks f ON f.id = s.framework_id WHERE s.name = ?1 OR s.demangled = ?1",
+            "imports": "SELECT f.name AS framework, u.class_name AS class, u.consumer, u.binary FROM usage u "
+                       "JOIN frameworks f ON f.id = u.framework_id WHERE u.class_name = ?",
+            "links": "SELECT f.name AS framework, l.path AS library FROM libraries l "
+                     "JOIN frameworks f ON f.id = l.framework_id WHERE l.path LIKE ?",
+            "framework": "SELECT name AS framework, binary_path, is_swift, class_count, runtime_status "
+                         "FROM frameworks WHERE name = ?",
+            "callers": "SELECT f.name AS framework, c.class_name AS class, c.selector, c.consumer, c.binary "
+                       "FROM calls c JOIN frameworks f ON f.id = c.framework_id WHERE c.selector = ?",
+            # Most-called private APIs; the term is a framework name pattern ('%' for all)
+            "top": "SELECT f.name AS framework, c.class_name AS class, c.selector, "
+                   "COUNT(DISTINCT c.binary) AS callers FROM calls c JOIN frameworks f ON f.id = c.framework_id "
+                   "WHERE f.name LIKE ? GROUP BY c.framework_id, c.class_name, c.selector "
+                   "ORDER BY callers DESC, f.name, c.class_name, c.selector",
         }
-        md.append(json.dumps(summary, indent=2))
-        md.append("```\n")
-        
+        if kind == "imports" and term.startswith(UsageIndex.CLASS_PREFIX):
+            term = term[len(UsageIndex.CLASS_PREFIX):]
+        if kind == "links":
+            term = f"%{term}%"
+        if kind == "search":
+            if self.has_fts:
+                sql = ("SELECT f.name AS framework, m.kind, m.name FROM names "
+                       "JOIN names_meta m ON m.id = names.rowid JOIN frameworks f ON f.id = m.framework_id "
+                       "WHERE names MATCH ? ORDER BY names.rank")
+                term = " ".join(f'"{t}"*' for t in term.replace('"', "").split())
+            else:
+                sql = ("SELECT f.name AS framework, 'class' AS kind, c.name AS name FROM classes c "
+                       "JOIN frameworks f ON f.id = c.framework_id WHERE c.name LIKE ?")
+                term = f"%{term}%"
+        elif kind in queries:
+            sql = queries[kind]
+        else:
+            raise ValueError(f"unknown query kind: {kind}")
+
+        cur = self.conn.execute(f"{sql} LIMIT {int(limit)}", (term,))
+        columns = [c[0] for c in cur.description]
+        return [dict(zip(columns, row)) for row in cur.fetchall()]
+
+
+class FrameworkOutput:
+    """One framework's result file while it is being written.
+
+    Top-level values (`framework`, `binary_path`, then one per layer) are
+    encoded as they arrive and go to a temp file through a buffer capped at
+    `max_buffer` bytes; `commit()` atomically moves the file into place.
+    RecordSpool values are copied record by record rather than loaded. The
+    buffer only bounds encoded output waiting to be written: the layer
+    results are handed over as they were produced: lists past the
+    analyzers' SpoolBudget ceiling arrive as spools, the rest in memory.
+    Records and bytes written are counted for profiling, and the counts in
+    the framework's Markdown summary are kept up to date as values go by.
+    """
+
+    def __init__(self, path: Path, fmt: str, max_buffer: int):
+        self.path = path
+        self.fmt = fmt
+        self.max_buffer = max_buffer
+        self.counters: Dict[str, Any] = {"records": 0, "bytes": 0, "summary": self.empty_summary()}
+        self._tmp = path.with_name(path.name + ".tmp")
+        self._raw = open(self._tmp, "wb")
+        self._file = gzip.GzipFile(fileobj=self._raw, mode="wb") if fmt == "jsonl.gz" else self._raw
+        self._buffer: List[str] = []
+        self._buffered = 0
+        self._keys = 0
+        self._encoder = json.JSONEncoder(indent=2, default=str)
+        if fmt == "json":
+            self._emit("{")
+
+    @staticmethod
+    def empty_summary() -> Dict[str, Any]:
+        return {
+            "binary_path": None,
+            "static": {"classes_count": 0, "swift_enabled": False},
+            "usage": {"used_by_count": 0},
+            "runtime": {},
+        }
+
+    @staticmethod
+    def count(summary: Dict[str, Any], key: str, value: Any):
+        """Update the summary counters with one top-level value"""
+        if key == "binary_path":
+            summary["binary_path"] = value
+        elif key == "static" and isinstance(value, dict):
+            summary["static"] = {
+                "classes_count": len(value.get("classes") or []),
+                "swift_enabled": bool((value.get("swift_metadata") or {}).get("is_swift", False)),
+            }
+        elif key == "usage" and isinstance(value, dict):
+            summary["usage"] = {"used_by_count": len(value.get("used_by") or [])}
+        elif key == "runtime" and isinstance(value, dict):
+            summary["runtime"] = {k: (len(v) if isinstance(v, (list, RecordSpool)) else v) for k, v in value.items()}
+
+    @classmethod
+    def summarize(cls, data: Dict[str, Any]) -> Dict[str, Any]:
+        """The summary counters for a result that was read back rather than written"""
+        summary = cls.empty_summary()
+        for key, value in data.items():
+            cls.count(summary, key, value)
+        return summary
+
+    def _emit(self, text: str):
+        self._buffer.append(text)
+        self._buffered += len(text)
+        if self._buffered >= self.max_buffer:
+            self._flush()
+
+    def _flush(self):
+        if self._buffer:
+            data = "".join(self._buffer).encode()
+            self._file.write(data)
+            self.counters["bytes"] += len(data)
+            self._buffer, self._buffered = [], 0
+
+    def _iterencode(self, value: Any, indent: str):
+        """Pretty JSON chunks for a value nested at `indent`, reading spools one record at a time"""
+        if isinstance(value, RecordSpool) and value:
+            yield "{" if value.mapping else "["
+            for i, item in enumerate(value):
+                if value.mapping:
+                    yield ("\n" if not i else ",\n") + f"{indent}  {json.dumps(str(item[0]))}: "
+                    item = item[1]
+                else:
+                    yield ("\n" if not i else ",\n") + indent + "  "
+                yield from self._iterencode(item, indent + "  ")
+            yield "\n" + indent + ("}" if value.mapping else "]")
+        elif isinstance(value, RecordSpool):
+            yield "{}" if value.mapping else "[]"
+        elif isinstance(value, dict) and next(RecordSpool.nested(value), None) is not None:
+            yield "{"
+            for i, (k, v) in enumerate(value.items()):
+                yield ("\n" if not i else ",\n") + f"{indent}  {json.dumps(str(k))}: "
+                yield from self._iterencode(v, indent + "  ")
+            yield "\n" + indent + "}"
+        else:
+            for chunk in self._encoder.iterencode(value):
+                yield chunk.replace("\n", "\n" + indent)
+
+    @staticmethod
+    def _plain(value: Any) -> Any:
+        """What an empty spool stands in for"""
+        if isinstance(value, RecordSpool):
+            return {} if value.mapping else []
+        return value
+
+    def _emit_lines(self, path: List[str], value: Any):
+        """JSON Lines: one line per dict's scalar fields and one per list item"""
+        if isinstance(value, dict) or (isinstance(value, RecordSpool) and value.mapping and value):
+            # A mapping spool is read twice (scalar fields, then nested values) instead of loaded
+            items = value.items if isinstance(value, dict) else value.__iter__
+            nested = lambda v: isinstance(v, (dict, list, RecordSpool)) and v
+            fields = {k: self._plain(v) for k, v in items() if not nested(v)}
+            self._emit(json.dumps({"path": path, "fields": fields}, separators=(",", ":"), default=str) + "\n")
+            self.counters["records"] += 1
+            for k, v in items():
+                if nested(v):
+                    self._emit_lines(path + [k], v)
+        elif isinstance(value, (list, RecordSpool)) and value:
+            for item in value:
+                self._emit(json.dumps({"path": path, "item": item}, separators=(",", ":"), default=str) + "\n")
+                self.counters["records"] += 1
+        else:
+            # Scalars, and empty lists so the key survives a round trip
+            self._emit(json.dumps({"path": path[:-1], "fields": {path[-1]: self._plain(value)}},
+                                  separators=(",", ":"), default=str) + "\n")
+            self.counters["records"] += 1
+
+    def write(self, key: str, value: Any):
+        """Append one top-level value (usually a whole layer)"""
+        self.count(self.counters["summary"], key, value)
+        if self.fmt == "json":
+            # Same layout as json.dump(indent=2), produced chunk by chunk
+            self._emit(("\n" if not self._keys else ",\n") + f"  {json.dumps(key)}: ")
+            for chunk in self._iterencode(value, "  "):
+                self._emit(chunk)
+            self.counters["records"] += 1
+        else:
+            self._emit_lines([key], value)
+        self._keys += 1
+
+    def commit(self):
+        if self.fmt == "json":
+            self._emit("\n}" if self._keys else "}")
+        self._flush()
+        self._file.close()
+        if self._file is not self._raw:
+            self._raw.close()
+        os.replace(self._tmp, self.path)
+
+    def abort(self):
+        try:
+            self._file.close()
+            self._raw.close()
+        finally:
+            try:
+                self._tmp.unlink()
+            except OSError:
+                pass
+
+
+class ResultWriter:
+    """Writes per-framework results as pretty JSON, compact JSON Lines or gzip'd JSON Lines"""
+
+    FORMATS = {"json": ".json", "jsonl": ".jsonl", "jsonl.gz": ".jsonl.gz"}
+    # Bookkeeping files that live next to the results
+    RESERVED = ("manifest.json", "shard.json")
+
+    def __init__(self, output_dir: Path, fmt: str = "json", max_buffer: int = 8 << 20):
+        if fmt not in self.FORMATS:
+            raise ValueError(f"Unknown output format: {fmt}")
+        self.output_dir = output_dir
+        self.fmt = fmt
+        self.max_buffer = max_buffer
+
+    def path(self, framework_name: str) -> Path:
+        return self.output_dir / f"{framework_name}{self.FORMATS[self.fmt]}"
+
+    def open(self, framework_name: str) -> FrameworkOutput:
+        return FrameworkOutput(self.path(framework_name), self.fmt, self.max_buffer)
+
+    def remove_other_formats(self, framework_name: str):
+        """Drop results left in another format, so a snapshot has one file per framework"""
+        for fmt, suffix in self.FORMATS.items():
+            if fmt != self.fmt:
+                try:
+                    (self.output_dir / f"{framework_name}{suffix}").unlink()
+                except OSError:
+                    pass
+
+    @classmethod
+    def find(cls, directory: Path, exclude: Tuple[str, ...] = ()) -> Dict[str, Path]:
+        """Framework name -> result file for every result in `directory`"""
+        found = {}
+        for suffix in cls.FORMATS.values():
+            for path in directory.glob(f"*{suffix}"):
+                if path.name not in cls.RESERVED + exclude and path.name.endswith(suffix):
+                    found.setdefault(path.name[:-len(suffix)], path)
+        return found
+
+    @staticmethod
+    def read(path: Path) -> Any:
+        """Load a result file in any of the formats back into a dict"""
+        if path.name.endswith(".json"):
+            with open(path) as f:
+                return json.load(f)
+        opener = gzip.open if path.name.endswith(".gz") else open
+        data: Dict[str, Any] = {}
+        with opener(path, "rt") as f:
+            for line in f:
+                record = json.loads(line)
+                node = data
+                keys = record["path"]
+                if "item" in record:
+                    for key in keys[:-1]:
+                        node = node.setdefault(key, {})
+                    node.setdefault(keys[-1], []).append(record["item"])
+                else:
+                    for key in keys:
+                        node = node.setdefault(key, {})
+                    node.update(record["fields"])
+        return data
+
+
+class StringPack:
+    """Compact container for a whole data/ snapshot with a global string table.
+
+    Every string (dict keys and string values, across all frameworks) is
+    stored once; each framework's result is a compact tagged binary encoding
+    that refers to strings by id, compressed on its own with a dictionary
+    shared by all frameworks (zstd when `zstandard` is installed, zlib with a
+    preset dictionary otherwise). Layout, little endian:
+
+        header   MAGIC, version u16, codec u16, frameworks u32,
+                 strings offset/count, index offset/length, dict offset/length (u64 each)
+        blobs    one compressed record per framework
+        dict     shared compression dictionary
+        strings  (count + 1) u64 end offsets into the UTF-8 blob that follows
+        index    varints per framework: name id, blob offset, blob length, raw length
+    """
+
+    MAGIC = b"DPAK"
+    VERSION = 1
+    HEADER = struct.Struct("<4sHHI6Q")
+    CODECS = {"none": 0, "zlib": 1, "zstd": 2}
+    DICT_SIZE = 32 << 10
+
+    # value tags
+    NULL, FALSE, TRUE, INT, FLOAT, STR, LIST, DICT = range(8)
+
+    @staticmethod
+    def _varint(out: bytearray, value: int):
+        while True:
+            byte = value & 0x7f
+            value >>= 7
+            if value:
+                out.append(byte | 0x80)
+            else:
+                out.append(byte)
+                return
+
+    @staticmethod
+    def _read_varint(buf, pos: int) -> Tuple[int, int]:
+        value = shift = 0
+        while True:
+            if pos >= len(buf):
+                raise ValueError(f"Truncated varint at offset {pos}")
+            byte = buf[pos]
+            pos += 1
+            value |= (byte & 0x7f) << shift
+            if not byte & 0x80:
+                return value, pos
+            shift += 7
+
+
+class StringPackWriter(StringPack):
+    """Builds a StringPack; records are spooled to a temp file until `close()`"""
+
+    def __init__(self, path: Path, codec: str = "auto"):
+        if codec == "auto":
+            codec = "zstd" if zstandard is not None else "zlib"
+        if codec == "zstd" and zstandard is None:
+            raise ValueError("zstd codec needs the 'zstandard' package")
+        if codec not in self.CODECS:
+            raise ValueError(f"Unknown codec: {codec}")
+        self.path = path
+        self.codec = codec
+        self.strings: Dict[str, int] = {}
+        self._entries: List[Tuple[int, int, int]] = []   # name id, spool offset, raw length
+        self._spool = tempfile.TemporaryFile()
+        self._samples: List[bytes] = []
+
+    def intern(self, value: str) -> int:
+        sid = self.strings.get(value)
+        if sid is None:
+            sid = self.strings[value] = len(self.strings)
+        return sid
+
+    def _encode(self, value: Any, out: bytearray):
+        if value is None:
+            out.append(self.NULL)
+        elif value is True:
+            out.append(self.TRUE)
+        elif value is False:
+            out.append(self.FALSE)
+        elif isinstance(value, int):
+            out.append(self.INT)
+            self._varint(out, (value << 1) if value >= 0 else ((-value << 1) - 1))
+        elif isinstance(value, float):
+            out.append(self.FLOAT)
+            out += struct.pack("<d", value)
+        elif isinstance(value, str):
+            out.append(self.STR)
+            self._varint(out, self.intern(value))
+        elif isinstance(value, (list, tuple)):
+            out.append(self.LIST)
+            self._varint(out, len(value))
+            for item in value:
+                self._encode(item, out)
+        elif isinstance(value, dict):
+            out.append(self.DICT)
+            self._varint(out, len(value))
+            for key, item in value.items():
+                self._varint(out, self.intern(str(key)))
+                self._encode(item, out)
+        else:
+            # Same fallback as the JSON writer (default=str)
+            out.append(self.STR)
+            self._varint(out, self.intern(str(value)))
+
+    def add(self, name: str, data: Any):
+        raw = bytearray()
+        self._encode(data, raw)
+        offset = self._spool.seek(0, os.SEEK_END)
+        self._spool.write(raw)
+        self._entries.append((self.intern(name), offset, len(raw)))
+        if len(self._samples) < 256:
+            self._samples.append(bytes(raw[:4096]))
+
+    def _dictionary(self) -> bytes:
+        if self.codec == "zstd":
+            try:
+                return zstandard.train_dictionary(self.DICT_SIZE, self._samples).as_bytes()
+            except Exception:
+                pass  # too few samples to train; fall back to raw content
+        # Record prefixes hold the recurring structure (key ids, tags)
+        return b"".join(self._samples)[-self.DICT_SIZE:]
+
+    def close(self):
+        dictionary = self._dictionary() if self.codec != "none" else b""
+        if self.codec == "zstd":
+            zdict = zstandard.ZstdCompressionDict(dictionary)
+            compressor = zstandard.ZstdCompressor(level=19, dict_data=zdict)
+            compress = compressor.compress
+        elif self.codec == "zlib":
+            def compress(raw: bytes) -> bytes:
+                c = zlib.compressobj(9, zdict=dictionary) if dictionary else zlib.compressobj(9)
+                return c.compress(raw) + c.flush()
+        else:
+            compress = bytes
+
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            f.write(b"\0" * self.HEADER.size)
+            index = bytearray()
+            for name_id, offset, length in self._entries:
+                self._spool.seek(offset)
+                blob = compress(self._spool.read(length))
+                for value in (name_id, f.tell(), len(blob), length):
+                    self._varint(index, value)
+                f.write(blob)
+            dict_offset = f.tell()
+            f.write(dictionary)
+
+            strings_offset = f.tell()
+            encoded = [s.encode("utf-8", errors="surrogatepass") for s in self.strings]
+            ends, total = array("Q", [0]), 0
+            for s in encoded:
+                total += len(s)
+                ends.append(total)
+            f.write(ends.tobytes())
+            for s in encoded:
+                f.write(s)
+            index_offset = f.tell()
+            f.write(index)
+            f.seek(0)
+            f.write(self.HEADER.pack(self.MAGIC, self.VERSION, self.CODECS[self.codec], len(self._entries),
+                                     strings_offset, len(encoded), index_offset, len(index),
+                                     dict_offset, len(dictionary)))
+        os.replace(tmp, self.path)
+        self._spool.close()
+
+
+class StringPackReader(StringPack):
+    """mmap-backed reader: only the index is parsed up front; strings and
+    framework records are decoded on demand"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mm = None
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._open()
+        except BaseException:
+            self.close()
+            raise
+
+    def _check_range(self, what: str, offset: int, length: int):
+        if offset < 0 or length < 0 or offset + length > len(self._mm):
+            raise ValueError(f"{self.path}: {what} at offset {offset} (+{length}) is past the end of the file "
+                             f"({len(self._mm)} bytes)")
+
+    def _open(self):
+        path = self.path
+        if len(self._mm) < self.HEADER.size:
+            raise ValueError(f"{path} is not a deapplefy string pack")
+        (magic, version, codec, count, self._strings_offset, self._string_count, index_offset, index_length,
+         dict_offset, dict_length) = self.HEADER.unpack_from(self._mm, 0)
+        if magic != self.MAGIC or version != self.VERSION:
+            raise ValueError(f"{path} is not a deapplefy string pack")
+        codecs = {v: k for k, v in self.CODECS.items()}
+        if codec not in codecs:
+            raise ValueError(f"{path}: unknown codec {codec} in the header at offset 6")
+        self.codec = codecs[codec]
+        self._check_range("dictionary", dict_offset, dict_length)
+        self._check_range("string table", self._strings_offset, 8 * (self._string_count + 1))
+        self._check_range("index", index_offset, index_length)
+        self._dictionary = bytes(self._mm[dict_offset:dict_offset + dict_length])
+        self._blob_base = self._strings_offset + 8 * (self._string_count + 1)
+        self._strings: Dict[int, str] = {}
+        self._decompressor = None
+        if self.codec == "zstd":
+            if zstandard is None:
+                raise ValueError("reading a zstd pack needs the 'zstandard' package")
+            zdict = zstandard.ZstdCompressionDict(self._dictionary)
+            self._decompressor = zstandard.ZstdDecompressor(dict_data=zdict)
+
+        self.index: Dict[str, Tuple[int, int, int]] = {}
+        pos, end = index_offset, index_offset + index_length
+        index = self._mm[index_offset:end]
+        for _ in range(count):
+            fields = []
+            for _field in range(4):
+                try:
+                    value, rel = self._read_varint(index, pos - index_offset)
+                except ValueError:
+                    raise ValueError(f"{path}: index entry at offset {pos} runs past the index end ({end})")
+                pos = index_offset + rel
+                fields.append(value)
+            self._check_range(f"record {fields[0]}", fields[1], fields[2])
+            self.index[self.string(fields[0])] = tuple(fields[1:])
+        if pos != end:
+            raise ValueError(f"{path}: index ends at offset {pos}, expected {end}")
+
+    def string(self, sid: int) -> str:
+        value = self._strings.get(sid)
+        if value is None:
+            if not 0 <= sid < self._string_count:
+                raise ValueError(f"{self.path}: string id {sid} is out of range ({self._string_count} strings)")
+            start, stop = struct.unpack_from("<2Q", self._mm, self._strings_offset + 8 * sid)
+            if not start <= stop or self._blob_base + stop > len(self._mm):
+                raise ValueError(f"{self.path}: string {sid} at offset {self._blob_base + start} "
+                                 f"(+{stop - start}) is out of bounds")
+            value = self._strings[sid] = self._mm[self._blob_base + start:self._blob_base + stop].decode(
+                "utf-8", errors="surrogatepass")
+        return value
+
+    def frameworks(self) -> List[str]:
+        return list(self.index)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.index
+
+    def _raw(self, name: str) -> bytes:
+        offset, length, raw_length = self.index[name]
+        blob = self._mm[offset:offset + length]
+        try:
+            if self.codec == "zstd":
+                raw = self._decompressor.decompress(blob, max_output_size=raw_length)
+            elif self.codec == "zlib":
+                d = zlib.decompressobj(zdict=self._dictionary) if self._dictionary else zlib.decompressobj()
+                raw = d.decompress(blob) + d.flush()
+            else:
+                raw = blob
+        except Exception as e:
+            raise ValueError(f"{self.path}: record for {name} at offset {offset} does not decompress: {e}")
+        if len(raw) != raw_length:
+            raise ValueError(f"{self.path}: record for {name} at offset {offset} is {len(raw)} bytes, "
+                             f"expected {raw_length}")
+        return raw
+
+    def _decode(self, buf: bytes, pos: int) -> Tuple[Any, int]:
+        """Decode the value at `pos`; offsets in errors are within the decompressed record"""
+        if pos >= len(buf):
+            raise ValueError(f"Truncated record: value expected at offset {pos}")
+        tag = buf[pos]
+        pos += 1
+        if tag == self.STR:
+            sid, pos = self._read_varint(buf, pos)
+            return self.string(sid), pos
+        if tag == self.DICT:
+            count, pos = self._read_varint(buf, pos)
+            value = {}
+            for _ in range(count):
+                sid, pos = self._read_varint(buf, pos)
+                value[self.string(sid)], pos = self._decode(buf, pos)
+            return value, pos
+        if tag == self.LIST:
+            count, pos = self._read_varint(buf, pos)
+            items = []
+            for _ in range(count):
+                item, pos = self._decode(buf, pos)
+                items.append(item)
+            return items, pos
+        if tag == self.INT:
+            raw, pos = self._read_varint(buf, pos)
+            return (raw >> 1) if not raw & 1 else -((raw + 1) >> 1), pos
+        if tag == self.FLOAT:
+            if pos + 8 > len(buf):
+                raise ValueError(f"Truncated record: float at offset {pos}")
+            return struct.unpack_from("<d", buf, pos)[0], pos + 8
+        if tag not in (self.NULL, self.FALSE, self.TRUE):
+            raise ValueError(f"Unknown value tag {tag} at offset {pos - 1}")
+        return {self.NULL: None, self.FALSE: False, self.TRUE: True}[tag], pos
+
+    def get(self, name: str) -> Any:
+        """Decode one framework's result"""
+        raw = self._raw(name)
+        try:
+            value, end = self._decode(raw, 0)
+        except ValueError as e:
+            raise ValueError(f"{self.path}: record for {name}: {e}")
+        if end != len(raw):
+            raise ValueError(f"{self.path}: record for {name} has {len(raw) - end} trailing bytes at offset {end}")
+        return value
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+        self._file.close()
+
+
+class SnapshotManifest:
+    """Content hashes of one data/ snapshot, kept next to the JSON files.
+
+    For every framework it records a hash of its API surface (classes with
+    their methods/ivars/properties/protocols, symbols, linked libraries) and
+    one hash per class, so `deapplefy diff` can skip unchanged frameworks and
+    classes without parsing their JSON.
+    """
+
+    FILENAME = "manifest.json"
+    VERSION = 1
+
+    def __init__(self, frameworks: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.frameworks: Dict[str, Dict[str, Any]] = frameworks or {}
+        # Set by load() when it had to repair the manifest on disk
+        self.updated = False
+
+    @staticmethod
+    def _hash(value: Any) -> str:
+        blob = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(blob.encode()).hexdigest()[:32]
+
+    @staticmethod
+    def api_surface(data: Dict[str, Any]) -> Dict[str, Any]:
+        """The comparable parts of a framework's analysis result, in canonical form"""
+        static = data.get("static") or {}
+        libs = (static.get("binary_info") or {}).get("libraries") or {}
+        libs = libs.get("libs", []) if isinstance(libs, dict) else libs
+
+        classes = {}
+        for cls in static.get("classes") or []:
+            name = cls.get("classname") or cls.get("name")
+            if not name:
+                continue
+            superclass = cls.get("super")
+            if isinstance(superclass, list):
+                superclass = superclass[0] if superclass else None
+            classes[name] = {
+                "super": superclass,
+                "methods": {("+" if m.get("class_method") else "-") + m["name"]: m.get("types")
+                            for m in cls.get("methods") or [] if m.get("name")},
+                "ivars": {f.get("name"): f.get("type") for f in cls.get("fields") or [] if isinstance(f, dict)},
+                "properties": {p.get("name"): p.get("attributes") for p in cls.get("properties") or []
+                               if isinstance(p, dict)},
+                "protocols": sorted(p if isinstance(p, str) else str(p.get("name")) for p in cls.get("protocols") or []),
+            }
+        symbols = sorted({sym["name"] for sym in SwiftSymbolTable.iter_records(static.get("swift_metadata") or {})
+                          if sym["name"]})
+        return {"classes": classes, "symbols": symbols, "libraries": sorted(set(libs))}
+
+    def add(self, name: str, data: Dict[str, Any], file: Optional[str] = None, inputs: Optional[str] = None):
+        surface = self.api_surface(data)
+        entry = {
+            "file": file or f"{name}.json",
+            "classes": {cls: self._hash(body) for cls, body in surface["classes"].items()},
+            "symbols": self._hash(surface["symbols"]),
+            "libraries": self._hash(surface["libraries"]),
+        }
+        entry["hash"] = self._hash([entry["classes"], entry["symbols"], entry["libraries"]])
+        if inputs:
+            # framework_inputs() of the run that wrote the file; lets the next run skip it
+            entry["inputs"] = inputs
+        self.frameworks[name] = entry
+
+    def save(self, directory: Path):
+        path = directory / self.FILENAME
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump({"version": self.VERSION, "frameworks": self.frameworks}, f, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, directory: Path, complete: bool = True) -> "SnapshotManifest":
+        """Read a snapshot's manifest.
+
+        With `complete`, JSON files the manifest doesn't cover (e.g. written
+        before manifests existed) are hashed and added, and entries whose file
+        is gone are dropped; only those files are parsed.
+        """
+        manifest = cls()
+        try:
+            with open(directory / cls.FILENAME) as f:
+                raw = json.load(f)
+            if raw.get("version") == cls.VERSION:
+                manifest.frameworks = raw.get("frameworks") or {}
+        except (OSError, ValueError):
+            pass
+        if not complete:
+            return manifest
+
+        present = ResultWriter.find(directory)
+        stale = [k for k, v in manifest.frameworks.items() if k not in present or present[k].name != v["file"]]
+        for name in stale:
+            del manifest.frameworks[name]
+        missing = sorted(name for name in present if name not in manifest.frameworks)
+        manifest.updated = bool(stale or missing)
+        if missing:
+            logger.info(f"Hashing {len(missing)} frameworks missing from the manifest in {directory}")
+        for name in missing:
+            try:
+                data = ResultWriter.read(present[name])
+            except (OSError, ValueError, KeyError, EOFError) as e:
+                logger.warning(f"    Skipping {present[name].name}: {e}")
+                continue
+            if isinstance(data, dict) and "static" in data:
+                manifest.add(name, data, present[name].name)
+        return manifest
+
+
+def _set_diff(old, new) -> Dict[str, List[str]]:
+    old, new = set(old), set(new)
+    return {"added": sorted(new - old), "removed": sorted(old - new)}
+
+
+def _mapping_diff(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    diff = _set_diff(old, new)
+    diff["changed"] = {k: [old[k], new[k]] for k in sorted(old.keys() & new.keys()) if old[k] != new[k]}
+    return diff
+
+
+def diff_snapshots(old_dir: Path, new_dir: Path, save_manifests: bool = False) -> Dict[str, Any]:
+    """Compare two data/ snapshots; only frameworks whose hashes differ are loaded.
+
+    The snapshots are only read; with `save_manifests` manifests that had to
+    be repaired are written back so the next diff against them stays cheap.
+    """
+    old, new = SnapshotManifest.load(old_dir), SnapshotManifest.load(new_dir)
+    for manifest, directory in ((old, old_dir), (new, new_dir)):
+        if save_manifests and manifest.updated:
+            try:
+                manifest.save(directory)
+            except OSError as e:
+                logger.debug(f"Cannot update manifest in {directory}: {e}")
+    frameworks = _set_diff(old.frameworks, new.frameworks)
+    changed = {}
+    counts = {"classes_added": 0, "classes_removed": 0, "classes_changed": 0, "methods_added": 0,
+              "methods_removed": 0, "symbols_added": 0, "symbols_removed": 0}
+
+    for name in sorted(old.frameworks.keys() & new.frameworks.keys()):
+        before, after = old.frameworks[name], new.frameworks[name]
+        if before["hash"] == after["hash"]:
+            continue
+        try:
+            old_surface = SnapshotManifest.api_surface(ResultWriter.read(old_dir / before["file"]))
+            new_surface = SnapshotManifest.api_surface(ResultWriter.read(new_dir / after["file"]))
+        except (OSError, ValueError, KeyError, EOFError) as e:
+            logger.warning(f"Cannot diff {name}: {e}")
+            continue
+
+        entry: Dict[str, Any] = {"classes": _set_diff(before["classes"], after["classes"])}
+        entry["classes"]["changed"] = {}
+        for cls in sorted(before["classes"].keys() & after["classes"].keys()):
+            if before["classes"][cls] == after["classes"][cls]:
+                continue
+            a, b = old_surface["classes"].get(cls, {}), new_surface["classes"].get(cls, {})
+            class_diff = {}
+            if a.get("super") != b.get("super"):
+                class_diff["super"] = [a.get("super"), b.get("super")]
+            for key in ("methods", "ivars", "properties"):
+                part = _mapping_diff(a.get(key) or {}, b.get(key) or {})
+                if any(part.values()):
+                    class_diff[key] = part
+            protocols = _set_diff(a.get("protocols") or [], b.get("protocols") or [])
+            if any(protocols.values()):
+                class_diff["protocols"] = protocols
+            entry["classes"]["changed"][cls] = class_diff
+            counts["methods_added"] += len(class_diff.get("methods", {}).get("added", []))
+            counts["methods_removed"] += len(class_diff.get("methods", {}).get("removed", []))
+        if before["symbols"] != after["symbols"]:
+            entry["symbols"] = _set_diff(old_surface["symbols"], new_surface["symbols"])
+            readable = SwiftSymbolTable.demangle(entry["symbols"]["added"] + entry["symbols"]["removed"])
+            entry["symbols"]["demangled"] = {k: v for k, v in readable.items() if k != v}
+            counts["symbols_added"] += len(entry["symbols"]["added"])
+            counts["symbols_removed"] += len(entry["symbols"]["removed"])
+        if before["libraries"] != after["libraries"]:
+            entry["libraries"] = _set_diff(old_surface["libraries"], new_surface["libraries"])
+
+        counts["classes_added"] += len(entry["classes"]["added"])
+        counts["classes_removed"] += len(entry["classes"]["removed"])
+        counts["classes_changed"] += len(entry["classes"]["changed"])
+        changed[name] = entry
+
+    return {
+        "old": str(old_dir),
+        "new": str(new_dir),
+        "summary": {
+            "frameworks_added": len(frameworks["added"]),
+            "frameworks_removed": len(frameworks["removed"]),
+            "frameworks_changed": len(changed),
+            "frameworks_unchanged": len(old.frameworks.keys() & new.frameworks.keys()) - len(changed),
+            **counts,
+        },
+        "frameworks": {**frameworks, "changed": changed},
+    }
+
+
+def changelog_markdown(report: Dict[str, Any], old_label: str, new_label: str, max_symbols: int = 20) -> str:
+    """Render a diff report as a Hugo changelog page (listing up to `max_symbols` symbols per change)"""
+    summary = report["summary"]
+    md = [f"---\ntitle: {old_label} → {new_label}\nweight: 1\n---\n"]
+    md.append("## Summary\n")
+    md.append("| | Added | Removed | Changed |")
+    md.append("|---|---|---|---|")
+    md.append(f"| Frameworks | {summary['frameworks_added']} | {summary['frameworks_removed']} | "
+              f"{summary['frameworks_changed']} |")
+    md.append(f"| Classes | {summary['classes_added']} | {summary['classes_removed']} | {summary['classes_changed']} |")
+    md.append(f"| Methods | {summary['methods_added']} | {summary['methods_removed']} | |")
+    md.append(f"| Symbols | {summary['symbols_added']} | {summary['symbols_removed']} | |\n")
+
+    frameworks = report["frameworks"]
+    for title, key in (("Added frameworks", "added"), ("Removed frameworks", "removed")):
+        if frameworks[key]:
+            md.append(f"## {title}\n")
+            md.extend(f"- [{name}](../../docs/{name.lower()}/)" if key == "added" else f"- {name}"
+                      for name in frameworks[key])
+            md.append("")
+
+    if frameworks["changed"]:
+        md.append("## Changed frameworks\n")
+    for name, entry in frameworks["changed"].items():
+        md.append(f"### [{name}](../../docs/{name.lower()}/)\n")
+        classes = entry["classes"]
+        for cls in classes["added"]:
+            md.append(f"- **+** `{cls}`")
+        for cls in classes["removed"]:
+            md.append(f"- **−** `{cls}`")
+        for cls, change in classes["changed"].items():
+            md.append(f"- **~** `{cls}`")
+            if "super" in change:
+                md.append(f"  - superclass: `{change['super'][0]}` → `{change['super'][1]}`")
+            for key in ("methods", "ivars", "properties", "protocols"):
+                part = change.get(key) or {}
+                md.extend(f"  - + {key[:-1]} `{item}`" for item in part.get("added", []))
+                md.extend(f"  - − {key[:-1]} `{item}`" for item in part.get("removed", []))
+                md.extend(f"  - ~ {key[:-1]} `{item}`" for item in part.get("changed", {}))
+        for key in ("symbols", "libraries"):
+            part = entry.get(key)
+            if not part:
+                continue
+            md.append(f"- {key}: {len(part['added'])} added, {len(part['removed'])} removed")
+            if key == "symbols":
+                readable = part.get("demangled") or {}
+                for sign, change in (("+", "added"), ("−", "removed")):
+                    md.extend(f"  - {sign} `{readable.get(sym, sym)}`" for sym in part[change][:max_symbols])
+                    if len(part[change]) > max_symbols:
+                        md.append(f"  - … {len(part[change]) - max_symbols} more {change}")
+        md.append("")
+    return "\n".join(md)
+
+
+class LLMDocumenter:
+    """Documents classes from their signatures via an OpenAI-compatible chat API.
+
+    Classes are reduced to a normalized signature (superclass, protocols,
+    ivars, properties, methods; no addresses) and keyed by its hash, so a
+    class that is identical in another framework or OS build is documented
+    once. Uncached classes are packed into requests up to a prompt token
+    budget, and a bounded number of requests run concurrently with asyncio.
+    """
+
+    SYSTEM_PROMPT = (
+        "You document Apple private framework classes from their Objective-C signatures. "
+        "Reply with a single JSON object of the form "
+        '{"classes": {"<ClassName>": {"summary": "<2-3 sentences>", '
+        '"methods": {"<selector>": "<one sentence>"}}}} covering every class you are given. '
+        "Infer purpose from names and types; say so when unsure."
+    )
+
+    def __init__(self, endpoint: str, model: str, api_key: Optional[str] = None,
+                 cache: Optional["ResultCache"] = None, concurrency: int = 4, batch_tokens: int = 6000,
+                 max_output_tokens: int = 2048, token_budget: int = 0, timeout: float = 120):
+        self.endpoint = endpoint.rstrip("/")
+        self.model = model
+        self.api_key = api_key
+        self.cache = cache
+        self.concurrency = max(1, concurrency)
+        self.batch_tokens = batch_tokens
+        self.max_output_tokens = max_output_tokens
+        # Total tokens (prompt + completion) this run may spend; 0 = unlimited
+        self.token_budget = token_budget
+        self.timeout = timeout
+        self.tokens_used = 0
+        self.requests = 0
+        self._memo: Dict[str, Dict[str, Any]] = {}
+
+    @staticmethod
+    def signature(cls: Dict[str, Any]) -> str:
+        """Normalized, address-free Objective-C style signature of a class record"""
+        name = cls.get("classname") or cls.get("name") or "?"
+        superclass = cls.get("super")
+        if isinstance(superclass, list):
+            superclass = superclass[0] if superclass else None
+        protocols = sorted(p if isinstance(p, str) else str(p.get("name")) for p in cls.get("protocols") or [])
+        lines = [f"@interface {name}" + (f" : {superclass}" if superclass else "") +
+                 (f" <{', '.join(protocols)}>" if protocols else "")]
+        for ivar in sorted(cls.get("fields") or [], key=lambda f: str(f.get("name"))):
+            lines.append(f"  ivar {ivar.get('type') or '?'} {ivar.get('name')}")
+        for prop in sorted(cls.get("properties") or [], key=lambda p: str(p.get("name"))):
+            lines.append(f"  @property {prop.get('name')} [{prop.get('attributes') or ''}]")
+        methods = sorted(cls.get("methods") or [], key=lambda m: (not m.get("class_method"), str(m.get("name"))))
+        for method in methods:
+            if method.get("name"):
+                lines.append(f"  {'+' if method.get('class_method') else '-'}{method['name']}"
+                             + (f" {method['types']}" if method.get("types") else ""))
+        lines.append("@end")
+        return "\n".join(lines)
+
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        # ~4 characters per token is close enough for budgeting
+        return len(text) // 4 + 1
+
+    def _cache_key(self, digest: str) -> Optional[str]:
+        if self.cache is None:
+            return None
+        return self.cache.key("docs", digest, self.model, versioned=False)
+
+    def _batches(self, pending: List[Tuple[str, str, str]]) -> List[List[Tuple[str, str, str]]]:
+        """Pack (digest, name, signature) items into prompts of at most batch_tokens"""
+        batches, current, size = [], [], 0
+        for item in pending:
+            cost = self.estimate_tokens(item[2])
+            if current and size + cost > self.batch_tokens:
+                batches.append(current)
+                current, size = [], 0
+            current.append(item)
+            size += cost
+        if current:
+            batches.append(current)
+        return batches
+
+    def _post(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        request = urllib.request.Request(f"{self.endpoint}/chat/completions", data=json.dumps(payload).encode(),
+                                         headers=headers, method="POST")
+        for attempt in range(3):
+            try:
+                with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                    return json.load(response)
+            except urllib.error.HTTPError as e:
+                if e.code not in (429, 500, 502, 503, 504) or attempt == 2:
+                    raise
+            except urllib.error.URLError:
+                if attempt == 2:
+                    raise
+            time.sleep(2 ** attempt)
+        raise RuntimeError("unreachable")
+
+    @staticmethod
+    def _parse_reply(reply: Dict[str, Any]) -> Dict[str, Any]:
+        content = reply["choices"][0]["message"]["content"].strip()
+        if content.startswith("```"):
+            content = content.split("\n", 1)[1].rsplit("```", 1)[0]
+        parsed = json.loads(content)
+        return parsed.get("classes", parsed) if isinstance(parsed, dict) else {}
+
+    async def _document_batch(self, batch: List[Tuple[str, str, str]], limit: asyncio.Semaphore):
+        async with limit:
+            prompt = "\n\n".join(signature for _digest, _name, signature in batch)
+            estimate = self.estimate_tokens(prompt) + self.max_output_tokens
+            if self.token_budget and self.tokens_used + estimate > self.token_budget:
+                logger.warning(f"    LLM token budget exhausted, {len(batch)} classes left undocumented")
+                return
+            self.tokens_used += estimate  # reserve; corrected from the reported usage below
+            payload = {
+                "model": self.model,
+                "messages": [{"role": "system", "content": self.SYSTEM_PROMPT},
+                             {"role": "user", "content": prompt}],
+                "max_tokens": self.max_output_tokens,
+                "temperature": 0,
+            }
+            try:
+                reply = await asyncio.to_thread(self._post, payload)
+                docs = self._parse_reply(reply)
+            except (OSError, ValueError, KeyError, IndexError, TypeError) as e:
+                self.tokens_used -= estimate
+                logger.warning(f"    LLM request for {len(batch)} classes failed: {e}")
+                return
+            self.requests += 1
+            usage = reply.get("usage") or {}
+            if usage.get("total_tokens"):
+                self.tokens_used += usage["total_tokens"] - estimate
+
+        for digest, name, _signature in batch:
+            doc = docs.get(name)
+            if not isinstance(doc, dict):
+                continue
+            self._memo[digest] = doc
+            key = self._cache_key(digest)
+            if key is not None:
+                self.cache.put(key, doc)
+
+    async def document_async(self, classes: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Class name -> {"summary", "methods"} for every class that could be documented"""
+        by_name: Dict[str, str] = {}
+        pending: Dict[str, Tuple[str, str, str]] = {}
+        for cls in classes:
+            name = cls.get("classname") or cls.get("name")
+            if not name:
+                continue
+            signature = self.signature(cls)
+            digest = hashlib.sha256(signature.encode()).hexdigest()
+            by_name[name] = digest
+            if digest in self._memo or digest in pending:
+                continue
+            key = self._cache_key(digest)
+            cached = self.cache.get(key) if key is not None else None
+            if cached is not None:
+                self._memo[digest] = cached
+            else:
+                pending[digest] = (digest, name, signature)
+
+        if pending:
+            limit = asyncio.Semaphore(self.concurrency)
+            await asyncio.gather(*(self._document_batch(batch, limit)
+                                   for batch in self._batches(list(pending.values()))))
+        return {name: self._memo[digest] for name, digest in by_name.items() if digest in self._memo}
+
+    def document(self, classes: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        return asyncio.run(self.document_async(classes))
+
+
+class DocsSite:
+    """Hugo pages and the client-side search index for the documentation site.
+
+    Each framework is a section, `content/docs/<Framework>/`: `_index.md`
+    carries the summary and the first page of the class list, `page-N.md` the
+    remaining pages, and every class gets its own page. Class and pager pages
+    stay out of the theme's sidebar so its size tracks frameworks, not classes.
+    The search index in `static/search/` is split by name prefix; a shard that
+    grows past MAX_SHARD entries is split on the next character, and
+    `index.json` maps prefixes to shard files so the browser fetches only the
+    shard a query needs.
+
+    A page is rewritten only when its content hash differs from the one
+    recorded at its last write (`<output>/.cache/site.json`), so unchanged
+    pages keep their mtime and incremental `hugo` builds skip them. Pages no
+    longer generated for a framework are removed.
+    """
+
+    PAGE_SIZE = 200
+    MAX_SHARD = 2000
+    MAX_PREFIX = 4
+
+    def __init__(self, root: Path, state_path: Path):
+        self.root = root
+        self.state_path = state_path
+        self.written = 0
+        self.unchanged = 0
+        try:
+            with open(state_path) as f:
+                self.hashes: Dict[str, str] = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            self.hashes = {}
+
+    @staticmethod
+    def slugs(names: List[str]) -> Dict[str, str]:
+        """Page slug per class name: lowercase (as Hugo builds URLs), unique within the framework"""
+        slugs, taken = {}, {"_index", "index"}
+        for name in sorted(set(names)):
+            base = re.sub(r"[^a-z0-9_]+", "-", name.lower()).strip("-") or "class"
+            if len(base) > 80:
+                base = f"{base[:64]}-{hashlib.sha1(name.encode()).hexdigest()[:8]}"
+            if re.fullmatch(r"page-\d+", base):
+                base += "-class"
+            slug, n = base, 2
+            while slug in taken:
+                slug, n = f"{base}-{n}", n + 1
+            taken.add(slug)
+            slugs[name] = slug
+        return slugs
+
+    @staticmethod
+    def _code(text: Any) -> str:
+        return "`" + str(text).replace("`", "'").replace("|", "\\|").replace("\n", " ") + "`"
+
+    @staticmethod
+    def _front_matter(title: str, weight: Optional[int] = None, sidebar: bool = True) -> str:
+        lines = ["---", f"title: {json.dumps(title, ensure_ascii=False)}"]
+        if weight is not None:
+            lines.append(f"weight: {weight}")
+        if not sidebar:
+            lines += ["sidebar:", "  exclude: true"]
+        return "\n".join(lines + ["---", ""])
+
+    def _put(self, rel: str, text: str):
+        """Write a page unless its content hash is unchanged"""
+        digest = hashlib.sha256(text.encode()).hexdigest()
+        path = self.root / rel
+        if self.hashes.get(rel) == digest and path.exists():
+            self.unchanged += 1
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(text)
+        os.replace(tmp, path)
+        self.hashes[rel] = digest
+        self.written += 1
+
+    def _prune(self, prefix: str, keep: set):
+        """Delete recorded files under `prefix` that were not generated this time"""
+        for rel in [rel for rel in self.hashes if rel.startswith(prefix) and rel not in keep]:
+            try:
+                (self.root / rel).unlink()
+            except FileNotFoundError:
+                pass
+            del self.hashes[rel]
+
+    # -- framework sections --------------------------------------------------
+
+    def framework(self, name: str, data: Dict[str, Any], summary: Dict[str, Any], data_file: Optional[str] = None,
+                  docs: Optional[Dict[str, Dict[str, Any]]] = None):
+        """Write the framework's section: paginated index pages and one page per class.
+
+        `summary` is the result writer's running summary (FrameworkOutput.counters["summary"]).
+        """
+        docs = docs or data.get("docs") or {}
+        section = f"content/docs/{name}"
+        classes: Dict[str, Dict[str, Any]] = {}
+        for cls in (data.get("static") or {}).get("classes") or []:
+            cls_name = cls.get("classname") or cls.get("name")
+            if cls_name and cls_name not in classes:
+                classes[cls_name] = cls
+        slugs = self.slugs(list(classes))
+
+        callers: Dict[str, List[Tuple[str, List[str]]]] = {}
+        for consumer in (data.get("usage") or {}).get("used_by") or []:
+            for cls_name, selectors in (consumer.get("calls") or {}).items():
+                callers.setdefault(cls_name, []).append((Path(consumer.get("path") or "?").name, selectors))
+
+        written = set()
+        for cls_name, cls in classes.items():
+            rel = f"{section}/{slugs[cls_name]}.md"
+            self._put(rel, self._class_page(name, cls_name, cls, docs.get(cls_name), callers.get(cls_name)))
+            written.add(rel)
+
+        names = sorted(classes)
+        pages = max(1, -(-len(names) // self.PAGE_SIZE))
+        for page in range(1, pages + 1):
+            rel = f"{section}/_index.md" if page == 1 else f"{section}/page-{page}.md"
+            chunk = names[(page - 1) * self.PAGE_SIZE:page * self.PAGE_SIZE]
+            self._put(rel, self._index_page(name, data, summary, data_file, classes, slugs, chunk, page, pages))
+            written.add(rel)
+        self._prune(section + "/", written)
+
+        # The framework used to be a single page; it would clash with the section
+        legacy = self.root / "content" / "docs" / f"{name}.md"
+        if legacy.exists():
+            legacy.unlink()
+
+    def _pager(self, page: int, pages: int, up: str) -> str:
+        def href(n: int) -> str:
+            return up if n == 1 else f"{up}page-{n}/"
+        parts = [f"Page {page} of {pages}"]
+        if page > 1:
+            parts.insert(0, f"[← Previous]({href(page - 1)})")
+        if page < pages:
+            parts.append(f"[Next →]({href(page + 1)})")
+        return " · ".join(parts) + "\n"
+
+    def _index_page(self, name: str, data: Dict[str, Any], summary: Dict[str, Any], data_file: Optional[str],
+                    classes: Dict[str, Dict[str, Any]], slugs: Dict[str, str], chunk: List[str],
+                    page: int, pages: int) -> str:
+        # Links are relative to the page: the section itself or its page-N/ child
+        up = "" if page == 1 else "../"
+        if page == 1:
+            md = [self._front_matter(name, weight=1)]
+            if data_file:
+                md.append("## Raw Data\n")
+                md.append(f"Full analysis data is available in [`data/{data_file}`](../../data/{data_file}).\n")
+            md.append("## Summary\n")
+            md.append("```json")
+            md.append(json.dumps(summary, indent=2))
+            md.append("```\n")
+            ranking = ((data.get("usage") or {}).get("api_ranking") or [])[:10]
+            if ranking:
+                md.append("## Most-Called APIs\n")
+                md.append("| Class | Selector | Callers |")
+                md.append("|---|---|---|")
+                for api in ranking:
+                    link = f"[{self._code(api['class'])}]({slugs[api['class']]}/)" if api["class"] in slugs \
+                        else self._code(api["class"])
+                    md.append(f"| {link} | {self._code(api['selector'])} | {api['callers']} |")
+                md.append("")
+        else:
+            md = [self._front_matter(f"{name}: classes {(page - 1) * self.PAGE_SIZE + 1}–"
+                                     f"{(page - 1) * self.PAGE_SIZE + len(chunk)}", sidebar=False)]
+            md.append(f"[{name}](../)\n")
+
+        if classes:
+            md.append(f"## Classes ({len(classes)})\n")
+            if pages > 1:
+                md.append(self._pager(page, pages, up))
+            md.append("| Class | Superclass | Methods |")
+            md.append("|---|---|---|")
+            for cls_name in chunk:
+                cls = classes[cls_name]
+                superclass = (cls.get("super") or [None])[0]
+                md.append(f"| [{self._code(cls_name)}]({up}{slugs[cls_name]}/) | "
+                          f"{self._code(superclass) if superclass else ''} | {len(cls.get('methods') or [])} |")
+            md.append("")
+            if pages > 1:
+                md.append(self._pager(page, pages, up))
         return "\n".join(md)
 
+    def _class_page(self, framework: str, name: str, cls: Dict[str, Any], doc: Optional[Dict[str, Any]],
+                    callers: Optional[List[Tuple[str, List[str]]]]) -> str:
+        md = [self._front_matter(name, sidebar=False)]
+        facts = [f"**Framework:** [{framework}](../)"]
+        if cls.get("super"):
+            facts.append(f"**{'Extends' if cls.get('category') else 'Superclass'}:** {self._code(cls['super'][0])}")
+        if cls.get("protocols"):
+            facts.append("**Protocols:** " + ", ".join(self._code(p) for p in cls["protocols"]))
+        if cls.get("lang"):
+            facts.append(f"**Language:** {cls['lang']}")
+        if cls.get("unresolved_methods"):
+            facts.append(f"**Unresolved methods:** {cls['unresolved_methods']} (selector names not recoverable)")
+        md.append("  \n".join(facts) + "\n")
+        if doc and doc.get("summary"):
+            md.append(f"{doc['summary']}\n")
+
+        method_docs = doc.get("methods") if doc and isinstance(doc.get("methods"), dict) else {}
+        methods = cls.get("methods") or []
+        if methods:
+            md.append(f"## Methods ({len(methods)})\n")
+            header = "| Selector | Type Encoding |" + (" Description |" if method_docs else "")
+            md.append(header)
+            md.append("|---|---|" + ("---|" if method_docs else ""))
+            for m in methods:
+                prefix = "+" if m.get("class_method") else "-" if "class_method" in m else ""
+                row = f"| {self._code(prefix + str(m.get('name')))} | {self._code(m['types']) if m.get('types') else ''} |"
+                if method_docs:
+                    row += f" {str(method_docs.get(m.get('name'), '')).replace('|', '/')} |"
+                md.append(row)
+            md.append("")
+
+        ivars = [f for f in cls.get("fields") or [] if f.get("name")]
+        if ivars:
+            md.append("## Instance Variables\n")
+            md.append("| Name | Type | Offset |")
+            md.append("|---|---|---|")
+            for ivar in ivars:
+                md.append(f"| {self._code(ivar['name'])} | {self._code(ivar['type']) if ivar.get('type') else ''} | "
+                          f"{ivar.get('offset') if ivar.get('offset') is not None else ''} |")
+            md.append("")
+
+        properties = cls.get("properties") or []
+        if properties:
+            md.append("## Properties\n")
+            md.append("| Name | Attributes |")
+            md.append("|---|---|")
+            for prop in properties:
+                md.append(f"| {self._code(prop.get('name'))} | "
+                          f"{self._code(prop['attributes']) if prop.get('attributes') else ''} |")
+            md.append("")
+
+        if callers:
+            md.append(f"## Called By ({len(callers)})\n")
+            for consumer, selectors in sorted(callers):
+                md.append(f"- **{consumer}**: " + ", ".join(self._code(s) for s in selectors))
+            md.append("")
+        return "\n".join(md)
+
+    # -- search index --------------------------------------------------------
+
+    @staticmethod
+    def _prefix(name: str, length: int) -> str:
+        return "".join(c if c.isascii() and c.isalnum() else "_" for c in name[:length].lower())
+
+    def _shard(self, entries: List[List[str]], length: int, shards: Dict[str, List[List[str]]]):
+        groups: Dict[str, List[List[str]]] = {}
+        for entry in entries:
+            groups.setdefault(self._prefix(entry[0], length), []).append(entry)
+        for prefix, group in groups.items():
+            # Names no longer than the prefix can't be split further and stay in this shard
+            longer = [e for e in group if len(e[0]) > length]
+            if len(group) > self.MAX_SHARD and length < self.MAX_PREFIX and longer:
+                shorter = [e for e in group if len(e[0]) <= length]
+                if shorter:
+                    shards[prefix] = shorter
+                self._shard(longer, length + 1, shards)
+            else:
+                shards[prefix] = group
+
+    def build_search(self, index: IndexDatabase):
+        """Regenerate static/search/ from the global index (every framework, not just this run's)"""
+        index.commit()
+        entries: List[List[str]] = []
+        per_framework: Dict[str, List[str]] = {}
+        for framework, cls_name in index.conn.execute(
+                "SELECT f.name, c.name FROM classes c JOIN frameworks f ON f.id = c.framework_id"):
+            per_framework.setdefault(framework, []).append(cls_name)
+        urls = {}
+        for (framework,) in index.conn.execute("SELECT name FROM frameworks"):
+            entries.append([framework, "framework", framework, f"docs/{framework.lower()}/"])
+            for cls_name, slug in self.slugs(per_framework.get(framework, [])).items():
+                url = f"docs/{framework.lower()}/{slug}/"
+                urls[(framework, cls_name)] = url
+                entries.append([cls_name, "class", framework, url])
+        seen = set()
+        for framework, cls_name, method in index.conn.execute(
+                "SELECT f.name, c.name, m.name FROM methods m JOIN classes c ON c.id = m.class_id "
+                "JOIN frameworks f ON f.id = m.framework_id"):
+            if (framework, cls_name, method) in seen or (framework, cls_name) not in urls:
+                continue
+            seen.add((framework, cls_name, method))
+            entries.append([method, f"method:{cls_name}", framework, urls[(framework, cls_name)]])
+        entries = [e for e in entries if e[0]]
+        entries.sort()
+
+        shards: Dict[str, List[List[str]]] = {}
+        self._shard(entries, 2, shards)
+        written = set()
+        manifest = {"version": 1, "fields": ["name", "kind", "framework", "url"], "shards": {}}
+        for prefix, group in sorted(shards.items()):
+            rel = f"static/search/{prefix}.json"
+            self._put(rel, json.dumps(group, separators=(",", ":"), ensure_ascii=False))
+            manifest["shards"][prefix] = {"file": f"{prefix}.json", "count": len(group)}
+            written.add(rel)
+        rel = "static/search/index.json"
+        self._put(rel, json.dumps(manifest, separators=(",", ":")))
+        written.add(rel)
+        self._prune("static/search/", written)
+        logger.info(f"Search index: {len(entries)} entries in {len(shards)} shards")
+
+    def save(self):
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.state_path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump(self.hashes, f, separators=(",", ":"))
+        os.replace(tmp, self.state_path)
+
+
+class AIDocumenter:
+    """Layer 4: AI Documentation (class docs when an LLM backend is configured)"""
+    
+    def __init__(self, output_dir: Path, index: Optional[IndexDatabase] = None, fmt: str = "json",
+                 max_buffer: int = 8 << 20, llm: Optional[LLMDocumenter] = None):
+        self.output_dir = output_dir
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.index = index
+        self.llm = llm
+        self.writer = ResultWriter(output_dir, fmt, max_buffer)
+        # Hashes for `deapplefy diff`; frameworks from earlier runs are kept
+        self.manifest = SnapshotManifest.load(output_dir, complete=False)
+        # output_dir is 'data/', so parent is the site root with content/ and static/
+        self.site = DocsSite(output_dir.parent, output_dir / ".cache" / "site.json")
+
+    def begin(self, framework_name: str) -> FrameworkOutput:
+        """Open the framework's result file so layers can be streamed into it as they finish"""
+        return self.writer.open(framework_name)
+
+    def unchanged(self, framework_name: str, inputs: str) -> bool:
+        """Whether the result on disk was written, in the current format, from these same inputs"""
+        entry = self.manifest.frameworks.get(framework_name) or {}
+        path = self.writer.path(framework_name)
+        return entry.get("inputs") == inputs and entry.get("file") == path.name and path.exists()
+
+    def generate(self, framework_name: str, data: Dict[str, Any], output: Optional[FrameworkOutput] = None,
+                 inputs: Optional[str] = None):
+        docs = {}
+        if self.llm is not None:
+            with profiler.span("llm", "layer", framework=framework_name):
+                docs = self.llm.document((data.get("static") or {}).get("classes") or [])
+
+        # Save raw data; with `output` the layers have already been streamed into it
+        with profiler.span("json-write", "layer", framework=framework_name) as span:
+            if output is None:
+                output = self.begin(framework_name)
+                try:
+                    for key, value in data.items():
+                        output.write(key, value)
+                except BaseException:
+                    output.abort()
+                    raise
+            if docs:
+                output.write("docs", docs)
+            output.commit()
+            span.set(output_bytes=output.counters["bytes"])
+        self.writer.remove_other_formats(framework_name)
+        logger.info(f"  [Layer 4] Saved data to {output.path}")
+
+        if self.index is not None:
+            self.index.add_framework(framework_name, data)
+        self.manifest.add(framework_name, data, output.path.name, inputs)
+        
+        # Hugo pages: the framework section and one page per class
+        with profiler.span("site", "layer", framework=framework_name):
+            self.site.framework(framework_name, data, output.counters["summary"], output.path.name, docs)
+
+    def close(self):
+        self.manifest.save(self.output_dir)
+        if self.index is not None:
+            self.site.build_search(self.index)
+            self.index.close()
+        self.site.save()
+        logger.info(f"Site: {self.site.written} pages written, {self.site.unchanged} unchanged")
+
+
+@functools.lru_cache(maxsize=None)
+def tool_version(tool: str) -> str:
+    """First line of a tool's version output, or "" when it is not installed"""
+    flag = "--version" if tool == "class-dump" else "-v"
+    try:
+        res = run_tool([tool, flag], capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.TimeoutExpired):
+        return ""
+    out = (res.stdout or res.stderr).strip()
+    return out.splitlines()[0] if out else ""
+
+
+class ResultCache:
+    """Persistent, content-addressed cache of per-layer results.
+
+    Entries live under `<output>/.cache/results/` as compact JSON, keyed by a
+    SHA-256 over the layer name, the binary fingerprint (inode/size/mtime, or a
+    content hash), tool versions and the deapplefy version. Reads touch the
+    entry's mtime so eviction can drop the least recently used entries once the
+    cache grows past its size cap. A RecordSpool in a layer result, at any depth
+    of its dicts, is stored as a `<key>.<field path>.jsonl` file beside the entry
+    and read back as a spool over it.
+    """
+
+    EVICT_EVERY = 64
+    # Stand in for a spooled field in the entry's JSON
+    RECORDS = "$records"
+    MAPPING = "$mapping"
+
+    def __init__(self, root: Path, max_bytes: int = 2 << 30, refresh: bool = False, hash_contents: bool = False):
+        self.root = root
+        self.max_bytes = max_bytes
+        # refresh: ignore existing entries but still store new results (--force)
+        self.refresh = refresh
+        self.hash_contents = hash_contents
+        self.hits = 0
+        self.misses = 0
+        self._puts = 0
+        self._fingerprints: Dict[str, str] = {}
+
+    def fingerprint(self, path: Path) -> str:
+        """Identity of a file's contents: a SHA-256, or inode/size/mtime by default"""
+        key = str(path)
+        if key not in self._fingerprints:
+            try:
+                st = path.stat()
+            except OSError:
+                cache = DyldSharedCache.current
+                if cache is not None and cache.has_image(key):
+                    # Cached images change only when the whole cache does
+                    return f"dyld:{cache.uuid}"
+                return "missing"
+            if self.hash_contents:
+                digest = hashlib.sha256()
+                with open(path, "rb") as f:
+                    for chunk in iter(lambda: f.read(1 << 20), b""):
+                        digest.update(chunk)
+                self._fingerprints[key] = digest.hexdigest()
+            else:
+                self._fingerprints[key] = f"{st.st_dev}:{st.st_ino}:{st.st_size}:{st.st_mtime_ns}"
+        return self._fingerprints[key]
+
+    def key(self, layer: str, *parts: str, tools: Tuple[str, ...] = (), versioned: bool = True) -> str:
+        # versioned=False: the entry stays valid across deapplefy versions (e.g. generated docs)
+        digest = hashlib.sha256()
+        prefix = (layer, __version__) if versioned else (layer,)
+        for part in prefix + tuple(tool_version(t) for t in tools) + parts:
+            digest.update(part.encode("utf-8", errors="surrogateescape"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        if self.refresh:
+            self.misses += 1
+            return None
+        path = self._path(key)
+        try:
+            with open(path) as f:
+                value = self._open_spools(json.load(f), path, [])
+            os.utime(path)
+        except (OSError, json.JSONDecodeError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def put(self, key: str, value: Dict[str, Any]):
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+            stored = value
+            for fields, spool in list(RecordSpool.nested(value)):
+                spool.close()
+                records = path.with_name(f"{key}.{'.'.join(fields)}.jsonl")
+                shutil.copyfile(spool.path, records.with_name(records.name + suffix))
+                os.replace(records.with_name(records.name + suffix), records)
+                marker = {self.RECORDS: len(spool), self.MAPPING: True} if spool.mapping else {self.RECORDS: len(spool)}
+                stored = self._replaced(stored, fields, marker)
+            tmp = path.with_name(path.name + suffix)
+            with open(tmp, "w") as f:
+                json.dump(stored, f, separators=(",", ":"), default=str)
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning(f"    Failed to write cache entry: {e}")
+            return
+        self._puts += 1
+        if self._puts % self.EVICT_EVERY == 0:
+            self.evict()
+
+    @classmethod
+    def _replaced(cls, tree: Dict[str, Any], fields: List[str], leaf: Any) -> Dict[str, Any]:
+        """A copy of `tree` with the value at `fields` replaced; the dicts along the way are copied"""
+        if not fields:
+            return leaf
+        return {**tree, fields[0]: cls._replaced(tree[fields[0]], fields[1:], leaf)}
+
+    def _open_spools(self, value: Any, path: Path, fields: List[str]) -> Any:
+        """Turn the markers of a stored entry back into spools over their sidecar files"""
+        if not isinstance(value, dict):
+            return value
+        if self.RECORDS in value and set(value) <= {self.RECORDS, self.MAPPING}:
+            records = path.with_name(f"{path.stem}.{'.'.join(fields)}.jsonl")
+            if not records.exists():
+                raise FileNotFoundError(records)
+            return RecordSpool(records, value[self.RECORDS], bool(value.get(self.MAPPING)))
+        for field, item in value.items():
+            value[field] = self._open_spools(item, path, fields + [field])
+        return value
+
+    def cached(self, key: str, compute: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits in max_bytes"""
+        # key -> [mtime of the entry's JSON, total size, files]; spooled fields go with their entry
+        entries: Dict[str, List[Any]] = {}
+        total = 0
+        for path in self.root.glob("*/*"):
+            if path.name.endswith(".tmp"):
+                continue
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            key = path.name.split(".", 1)[0]
+            entry = entries.setdefault(key, [0.0, 0, []])
+            if path.name == f"{key}.json":
+                entry[0] = st.st_mtime
+            entry[1] += st.st_size
+            entry[2].append(path)
+            total += st.st_size
+        if total <= self.max_bytes:
+            return
+        for _mtime, size, paths in sorted(entries.values(), key=lambda entry: entry[0]):
+            if total <= self.max_bytes:
+                break
+            try:
+                for path in paths:
+                    path.unlink()
+                total -= size
+            except OSError:
+                pass
+        logger.debug(f"Cache evicted down to {total} bytes")
+
+
+def analyze_framework(framework: Path, binary_path: Path,
+                      static_analyzer: "StaticAnalyzer",
+                      usage_analyzer: "UsageAnalyzer",
+                      runtime_analyzer: "RuntimeAnalyzer",
+                      runtime_executor: Optional[Executor] = None,
+                      cache: Optional[ResultCache] = None,
+                      emit: Optional[Callable[[str, Any], None]] = None) -> Dict[str, Any]:
+    """Run layers 1-3 for a single framework and return the collected data.
+
+    When an executor is given, the runtime layer (which does not depend on the
+    static results) runs on it while the static and usage layers run here.
+    Layer results are served from / stored to the cache when one is given.
+    `emit(key, value)` is called for each top-level entry as soon as it is
+    available, e.g. to stream it to a FrameworkOutput.
+    """
+    def run_static():
+        with profiler.span("static", "layer", framework=framework.name):
+            return static_analyzer.analyze(framework, binary_path)
+
+    def run_runtime():
+        with profiler.span("runtime", "layer", framework=framework.name):
+            return runtime_analyzer.analyze(framework)
+
+    def run_usage():
+        with profiler.span("usage", "layer", framework=framework.name):
+            return usage_analyzer.analyze(framework.stem, data["static"])
+
+    if cache is not None:
+        # The same snapshot the structure scan reads: any added, removed or edited file
+        # in the bundle (plists included, sealed by CodeResources or not) changes the key
+        bundle = static_analyzer.snapshot.ensure(framework).fingerprint(framework)
+        static_key = cache.key("static", str(framework), str(ObjCMetadataReader.VERSION),
+                               cache.fingerprint(binary_path), bundle, tools=("r2",))
+        runtime_key = cache.key("runtime", str(framework), cache.fingerprint(binary_path),
+                                tools=("class-dump",))
+        run_static = functools.partial(cache.cached, static_key, run_static)
+        run_runtime = functools.partial(cache.cached, runtime_key, run_runtime)
+
+    runtime_future = None
+    if runtime_executor is not None:
+        runtime_future = runtime_executor.submit(run_runtime)
+
+    # Collect data from all layers
+    data = {}
+
+    def put(key: str, value: Any):
+        data[key] = value
+        if emit is not None:
+            emit(key, value)
+
+    put("framework", framework.name)
+    put("binary_path", str(binary_path))
+
+    # Layer 1
+    put("static", run_static())
+
+    # Layer 2
+    if cache is not None:
+        methods = {cls: sorted(sels) for cls, sels in usage_analyzer.method_sets(data["static"]).items()}
+        usage_key = cache.key("usage", framework.stem, str(UsageIndex.VERSION), usage_analyzer.get_index().digest(),
+                              json.dumps(sorted(usage_analyzer.known_classes(data["static"]))),
+                              json.dumps(methods, sort_keys=True))
+        put("usage", cache.cached(usage_key, run_usage))
+    else:
+        put("usage", run_usage())
+
+    # Layer 3
+    if runtime_future is not None:
+        put("runtime", runtime_future.result())
+    else:
+        put("runtime", run_runtime())
+
+    return data
+
+
+def framework_inputs(framework: Path, binary_path: Path, snapshot: FileSnapshot, cache: ResultCache,
+                     usage_digest: str, llm: Optional["LLMDocumenter"] = None) -> str:
+    """Key over everything a framework's result is derived from.
+
+    The bundle's file stats from the snapshot, the binary (which may live in
+    the dyld cache), the consumer index, the tool versions and the LLM
+    settings; a result written from the same key can be kept as it is.
+    """
+    return cache.key("inputs", str(framework), snapshot.fingerprint(framework), cache.fingerprint(binary_path),
+                     usage_digest, f"{llm.endpoint} {llm.model}" if llm is not None else "",
+                     tools=("r2", "class-dump"))
+
+
+def _pipeline_worker(conn, log_level: int, usage_index: Optional[UsageIndex], cache: Optional[ResultCache],
+                     dyld_cache: Optional[Path], profile: bool = False,
+                     spool_ceiling: Optional[int] = SpoolBudget.DEFAULT_CEILING):
+    """Worker process entry point: owns its own analyzers and serves tasks until told to stop"""
+    logger.setLevel(log_level)
+    if profile:
+        profiler.enable()
+    if dyld_cache is not None:
+        DyldSharedCache.register(dyld_cache)
+    static_analyzer = StaticAnalyzer(spool_ceiling=spool_ceiling)
+    usage_analyzer = UsageAnalyzer(usage_index, spool_ceiling=spool_ceiling)
+    scanner = FrameworkScanner()
+    runtime_analyzer = RuntimeAnalyzer(scanner)
+
+    with ThreadPoolExecutor(max_workers=1) as runtime_executor:
+        while True:
+            try:
+                task = conn.recv()
+            except (EOFError, KeyboardInterrupt):
+                break
+            if task is None:
+                break
+
+            framework, binary_path, snapshot = Path(task[0]), Path(task[1]), task[2]
+            scanner.remember_binary(framework, binary_path)
+            if snapshot is not None:
+                static_analyzer.snapshot = snapshot
+            logger.info(f"Processing {framework.name}...")
+            try:
+                with profiler.span(framework.name, "framework"):
+                    data = analyze_framework(framework, binary_path, static_analyzer,
+                                             usage_analyzer, runtime_analyzer, runtime_executor, cache)
+                conn.send(("ok", data, profiler.drain()))
+            except Exception as e:
+                conn.send(("error", f"{type(e).__name__}: {e}", profiler.drain()))
+    runtime_analyzer.close()
+
+
+class ShardPlan:
+    """Deterministic split of the framework list across N independent runs.
+
+    Frameworks are assigned greedily, heaviest binary first, to the shard
+    with the smallest total binary size so far; ties are broken by a stable
+    hash of the framework path. Every host that sees the same frameworks
+    computes the same plan, so shards need no coordination. Each shard
+    records its assignment and outcome in `shard.json` for `deapplefy merge`.
+    """
+
+    FILENAME = "shard.json"
+
+    def __init__(self, index: int, count: int):
+        if count < 1 or not 1 <= index <= count:
+            raise ValueError(f"Invalid shard {index}/{count}")
+        self.index = index
+        self.count = count
+        self.corpus_size = 0
+        self.corpus_digest = ""
+        self.weight = 0
+        self.assigned: List[str] = []
+        # unchanged: kept from the shard's previous run without analysis
+        self.outcome: Dict[str, List[str]] = {"processed": [], "failed": [], "skipped": [], "unchanged": []}
+
+    @classmethod
+    def parse(cls, spec: str) -> "ShardPlan":
+        """Parse an `I/N` spec (1-based)"""
+        try:
+            index, count = (int(part) for part in spec.split("/"))
+        except ValueError:
+            raise ValueError(f"Shard must look like I/N, got {spec!r}")
+        return cls(index, count)
+
+    @staticmethod
+    def _stable_hash(value: str) -> str:
+        return hashlib.sha1(value.encode()).hexdigest()
+
+    def select(self, frameworks: List[Path], scanner: FrameworkScanner) -> List[Path]:
+        """Return this shard's frameworks, in scan order"""
+        sizes = {}
+        for framework in frameworks:
+            binary_path = scanner.get_binary_path(framework)
+            sizes[framework] = scanner.binary_size(binary_path) if binary_path else 0
+
+        order = sorted(frameworks, key=lambda f: (-sizes[f], self._stable_hash(str(f))))
+        loads = [(0, shard) for shard in range(self.count)]
+        owner = {}
+        for framework in order:
+            load, shard = heapq.heappop(loads)
+            owner[framework] = shard
+            if shard == self.index - 1:
+                self.weight += sizes[framework]
+            heapq.heappush(loads, (load + max(sizes[framework], 1), shard))
+
+        listing = "\n".join(f"{f}\t{sizes[f]}" for f in sorted(frameworks, key=str))
+        self.corpus_size = len(frameworks)
+        self.corpus_digest = hashlib.sha256(listing.encode()).hexdigest()
+        selected = [f for f in frameworks if owner[f] == self.index - 1]
+        self.assigned = [f.stem for f in selected]
+        logger.info(f"Shard {self.index}/{self.count}: {len(selected)} of {len(frameworks)} frameworks, "
+                    f"{self.weight / (1 << 20):.1f} MB of binaries")
+        return selected
+
+    def record(self, status: str, framework: Path):
+        self.outcome[status].append(framework.stem)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"shard": self.index, "count": self.count, "corpus_size": self.corpus_size,
+                "corpus_digest": self.corpus_digest, "weight": self.weight, "assigned": self.assigned,
+                **self.outcome}
+
+    def save(self, output_dir: Path):
+        path = output_dir / self.FILENAME
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        os.replace(tmp, path)
+
+
+class FrameworkPipeline:
+    """Runs layers 1-3 across a pool of worker processes.
+
+    Every framework is handed to a long-lived worker with its own analyzer
+    instances; results stream back to the parent, which runs layer 4 while the
+    workers move on. A worker that crashes or exceeds the per-framework timeout
+    is killed and replaced, and only its current framework is lost.
+    """
+
+    def __init__(self, jobs: int, timeout: float, log_level: int = logging.INFO,
+                 usage_index: Optional[UsageIndex] = None, cache: Optional[ResultCache] = None,
+                 dyld_cache: Optional[Path] = None, profile: bool = False,
+                 snapshot: Optional[FileSnapshot] = None,
+                 spool_ceiling: Optional[int] = SpoolBudget.DEFAULT_CEILING):
+        self.jobs = max(1, jobs)
+        self.timeout = timeout
+        self.log_level = log_level
+        # Built once by the parent and shipped to every worker
+        self.usage_index = usage_index
+        self.cache = cache
+        self.dyld_cache = dyld_cache
+        # Workers record spans and return them with each result
+        self.profile = profile
+        # Each task carries its framework's part of the snapshot
+        self.snapshot = snapshot
+        self.spool_ceiling = spool_ceiling
+        # spawn avoids inheriting state (ObjC runtime, open pipes) from the parent
+        self._ctx = multiprocessing.get_context("spawn")
+
+    def _start_worker(self) -> Dict[str, Any]:
+        parent_conn, child_conn = self._ctx.Pipe()
+        process = self._ctx.Process(target=_pipeline_worker, args=(child_conn, self.log_level, self.usage_index, self.cache,
+                                          self.dyld_cache, self.profile, self.spool_ceiling),
+                                    daemon=True)
+        process.start()
+        child_conn.close()
+        return {"process": process, "conn": parent_conn, "task": None, "deadline": None}
+
+    def _stop_worker(self, worker: Dict[str, Any], kill: bool = False):
+        process = worker["process"]
+        if kill:
+            process.kill()
+        else:
+            try:
+                worker["conn"].send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        process.join(timeout=5)
+        if process.is_alive():
+            process.kill()
+            process.join()
+        worker["conn"].close()
+
+    def _crash_reason(self, worker: Dict[str, Any]) -> str:
+        worker["process"].join(timeout=1)
+        return f"worker crashed (exit code {worker['process'].exitcode})"
+
+    def run(self, tasks: List[Tuple[Path, Path]],
+            on_result: Callable[[Path, Path, Dict[str, Any]], None],
+            on_failure: Callable[[Path, str], None]):
+        """Process (framework, binary) tasks in order, calling back as each one finishes"""
+        pending = list(reversed(tasks))
+        workers: List[Dict[str, Any]] = []
+
+        try:
+            for _ in range(min(self.jobs, len(tasks))):
+                workers.append(self._start_worker())
+            while pending or any(w["task"] for w in workers):
+                for worker in workers:
+                    if worker["task"] is None and pending:
+                        framework, binary_path = pending.pop()
+                        subset = self.snapshot.subset(framework) if self.snapshot is not None else None
+                        worker["conn"].send((str(framework), str(binary_path), subset))
+                        worker["task"] = (framework, binary_path)
+                        worker["deadline"] = time.monotonic() + self.timeout if self.timeout > 0 else None
+
+                busy = [w for w in workers if w["task"]]
+                deadlines = [w["deadline"] for w in busy if w["deadline"] is not None]
+                wait_for = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+                ready = multiprocessing.connection.wait(
+                    [w["conn"] for w in busy] + [w["process"].sentinel for w in busy],
+                    timeout=wait_for
+                )
+
+                for i, worker in enumerate(workers):
+                    if not worker["task"]:
+                        continue
+                    framework, binary_path = worker["task"]
+                    restart = True
+
+                    if worker["conn"] in ready:
+                        try:
+                            status, payload, spans = worker["conn"].recv()
+                            profiler.extend(spans)
+                        except (EOFError, OSError):
+                            status, payload = "crashed", self._crash_reason(worker)
+                        if status == "ok":
+                            worker["task"] = None
+                            try:
+                                on_result(framework, binary_path, payload)
+                            except Exception as e:
+                                # Layer 4 runs here in the parent; the worker itself is fine
+                                on_failure(framework, f"layer 4: {type(e).__name__}: {e}")
+                            continue
+                        # A plain analyzer exception leaves the worker usable
+                        restart = status != "error"
+                        failure = payload
+                    elif worker["process"].sentinel in ready:
+                        failure = self._crash_reason(worker)
+                    elif worker["deadline"] is not None and time.monotonic() >= worker["deadline"]:
+                        failure = f"timed out after {self.timeout:g}s"
+                    else:
+                        continue
+
+                    worker["task"] = None
+                    on_failure(framework, failure)
+                    if restart:
+                        self._stop_worker(worker, kill=True)
+                        workers[i] = self._start_worker()
+        finally:
+            for worker in workers:
+                self._stop_worker(worker, kill=bool(worker["task"]))
+
+
+def query_main(argv: List[str]) -> int:
+    """`deapplefy query`: answer lookups from the SQLite index"""
+    parser = argparse.ArgumentParser(prog="deapplefy query", description="Query the global framework index")
+    parser.add_argument("kind", choices=["class", "method", "symbol", "imports", "callers", "links", "framework",
+                                         "top", "search"],
+                        help="What to look up")
+    parser.add_argument("term", help="Name (or search terms) to look up")
+    parser.add_argument("--db", type=Path, default=Path("data") / "index.db", help="Path to the SQLite index")
+    parser.add_argument("--limit", "-l", type=int, default=100, help="Maximum rows to print")
+    parser.add_argument("--json", action="store_true", help="Print rows as JSON")
+    args = parser.parse_args(argv)
+
+    if not args.db.exists():
+        logger.error(f"Index not found: {args.db}")
+        return 1
+    index = IndexDatabase(args.db)
+    try:
+        rows = index.query(args.kind, args.term, args.limit)
+    finally:
+        index.close()
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        for row in rows:
+            print("\t".join("" if v is None else str(v) for v in row.values()))
+    return 0 if rows else 1
+
+
+def diff_main(argv: List[str]) -> int:
+    """`deapplefy diff`: compare two data/ snapshots (e.g. two OS builds)"""
+    parser = argparse.ArgumentParser(prog="deapplefy diff", description="Diff two analysis snapshots")
+    parser.add_argument("old", type=Path, help="Older data/ directory")
+    parser.add_argument("new", type=Path, help="Newer data/ directory")
+    parser.add_argument("--report", type=Path, help="JSON report path (default: stdout)")
+    parser.add_argument("--changelog", type=Path,
+                        help="Hugo changelog page (default: content/changelog/<old>-to-<new>.md next to NEW)")
+    parser.add_argument("--no-changelog", action="store_true", help="Don't write a changelog page")
+    parser.add_argument("--old-label", help="Name for the old snapshot (default: its directory name)")
+    parser.add_argument("--new-label", help="Name for the new snapshot (default: its directory name)")
+    parser.add_argument("--save-manifests", action="store_true",
+                        help="Write repaired manifests back into OLD and NEW so later diffs don't re-hash them")
+    args = parser.parse_args(argv)
+
+    for directory in (args.old, args.new):
+        if not directory.is_dir():
+            logger.error(f"Snapshot not found: {directory}")
+            return 1
+    old_label = args.old_label or args.old.resolve().name
+    new_label = args.new_label or args.new.resolve().name
+
+    report = diff_snapshots(args.old, args.new, args.save_manifests)
+    if args.report:
+        args.report.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if not args.no_changelog:
+        changelog = args.changelog or (args.new.resolve().parent / "content" / "changelog" /
+                                       f"{old_label}-to-{new_label}.md")
+        changelog.parent.mkdir(parents=True, exist_ok=True)
+        section = changelog.parent / "_index.md"
+        if not section.exists():
+            section.write_text("---\ntitle: Changelog\n---\n\nAPI changes between analyzed OS builds.\n")
+        changelog.write_text(changelog_markdown(report, old_label, new_label))
+        logger.info(f"Changelog written to {changelog}")
+
+    summary = report["summary"]
+    logger.info(f"{summary['frameworks_changed']} changed, {summary['frameworks_added']} added, "
+                f"{summary['frameworks_removed']} removed, {summary['frameworks_unchanged']} unchanged")
+    return 0
+
+
+def merge_main(argv: List[str]) -> int:
+    """`deapplefy merge`: combine `--shard` outputs into one data/, content/docs/ and static/search/ tree"""
+    parser = argparse.ArgumentParser(prog="deapplefy merge", description="Merge sharded analysis outputs")
+    parser.add_argument("shards", type=Path, nargs="+", help="Output directories of the shard runs")
+    parser.add_argument("--output", "-o", type=Path, default=Path("data"), help="Merged output directory")
+    parser.add_argument("--index-db", type=Path, help="SQLite index path (default: <output>/index.db)")
+    parser.add_argument("--no-index", action="store_true", help="Don't rebuild the SQLite index")
+    parser.add_argument("--force", action="store_true", help="Merge even if frameworks are missing or duplicated")
+    args = parser.parse_args(argv)
+
+    # -- check that the shards cover the corpus exactly once --
+    plans, results, problems = [], [], []
+    for shard_dir in args.shards:
+        try:
+            with open(shard_dir / ShardPlan.FILENAME) as f:
+                plans.append(json.load(f))
+        except (OSError, ValueError) as e:
+            logger.error(f"{shard_dir}: not a shard output ({e})")
+            return 1
+        results.append(ResultWriter.find(shard_dir))
+
+    first = plans[0]
+    for shard_dir, plan in zip(args.shards, plans):
+        if (plan["count"], plan["corpus_digest"]) != (first["count"], first["corpus_digest"]):
+            problems.append(f"{shard_dir} was sharded from a different framework list or shard count")
+    numbers = sorted(plan["shard"] for plan in plans)
+    if numbers != list(range(1, first["count"] + 1)):
+        problems.append(f"expected shards 1..{first['count']}, got {numbers}")
+
+    owners: Dict[str, List[str]] = {}
+    for shard_dir, plan, found in zip(args.shards, plans, results):
+        for name in plan["assigned"]:
+            owners.setdefault(name, [])
+        for name in found:
+            owners.setdefault(name, []).append(str(shard_dir))
+        handled = set(plan["skipped"]) | set(found)
+        missed = [name for name in plan["assigned"] if name not in handled]
+        if missed:
+            problems.append(f"{shard_dir}: {len(missed)} assigned frameworks have no result, "
+                            f"e.g. {', '.join(missed[:5])}")
+        extra = [name for name in found if name not in set(plan["assigned"])]
+        if extra:
+            problems.append(f"{shard_dir}: {len(extra)} results were not assigned to it, e.g. {', '.join(extra[:5])}")
+    assigned_total = sum(len(plan["assigned"]) for plan in plans)
+    if assigned_total != first["corpus_size"]:
+        problems.append(f"shards were assigned {assigned_total} frameworks, corpus has {first['corpus_size']}")
+    duplicated = {name: dirs for name, dirs in owners.items() if len(dirs) > 1}
+    for name, dirs in sorted(duplicated.items())[:20]:
+        problems.append(f"{name} was processed by more than one shard: {', '.join(dirs)}")
+
+    for problem in problems:
+        logger.error(problem)
+    if problems and not args.force:
+        logger.error("Not merging; rerun the affected shards or pass --force")
+        return 1
+
+    # -- copy results, docs and manifests, then rebuild the index --
+    args.output.mkdir(parents=True, exist_ok=True)
+    site = DocsSite(args.output.parent, args.output / ".cache" / "site.json")
+    manifest = SnapshotManifest()
+    index = None if args.no_index else IndexDatabase(args.index_db or args.output / "index.db")
+    merged = 0
+    try:
+        for shard_dir, found in zip(args.shards, results):
+            shard_manifest = SnapshotManifest.load(shard_dir)
+            for name, path in sorted(found.items()):
+                if name in manifest.frameworks:
+                    continue  # duplicate under --force: first shard wins
+                for suffix in ResultWriter.FORMATS.values():
+                    stale = args.output / f"{name}{suffix}"
+                    if stale.name != path.name and stale.exists():
+                        stale.unlink()
+                shutil.copy2(path, args.output / path.name)
+                if name in shard_manifest.frameworks:
+                    manifest.frameworks[name] = shard_manifest.frameworks[name]
+                # Pages are regenerated from the result; unchanged ones are not rewritten
+                data = ResultWriter.read(path)
+                site.framework(name, data, FrameworkOutput.summarize(data), path.name)
+                if index is not None:
+                    index.add_framework(name, data)
+                merged += 1
+        if index is not None:
+            site.build_search(index)
+    finally:
+        if index is not None:
+            index.close()
+    manifest.save(args.output)
+    site.save()
+
+    skipped = sum(len(plan["skipped"]) for plan in plans)
+    failed = sum(len(plan["failed"]) for plan in plans)
+    logger.info(f"Merged {merged} frameworks from {len(plans)} shards into {args.output} "
+                f"({skipped} skipped, {failed} failed)")
+    return 1 if problems else 0
+
+
+def site_main(argv: List[str]) -> int:
+    """`deapplefy site`: regenerate the Hugo pages and search index from existing results"""
+    parser = argparse.ArgumentParser(prog="deapplefy site", description="Regenerate documentation pages from results")
+    parser.add_argument("data", type=Path, nargs="?", default=Path("data"), help="Directory of per-framework results")
+    parser.add_argument("--index-db", type=Path, help="SQLite index for the search index (default: <data>/index.db)")
+    args = parser.parse_args(argv)
+
+    results = ResultWriter.find(args.data)
+    if not results:
+        logger.error(f"No results found in {args.data}")
+        return 1
+    site = DocsSite(args.data.parent, args.data / ".cache" / "site.json")
+    for name, path in sorted(results.items()):
+        data = ResultWriter.read(path)
+        site.framework(name, data, FrameworkOutput.summarize(data), path.name)
+
+    index_db = args.index_db or args.data / "index.db"
+    if index_db.exists():
+        index = IndexDatabase(index_db)
+        try:
+            site.build_search(index)
+        finally:
+            index.close()
+    else:
+        logger.warning(f"No index at {index_db}; search index not rebuilt")
+    site.save()
+    logger.info(f"Site: {site.written} pages written, {site.unchanged} unchanged")
+    return 0
+
+
+def pack_main(argv: List[str]) -> int:
+    """`deapplefy pack`: convert a data/ tree into a single string pack"""
+    parser = argparse.ArgumentParser(prog="deapplefy pack", description="Pack results into a compact string-table container")
+    parser.add_argument("data", type=Path, nargs="?", default=Path("data"), help="Directory of per-framework results")
+    parser.add_argument("--output", "-o", type=Path, help="Pack file (default: <data>/frameworks.dpak)")
+    parser.add_argument("--codec", choices=["auto"] + sorted(StringPack.CODECS), default="auto",
+                        help="Compression (auto = zstd if installed, else zlib)")
+    args = parser.parse_args(argv)
+
+    results = ResultWriter.find(args.data)
+    if not results:
+        logger.error(f"No results found in {args.data}")
+        return 1
+    output = args.output or args.data / "frameworks.dpak"
+    writer = StringPackWriter(output, args.codec)
+    source_bytes = 0
+    for name, path in sorted(results.items()):
+        writer.add(name, ResultWriter.read(path))
+        source_bytes += path.stat().st_size
+    writer.close()
+    logger.info(f"Packed {len(results)} frameworks ({len(writer.strings)} unique strings, {writer.codec}): "
+                f"{source_bytes / (1 << 20):.1f} MB -> {output.stat().st_size / (1 << 20):.1f} MB")
+    return 0
+
+
+def unpack_main(argv: List[str]) -> int:
+    """`deapplefy unpack`: convert a string pack back into per-framework results"""
+    parser = argparse.ArgumentParser(prog="deapplefy unpack", description="Expand a string pack into per-framework results")
+    parser.add_argument("pack", type=Path, help="Pack file")
+    parser.add_argument("--output", "-o", type=Path, default=Path("data"), help="Directory to write results to")
+    parser.add_argument("--format", choices=sorted(ResultWriter.FORMATS), default="json", help="Result format")
+    parser.add_argument("--framework", action="append", help="Only unpack this framework (repeatable)")
+    args = parser.parse_args(argv)
+
+    try:
+        reader = StringPackReader(args.pack)
+    except (OSError, ValueError) as e:
+        logger.error(f"Cannot read {args.pack}: {e}")
+        return 1
+    args.output.mkdir(parents=True, exist_ok=True)
+    writer = ResultWriter(args.output, args.format)
+    try:
+        names = args.framework or reader.frameworks()
+        for name in names:
+            if name not in reader:
+                logger.error(f"{name} is not in {args.pack}")
+                return 1
+            try:
+                data = reader.get(name)
+            except ValueError as e:
+                logger.error(str(e))
+                return 1
+            output = writer.open(name)
+            try:
+                for key, value in (data.items() if isinstance(data, dict) else [("data", data)]):
+                    output.write(key, value)
+            except BaseException:
+                output.abort()
+                raise
+            output.commit()
+            writer.remove_other_formats(name)
+    finally:
+        reader.close()
+    logger.info(f"Unpacked {len(names)} frameworks into {args.output}")
+    return 0
+
+
+COMMANDS = {
+    "query": query_main,
+    "diff": diff_main,
+    "merge": merge_main,
+    "site": site_main,
+    "pack": pack_main,
+    "unpack": unpack_main,
+}
+
+
+def main(argv: Optional[List[str]] = None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in COMMANDS:
+        return COMMANDS[argv[0]](argv[1:])
 
-def main():
     parser = argparse.ArgumentParser(description="Deapplefy - Apple Private Framework Documentation Generator")
     parser.add_argument("--output", "-o", type=Path, default=Path("data"), help="Output directory for JSON data")
     parser.add_argument("--limit", "-l", type=int, default=0, help="Limit frameworks (0=all)")
+    parser.add_argument("--jobs", "-j", type=int, default=1, help="Worker processes for layers 1-3 (1=sequential)")
+    parser.add_argument("--timeout", type=float, default=900, help="Per-framework timeout in seconds with --jobs (0=none)")
+    parser.add_argument("--usage-index", type=Path, help="Load/refresh/save the usage-layer consumer index at this path")
+    parser.add_argument("--no-cache", action="store_true", help="Disable the per-layer result cache")
+    parser.add_argument("--force", action="store_true", help="Recompute every layer, refreshing the cache")
+    parser.add_argument("--cache-size", type=int, default=2048, help="Result cache size cap in MB")
+    parser.add_argument("--cache-hash", action="store_true", help="Key the cache on binary content hashes instead of inode/size/mtime")
+    parser.add_argument("--dyld-cache", type=Path, help="dyld shared cache to read cache-only frameworks from (default: host cache)")
+    parser.add_argument("--no-dyld-cache", action="store_true", help="Only analyze frameworks with an on-disk binary")
+    parser.add_argument("--index-db", type=Path, help="SQLite index path (default: <output>/index.db)")
+    parser.add_argument("--no-index", action="store_true", help="Don't maintain the SQLite index")
+    parser.add_argument("--shard", help="Only process shard I of N (I/N, 1-based); combine with 'deapplefy merge'")
+    parser.add_argument("--format", choices=sorted(ResultWriter.FORMATS), default="json",
+                        help="Per-framework result format (json=pretty, jsonl=compact JSON Lines, jsonl.gz=gzip'd)")
+    parser.add_argument("--spool-ceiling", type=float, default=SpoolBudget.DEFAULT_CEILING / (1 << 20),
+                        help="MB of records a layer result holds in memory before spilling to disk (0=always spill)")
+    parser.add_argument("--write-buffer", type=float, default=8, help="Result writer buffer in MB, flushed to disk when full")
+    parser.add_argument("--llm-endpoint", help="OpenAI-compatible API base URL (e.g. http://localhost:8000/v1); enables class docs")
+    parser.add_argument("--llm-model", default="gpt-4o-mini", help="Model name sent to the LLM endpoint")
+    parser.add_argument("--llm-api-key-env", default="OPENAI_API_KEY", help="Environment variable holding the API key")
+    parser.add_argument("--llm-concurrency", type=int, default=4, help="Concurrent LLM requests")
+    parser.add_argument("--llm-batch-tokens", type=int, default=6000, help="Prompt token budget per request")
+    parser.add_argument("--llm-max-tokens", type=int, default=2048, help="Completion token limit per request")
+    parser.add_argument("--llm-token-budget", type=int, default=0, help="Total tokens the run may spend (0=unlimited)")
+    parser.add_argument("--profile", action="store_true", help="Time every layer and tool run and print a summary")
+    parser.add_argument("--trace", type=Path, help="Write profiling spans as a Chrome trace to this file (implies --profile)")
     parser.add_argument("--verbose", "-v", action="store_true", help="Verbose logging")
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     
     if args.verbose:
         logger.setLevel(logging.DEBUG)
+    shard = None
+    if args.shard:
+        try:
+            shard = ShardPlan.parse(args.shard)
+        except ValueError as e:
+            parser.error(str(e))
+    if args.profile or args.trace:
+        profiler.enable()
         
+    dyld_cache = None
+    if not args.no_dyld_cache:
+        dyld_cache = DyldSharedCache.register(args.dyld_cache or DyldSharedCache.find_default())
+
+    # One crawl of the framework and consumer trees, shared by every layer
+    snapshot_path = args.output / ".cache" / "filesystem.json"
+    snapshot = FileSnapshot() if args.no_cache or args.force else FileSnapshot.load(snapshot_path)
+    snapshot.crawl({**FrameworkScanner.crawl_roots(), **UsageAnalyzer.crawl_roots()})
+    if not args.no_cache:
+        snapshot.save(snapshot_path)
+
     # Components
-    scanner = FrameworkScanner()
-    static_analyzer = StaticAnalyzer()
-    usage_analyzer = UsageAnalyzer()
-    runtime_analyzer = RuntimeAnalyzer()
-    ai_documenter = AIDocumenter(args.output)
+    scanner = FrameworkScanner(snapshot)
+    spool_ceiling = int(args.spool_ceiling * (1 << 20))
+    static_analyzer = StaticAnalyzer(snapshot, spool_ceiling)
+    usage_analyzer = UsageAnalyzer(index_path=args.usage_index, snapshot=snapshot, spool_ceiling=spool_ceiling)
+    runtime_analyzer = RuntimeAnalyzer(scanner)
+    index = None if args.no_index else IndexDatabase(args.index_db or args.output / "index.db")
+    cache = None
+    if not args.no_cache:
+        cache = ResultCache(args.output / ".cache" / "results", args.cache_size << 20,
+                            refresh=args.force, hash_contents=args.cache_hash)
+    llm = None
+    if args.llm_endpoint:
+        llm = LLMDocumenter(args.llm_endpoint, args.llm_model, os.environ.get(args.llm_api_key_env),
+                            cache, args.llm_concurrency, args.llm_batch_tokens, args.llm_max_tokens,
+                            args.llm_token_budget)
+    ai_documenter = AIDocumenter(args.output, index, args.format, int(args.write_buffer * (1 << 20)), llm)
     
     # Scan
     frameworks = scanner.scan()
     if not frameworks:
+        ai_documenter.close()
         return 1
-        
+    if shard is not None:
+        frameworks = shard.select(frameworks, scanner)
+
+    # A framework whose bundle has nothing new, gone or changed in the snapshot and
+    # whose result was written from the same inputs is kept before any layer runs
+    inputs: Dict[str, str] = {}
+    usage_digest = None
+    unchanged = 0
+
+    def up_to_date(framework: Path, binary_path: Path) -> bool:
+        nonlocal usage_digest, unchanged
+        if cache is None:
+            return False
+        if usage_digest is None:
+            usage_digest = usage_analyzer.get_index().digest()
+        inputs[framework.stem] = framework_inputs(framework, binary_path, snapshot, cache, usage_digest, llm)
+        if not snapshot.incremental or snapshot.changed_under(framework):
+            return False
+        if not ai_documenter.unchanged(framework.stem, inputs[framework.stem]):
+            return False
+        logger.debug(f"Skipping {framework.name}: unchanged since the last run")
+        unchanged += 1
+        if shard is not None:
+            shard.record("unchanged", framework)
+        return True
+
     processed = 0
-    for framework in frameworks:
-        if args.limit > 0 and processed >= args.limit:
-            break
+    if args.jobs > 1:
+        # Resolve binaries up front so --limit selects the same frameworks as a sequential run
+        tasks = []
+        for framework in frameworks:
+            if args.limit > 0 and len(tasks) >= args.limit:
+                break
+            binary_path = scanner.get_binary_path(framework)
+            if not binary_path:
+                logger.warning(f"Skipping {framework.name}: No binary found")
+                if shard is not None:
+                    shard.record("skipped", framework)
+                continue
+            if up_to_date(framework, binary_path):
+                continue
+            tasks.append((framework, binary_path))
+
+        # Largest binaries first so the slowest frameworks don't start last
+        tasks.sort(key=lambda t: scanner.binary_size(t[1]), reverse=True)
+
+        failed = 0
+
+        def on_result(framework: Path, binary_path: Path, data: Dict[str, Any]):
+            nonlocal processed
+            # Layer 4
+            try:
+                with profiler.span("document", "layer", framework=framework.name):
+                    ai_documenter.generate(framework.stem, data, inputs=inputs.get(framework.stem))
+            finally:
+                RecordSpool.discard_all(data)
+            processed += 1
+            if shard is not None:
+                shard.record("processed", framework)
+
+        def on_failure(framework: Path, reason: str):
+            nonlocal failed
+            logger.error(f"Failed {framework.name}: {reason}")
+            failed += 1
+            if shard is not None:
+                shard.record("failed", framework)
+
+        logger.info(f"Processing {len(tasks)} frameworks with {args.jobs} workers...")
+        pipeline = FrameworkPipeline(args.jobs, args.timeout, logger.level, usage_analyzer.get_index(), cache,
+                                     dyld_cache.path if dyld_cache else None, profiler.enabled, snapshot,
+                                     spool_ceiling)
+        pipeline.run(tasks, on_result, on_failure)
+        if failed:
+            logger.warning(f"{failed} frameworks failed")
+    else:
+        for framework in frameworks:
+            if args.limit > 0 and processed >= args.limit:
+                break
+                
+            binary_path = scanner.get_binary_path(framework)
+            if not binary_path:
+                logger.warning(f"Skipping {framework.name}: No binary found")
+                if shard is not None:
+                    shard.record("skipped", framework)
+                continue
+            if up_to_date(framework, binary_path):
+                continue
+                
+            logger.info(f"Processing {framework.name}...")
             
-        binary_path = scanner.get_binary_path(framework)
-        if not binary_path:
-            logger.warning(f"Skipping {framework.name}: No binary found")
-            continue
+            # Each layer is streamed to the result file as soon as it is done
+            output = ai_documenter.begin(framework.stem)
+            try:
+                with profiler.span(framework.name, "framework"):
+                    data = analyze_framework(framework, binary_path, static_analyzer, usage_analyzer,
+                                             runtime_analyzer, cache=cache, emit=output.write)
+            except BaseException:
+                output.abort()
+                raise
             
-        logger.info(f"Processing {framework.name}...")
-        
-        # Collect data from all layers
-        data = {
-            "framework": framework.name,
-            "binary_path": str(binary_path)
-        }
-        
-        # Layer 1
-        data["static"] = static_analyzer.analyze(framework, binary_path)
-        
-        # Layer 2
-        data["usage"] = usage_analyzer.analyze(framework.stem, data["static"])
-        
-        # Layer 3
-        data["runtime"] = runtime_analyzer.analyze(framework)
-        
-        # Layer 4
-        ai_documenter.generate(framework.stem, data)
-        
-        processed += 1
+            # Layer 4
+            try:
+                with profiler.span("document", "layer", framework=framework.name):
+                    ai_documenter.generate(framework.stem, data, output, inputs.get(framework.stem))
+            finally:
+                RecordSpool.discard_all(data)
+            
+            processed += 1
+            if shard is not None:
+                shard.record("processed", framework)
         
-    logger.info(f"Processed {processed} frameworks")
+    if cache is not None:
+        if args.jobs <= 1:
+            logger.info(f"Cache: {cache.hits} hits, {cache.misses} misses")
+        cache.evict()
+    runtime_analyzer.close()
+    ai_documenter.close()
+    if llm is not None:
+        logger.info(f"LLM: {llm.requests} requests, ~{llm.tokens_used} tokens")
+    if shard is not None:
+        shard.save(args.output)
+    logger.info(f"Processed {processed} frameworks" + (f", {unchanged} unchanged" if unchanged else ""))
+    if profiler.enabled:
+        for line in profiler.summary():
+            logger.info(line)
+        if args.trace:
+            profiler.write_trace(args.trace)
+            logger.info(f"Trace written to {args.trace}")
     return 0
 
 
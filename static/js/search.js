@@ -0,0 +1,64 @@
+// Client for the prefix-sharded search index that `deapplefy` writes to static/search/.
+// index.json maps name prefixes to shard files; only the shards matching the query are fetched.
+(function () {
+  const script = document.currentScript;
+  const searchBase = new URL("../search/", script.src);
+  const siteBase = new URL("../", script.src);
+  const shards = new Map();
+  let manifest = null;
+
+  async function fetchJSON(url) {
+    const response = await fetch(url);
+    if (!response.ok) throw new Error(`${url}: ${response.status}`);
+    return response.json();
+  }
+
+  // Must match DocsSite._prefix
+  function normalize(text) {
+    return Array.from(text.toLowerCase()).map((c) => (/^[a-z0-9]$/.test(c) ? c : "_")).join("");
+  }
+
+  function shard(key) {
+    if (!shards.has(key)) {
+      shards.set(key, fetchJSON(new URL(manifest.shards[key].file, searchBase)));
+    }
+    return shards.get(key);
+  }
+
+  async function search(query, limit = 50) {
+    query = query.trim();
+    if (query.length < 2) return [];
+    manifest = manifest || (await fetchJSON(new URL("index.json", searchBase)));
+    const q = normalize(query);
+    const keys = Object.keys(manifest.shards).filter((k) => q.startsWith(k) || k.startsWith(q));
+    const lower = query.toLowerCase();
+    const hits = [];
+    for (const entries of await Promise.all(keys.map(shard))) {
+      for (const [name, kind, framework, url] of entries) {
+        if (name.toLowerCase().startsWith(lower)) hits.push({ name, kind, framework, url: new URL(url, siteBase).href });
+      }
+    }
+    hits.sort((a, b) => (a.name.length - b.name.length) || a.name.localeCompare(b.name));
+    return hits.slice(0, limit);
+  }
+
+  window.deapplefySearch = search;
+
+  const input = document.getElementById("deapplefy-search");
+  const results = document.getElementById("deapplefy-results");
+  if (!input || !results) return;
+  let pending = 0;
+  input.addEventListener("input", async () => {
+    const ticket = ++pending;
+    const hits = await search(input.value);
+    if (ticket !== pending) return;
+    results.replaceChildren(...hits.map((hit) => {
+      const item = document.createElement("li");
+      const link = document.createElement("a");
+      link.href = hit.url;
+      link.textContent = hit.name;
+      item.append(link, ` — ${hit.kind.startsWith("method:") ? `method of ${hit.kind.slice(7)}` : hit.kind} in ${hit.framework}`);
+      return item;
+    }));
+  });
+})();
@@ -0,0 +1,48 @@
+"""Shared fixtures; the tests run anywhere, using synthetic Mach-O images from `benchmarks.corpus`."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.corpus import MachOBuilder, generate  # noqa: E402
+from benchmarks.tools import install_tools, tool_environment  # noqa: E402
+
+SAMPLE_INSTALL_NAME = "/System/Library/PrivateFrameworks/Sample.framework/Versions/A/Sample"
+
+
+@pytest.fixture
+def write_binary(tmp_path):
+    """Write bytes to a file under tmp_path and return its path"""
+    def write(data: bytes, name: str = "binary") -> Path:
+        path = tmp_path / name
+        path.write_bytes(data)
+        return path
+    return write
+
+
+@pytest.fixture
+def sample_builder():
+    """Factory for a dylib with a local class hierarchy, an external superclass and selector/class refs"""
+    def build(chained: bool = False, **kwargs) -> MachOBuilder:
+        builder = MachOBuilder(install_name=SAMPLE_INSTALL_NAME, chained=chained, **kwargs)
+        builder.add_library("/usr/lib/libobjc.A.dylib")
+        builder.add_class("SampleBase", "NSObject", ["start", "setValue:"], ["sharedInstance"])
+        builder.add_class("SampleChild", "SampleBase", ["stop"])
+        builder.add_selector_ref("start")
+        builder.add_class_ref("NSString")
+        builder.add_class_ref("SampleBase")
+        builder.add_symbol("_objc_msgSend", defined=False)
+        return builder
+    return build
+
+
+@pytest.fixture
+def framework(tmp_path, monkeypatch):
+    """One generated framework bundle, with the stand-in tools on PATH"""
+    for key, value in tool_environment(install_tools(tmp_path / "bin")).items():
+        monkeypatch.setenv(key, value)
+    corpus = generate(tmp_path / "root", frameworks=1, apps=0)
+    return Path(corpus["framework_paths"][0]) / "Bench00000.framework"
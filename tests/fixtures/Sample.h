@@ -0,0 +1,61 @@
+//
+//     Generated by class-dump 3.5 (64 bit).
+//
+//     class-dump is Copyright (C) 1997-1998, 2000-2001, 2004-2013 by Steve Nygard.
+//
+
+#pragma mark Blocks
+
+typedef void (^CDUnknownBlockType)(void); // return type and parameters are unknown
+
+#pragma mark Named Structures
+
+struct CGSize {
+    double width;
+    double height;
+};
+
+#pragma mark -
+
+//
+// File: /System/Library/PrivateFrameworks/Sample.framework/Versions/A/Sample
+// UUID: 00112233-4455-6677-8899-AABBCCDDEEFF
+//
+
+@protocol SampleDelegate <NSObject>
+- (void)sampleDidStart:(id)arg1;
+
+@optional
+- (void)sample:(id)arg1 didFinishWithError:(NSError *)arg2;
+@property(readonly, nonatomic) long long priority;
+@end
+
+@interface SampleBase : NSObject <SampleDelegate, NSCopying>
+{
+    NSString *_name;
+    long long _count;
+    struct CGSize _size;
+    char _flags[4];
+}
+
+/* Some class-dump builds emit block comments
+   spanning several lines */
++ (id)sharedInstance;
+@property(copy, nonatomic) NSString *name; // @synthesize name=_name;
+@property(readonly) long long count;
+- (void)setValue:(id)arg1 forKey:(NSString *)arg2 completion:(CDUnknownBlockType)arg3;
+- (struct CGSize)size;
+- (void)start;
+
+@end
+
+@interface SampleBase (Debugging)
+- (id)debugDescription;
+@end
+
+@interface SampleChild : SampleBase
+{
+}
+
+- (void)stop;
+- (void)stopWithReason:
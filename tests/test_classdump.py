@@ -0,0 +1,158 @@
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from deapplefy import ClassDumpParser, RecordSpool, ResultCache, ResultWriter, RuntimeAnalyzer, iter_lines
+from benchmarks.tools import install_tools, tool_environment
+
+FIXTURE = Path(__file__).parent / "fixtures" / "Sample.h"
+
+
+def python_proc(code: str) -> subprocess.Popen:
+    return subprocess.Popen([sys.executable, "-c", code], stdout=subprocess.PIPE)
+
+
+@pytest.fixture
+def records():
+    with open(FIXTURE) as f:
+        return list(ClassDumpParser().parse(f))
+
+
+def test_blocks(records):
+    assert [(r["kind"], r["name"]) for r in records] == [
+        ("protocol", "SampleDelegate"), ("interface", "SampleBase"),
+        ("category", "SampleBase"), ("interface", "SampleChild")]
+
+
+def test_interface(records):
+    base = records[1]
+    assert (base["superclass"], base["category"], base["protocols"]) == ("NSObject", None, ["SampleDelegate", "NSCopying"])
+    assert base["ivars"] == [{"type": "NSString *", "name": "_name"}, {"type": "long long", "name": "_count"},
+                             {"type": "struct CGSize", "name": "_size"}, {"type": "char [4]", "name": "_flags"}]
+    assert base["properties"] == [
+        {"type": "NSString *", "name": "name", "attributes": ["copy", "nonatomic"]},
+        {"type": "long long", "name": "count", "attributes": ["readonly"]}]
+    assert [(m["name"], m["return_type"], m["class_method"]) for m in base["methods"]] == [
+        ("sharedInstance", "id", True), ("setValue:forKey:completion:", "void", False),
+        ("size", "struct CGSize", False), ("start", "void", False)]
+    assert "truncated" not in base
+
+
+def test_protocol_and_category(records):
+    protocol, _base, category, _child = records
+    assert protocol["protocols"] == ["NSObject"]
+    assert [(m["name"], m["optional"]) for m in protocol["methods"]] == [
+        ("sampleDidStart:", False), ("sample:didFinishWithError:", True)]
+    assert protocol["properties"][0]["name"] == "priority"
+    assert (category["category"], category["superclass"]) == ("Debugging", None)
+    assert [m["name"] for m in category["methods"]] == ["debugDescription"]
+
+
+def test_truncated_block(records):
+    child = records[-1]
+    assert child["truncated"] is True
+    assert [m["name"] for m in child["methods"]] == ["stop", "stopWithReason:"]
+
+
+def test_records_are_returned_as_blocks_end():
+    parser = ClassDumpParser()
+    assert parser.feed("@interface Foo : NSObject") is None
+    assert parser.feed("- (void)bar;") is None
+    record = parser.feed("@end")
+    assert record["name"] == "Foo" and [m["name"] for m in record["methods"]] == ["bar"]
+    assert parser.close() is None
+    assert parser.records == 1
+
+
+def test_parse_is_lazy():
+    lines = iter(["@interface A : NSObject", "@end", "@interface B : NSObject", "@end"])
+    parsed = ClassDumpParser().parse(lines)
+    assert next(parsed)["name"] == "A"
+    # Only A's lines have been read when A comes out
+    assert next(lines) == "@interface B : NSObject"
+
+
+def test_iter_lines():
+    proc = python_proc("import sys; sys.stdout.write('one\\ntwo\\nlast')")
+    assert list(iter_lines(proc, idle_timeout=10)) == [b"one\n", b"two\n", b"last"]
+    assert proc.wait() == 0
+
+
+def test_iter_lines_idle_timeout():
+    proc = python_proc("import sys, time; print('first', flush=True); time.sleep(30)")
+    lines = iter_lines(proc, idle_timeout=0.5)
+    assert next(lines) == b"first\n"
+    start = time.monotonic()
+    with pytest.raises(subprocess.TimeoutExpired):
+        next(lines)
+    assert time.monotonic() - start < 10
+    assert proc.wait(timeout=5) is not None
+
+
+def test_iter_lines_total_timeout():
+    proc = python_proc("import time\nwhile True:\n    print('tick', flush=True)\n    time.sleep(0.05)")
+    with pytest.raises(subprocess.TimeoutExpired) as e:
+        for _line in iter_lines(proc, idle_timeout=10, total_timeout=0.5):
+            pass
+    assert e.value.timeout == 0.5
+    proc.wait(timeout=5)
+
+
+def test_class_dump_layer_spools_records(tmp_path, monkeypatch):
+    for key, value in tool_environment(install_tools(tmp_path / "bin")).items():
+        monkeypatch.setenv(key, value)
+    monkeypatch.setenv("DEAPPLEFY_BENCH_CLASSES", "3")
+    data = RuntimeAnalyzer()._analyze_with_class_dump(tmp_path / "Sample.framework")
+    headers = data["headers"]
+    try:
+        assert isinstance(headers, RecordSpool) and len(headers) == 4
+        assert [r["name"] for r in headers] == ["SampleDelegate", "SampleClass000", "SampleClass001", "SampleClass002"]
+        assert data["dump_size"] > 0 and "error" not in data
+    finally:
+        headers.discard()
+    assert not headers.path.exists()
+
+
+def test_spool_written_like_a_list(tmp_path, records):
+    spool, empty = RecordSpool(), RecordSpool()
+    for record in records:
+        spool.append(record)
+    runtime = {"method": "class-dump", "headers": spool, "none": empty, "dump_size": 1}
+    expected = {**runtime, "headers": records, "none": []}
+    try:
+        for fmt in ResultWriter.FORMATS:
+            output = ResultWriter(tmp_path, fmt).open("Sample")
+            output.write("framework", "Sample.framework")
+            output.write("runtime", runtime)
+            output.commit()
+            if fmt == "json":
+                assert output.path.read_text() == json.dumps(
+                    {"framework": "Sample.framework", "runtime": expected}, indent=2)
+            assert ResultWriter.read(output.path)["runtime"] == expected
+    finally:
+        spool.discard()
+        empty.discard()
+
+
+def test_spool_cached_beside_entry(tmp_path, records):
+    cache = ResultCache(tmp_path / "cache")
+    spool = RecordSpool()
+    for record in records:
+        spool.append(record)
+    cache.put("ab" * 32, {"method": "class-dump", "headers": spool})
+    spool.discard()
+
+    value = cache.get("ab" * 32)
+    assert value["method"] == "class-dump"
+    assert isinstance(value["headers"], RecordSpool) and not value["headers"].owned
+    assert list(value["headers"]) == records
+
+    # The entry and its records are evicted together
+    cache.max_bytes = 0
+    cache.evict()
+    assert not list((tmp_path / "cache").glob("*/*"))
+    assert cache.get("ab" * 32) is None
@@ -0,0 +1,43 @@
+import json
+
+from deapplefy import SnapshotManifest, changelog_markdown, diff_snapshots
+
+
+def write_snapshot(directory, frameworks):
+    """One data/ directory with a pretty JSON result per framework: name -> {class: [selectors]}"""
+    directory.mkdir(parents=True)
+    for name, classes in frameworks.items():
+        data = {"framework": f"{name}.framework", "static": {"classes": [
+            {"classname": cls, "super": "NSObject", "methods": [{"name": sel} for sel in selectors]}
+            for cls, selectors in classes.items()]}}
+        (directory / f"{name}.json").write_text(json.dumps(data, indent=2))
+    return directory
+
+
+def test_diff_finds_added_class(tmp_path):
+    old = write_snapshot(tmp_path / "old", {"Alpha": {"AlphaWidget": ["start"]}, "Gone": {"GoneThing": []}})
+    new = write_snapshot(tmp_path / "new", {"Alpha": {"AlphaWidget": ["start", "stop"], "AlphaStore": ["load"]},
+                                            "Fresh": {"FreshThing": []}})
+    report = diff_snapshots(old, new)
+
+    assert report["frameworks"]["added"] == ["Fresh"] and report["frameworks"]["removed"] == ["Gone"]
+    alpha = report["frameworks"]["changed"]["Alpha"]
+    assert alpha["classes"]["added"] == ["AlphaStore"]
+    assert alpha["classes"]["changed"]["AlphaWidget"]["methods"]["added"] == ["-stop"]
+    assert report["summary"]["classes_added"] == 1 and report["summary"]["methods_added"] == 1
+
+    page = changelog_markdown(report, "old", "new")
+    assert "title: old → new" in page
+    assert "- **+** `AlphaStore`" in page and "  - + method `-stop`" in page
+    assert "- [Fresh](../../docs/fresh/)" in page and "- Gone" in page
+
+
+def test_diff_leaves_snapshots_alone(tmp_path):
+    old = write_snapshot(tmp_path / "old", {"Alpha": {"AlphaWidget": []}})
+    new = write_snapshot(tmp_path / "new", {"Alpha": {"AlphaWidget": []}})
+    assert diff_snapshots(old, new)["summary"]["frameworks_unchanged"] == 1
+    assert sorted(p.name for p in old.iterdir()) == sorted(p.name for p in new.iterdir()) == ["Alpha.json"]
+
+    diff_snapshots(old, new, save_manifests=True)
+    assert set(SnapshotManifest.load(old, complete=False).frameworks) == {"Alpha"}
+    assert (new / SnapshotManifest.FILENAME).exists()
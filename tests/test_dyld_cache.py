@@ -0,0 +1,228 @@
+import logging
+import struct
+
+import pytest
+
+from deapplefy import DyldCacheImage, DyldSharedCache, MachOFile, ObjCMetadataReader
+from benchmarks.corpus import BASE_ADDRESS, PAGE
+
+CACHE_BASE = BASE_ADDRESS - PAGE
+INSTALL_NAME = "/System/Library/PrivateFrameworks/Sample.framework/Versions/A/Sample"
+HEADER_SIZE = 0x200
+# Offset of the selector base from the cache base, and selector -> offset from it
+SELECTOR_BASE = 0x800
+SELECTORS = {"directAlpha": -0x40, "directBeta:": 0x10}
+SLIDE = {2: "v2", 3: "v3", 5: "v5"}
+
+
+def encode_pointer(version: int, target: int, index: int) -> int:
+    """On-disk form of a rebased pointer for a slide info version; every other v3/v5 slot is authenticated"""
+    if version == 2:
+        # value_add is CACHE_BASE; bits in delta_mask carry the chain
+        return (target - CACHE_BASE) | (1 << 40)
+    if version == 3:
+        if index % 2:
+            return (1 << 63) | (0x1234 << 32) | (1 << 51) | (target - CACHE_BASE)
+        return (2 << 51) | target
+    return ((1 << 63) if index % 2 else 0) | (1 << 52) | (target - CACHE_BASE)
+
+
+def slide_info(version: int, first_slot: int) -> bytes:
+    if version == 2:
+        # version, page_size, page_starts_offset, page_starts_count, extras_offset, extras_count, delta_mask, value_add
+        return struct.pack("<6I2QH", 2, PAGE, 40, 1, 0, 0, 0x00ffff0000000000, CACHE_BASE, first_slot // 4)
+    # v3/v5: version, page_size, page_starts_count, pad, (auth_)value_add, page_starts[]
+    return struct.pack("<4IQH", version, PAGE, 1, 0, CACHE_BASE, first_slot)
+
+
+def header(mapping_count: int) -> bytearray:
+    buf = bytearray(PAGE)
+    buf[0:16] = b"dyld_v1  arm64e\0"
+    struct.pack_into("<2I", buf, DyldSharedCache.HEADER_MAPPING_OFFSET, HEADER_SIZE, mapping_count)
+    return buf
+
+
+def use_direct_selectors(image: bytearray, builder, class_name: str, selectors) -> None:
+    """Point a class's method list at a relative, direct-selector list placed in spare __TEXT space"""
+    macho = MachOFile(bytes(image))
+    reader = ObjCMetadataReader(macho)
+    cls = next(c for c in reader.read()["classes"] if c["classname"] == class_name)
+    slot = reader._class_ro(cls["addr"]) + 32
+    types = BASE_ADDRESS + bytes(image).index(b"v16@0:8\0")
+
+    text = macho.segment("__TEXT")
+    list_addr = text["vmaddr"] + text["filesize"] - 8 - 12 * len(selectors)
+    struct.pack_into("<2I", image, list_addr - BASE_ADDRESS, 12 | ObjCMetadataReader.SMALL_METHODS
+                     | ObjCMetadataReader.DIRECT_SELECTORS, len(selectors))
+    for i, offset in enumerate(selectors):
+        entry = list_addr + 8 + 12 * i
+        struct.pack_into("<3i", image, entry - BASE_ADDRESS, offset, types - (entry + 4), 0)
+    builder.fixups[slot] = list_addr
+
+
+def build_cache(directory, builder, version: int, subcache: bool = True, direct_selectors: bool = False,
+                selector_base: bool = True):
+    """Write a split cache: the header, image table and __TEXT in the main file,
+    __DATA/__LINKEDIT plus their slide info in `.01`. Returns the main file's path.
+
+    With `direct_selectors`, SampleChild's methods become a relative method list
+    naming SELECTORS by offset from the selector base recorded in the ObjC
+    optimization header (left out with `selector_base=False`).
+    """
+    assert builder.install_name == INSTALL_NAME
+    image = bytearray(builder.build())
+    text = next(seg for seg in MachOFile(bytes(image)).segments if seg["name"] == "__TEXT")
+    text_size = text["filesize"]
+    if direct_selectors:
+        use_direct_selectors(image, builder, "SampleChild", list(SELECTORS.values()))
+
+    slots = sorted(addr for addr, target in builder.fixups.items() if isinstance(target, int))
+    for i, addr in enumerate(slots):
+        struct.pack_into("<Q", image, addr - BASE_ADDRESS, encode_pointer(version, builder.fixups[addr], i))
+
+    main = header(2)
+    struct.pack_into("<3Q2I", main, HEADER_SIZE, CACHE_BASE, PAGE, 0, 5, 5)
+    struct.pack_into("<3Q2I", main, HEADER_SIZE + 32, BASE_ADDRESS, text_size, PAGE, 5, 5)
+    # One image, listed under the new images array
+    images, paths = 0x300, 0x340
+    struct.pack_into("<2I", main, DyldSharedCache.HEADER_IMAGES, images, 1)
+    struct.pack_into("<3Q2I", main, images, BASE_ADDRESS, 0, 0, paths, 0)
+    main[paths:paths + len(INSTALL_NAME) + 1] = INSTALL_NAME.encode() + b"\0"
+    # dyld_subcache_entry: uuid, cacheVMOffset, fileSuffix
+    subcaches = 0x280
+    struct.pack_into("<2I", main, DyldSharedCache.HEADER_SUBCACHES, subcaches, 1)
+    struct.pack_into("<16sQ32s", main, subcaches, b"\x11" * 16, BASE_ADDRESS + text_size - CACHE_BASE, b".01")
+    main[DyldSharedCache.HEADER_UUID:DyldSharedCache.HEADER_UUID + 16] = bytes(range(16))
+    # Selector strings sit around the selector base, which the ObjC optimization header points at
+    for name, offset in SELECTORS.items():
+        main[SELECTOR_BASE + offset:SELECTOR_BASE + offset + len(name) + 1] = name.encode() + b"\0"
+    if selector_base:
+        objc_opts = 0x400
+        struct.pack_into("<2Q", main, DyldSharedCache.HEADER_OBJC_OPTS, objc_opts, 56)
+        struct.pack_into("<2I6Q", main, objc_opts, 1, 0, 0, 0, 0, 0, 0, SELECTOR_BASE)
+
+    sub = header(1)
+    rest = bytes(image[text_size:])
+    slide_offset = PAGE + len(rest)
+    struct.pack_into("<3Q2I", sub, HEADER_SIZE, BASE_ADDRESS + text_size, len(rest), PAGE, 3, 3)
+    # dyld_cache_mapping_and_slide_info for the data mapping
+    struct.pack_into("<2I", sub, DyldSharedCache.HEADER_SLIDE_MAPPINGS, 0x240, 1)
+    struct.pack_into("<6Q2I", sub, 0x240, BASE_ADDRESS + text_size, len(rest), PAGE,
+                     slide_offset, 64, 0, 3, 3)
+
+    path = directory / "dyld_shared_cache_arm64e"
+    path.write_bytes(bytes(main) + bytes(image[:text_size]))
+    if subcache:
+        first = slots[0] - BASE_ADDRESS - text_size
+        (directory / (path.name + ".01")).write_bytes(bytes(sub) + rest + slide_info(version, first % PAGE))
+    return path
+
+
+@pytest.fixture(params=sorted(SLIDE), ids=SLIDE.values())
+def cache(request, tmp_path, sample_builder):
+    builder = sample_builder()
+    cache = DyldSharedCache(build_cache(tmp_path, builder, request.param))
+    cache.builder = builder
+    cache.expected_version = request.param
+    yield cache
+    cache.close()
+
+
+def test_header_and_image_lookup(cache):
+    assert cache.arch == "arm64e"
+    assert cache.uuid == bytes(range(16)).hex().upper()
+    assert cache.base_address == CACHE_BASE
+    assert cache.images() == [INSTALL_NAME]
+    assert cache.has_image(INSTALL_NAME)
+    assert not cache.has_image("/usr/lib/libMissing.dylib")
+    assert cache.image("/usr/lib/libMissing.dylib") is None
+
+    image = cache.image(INSTALL_NAME)
+    assert isinstance(image, DyldCacheImage)
+    assert image.install_name == INSTALL_NAME
+    assert image.libraries == ["/usr/lib/libobjc.A.dylib"]
+    # The symbol table lives in __LINKEDIT, which is in the sub-cache
+    assert "_OBJC_CLASS_$_SampleBase" in {name for name, *_rest in image.iter_symbols()}
+
+
+def test_split_mappings(cache):
+    (main_path, main), (sub_path, sub) = cache._files
+    assert sub_path.name == main_path.name + ".01"
+    assert cache.resolve(CACHE_BASE)[0] is main
+    assert cache.resolve(BASE_ADDRESS) == (main, PAGE)
+    data = cache.image(INSTALL_NAME).segment("__DATA")
+    assert cache.resolve(data["vmaddr"]) == (sub, PAGE)
+    assert cache.resolve(CACHE_BASE - 1) is None
+    assert cache.resolve(1 << 40) is None
+
+
+def test_slide_info_version(cache):
+    assert cache.slide_version == cache.expected_version
+    assert cache._value_add == CACHE_BASE
+
+
+def test_pointer_rebasing(cache):
+    image = cache.image(INSTALL_NAME)
+    rebases = {addr: target for addr, target in cache.builder.fixups.items() if isinstance(target, int)}
+    assert rebases
+    for addr, target in rebases.items():
+        assert image.read_pointer(addr) == (target, None), hex(addr)
+    # Bound slots were left unresolved in the fixture: they read as NULL, not as a bogus address
+    for addr in set(cache.builder.fixups) - set(rebases):
+        assert image.read_pointer(addr) == (None, None)
+
+
+def test_objc_metadata_from_cache(cache):
+    classes = ObjCMetadataReader(cache.image(INSTALL_NAME)).read()["classes"]
+    assert [(c["classname"], c["super"]) for c in classes] == [("SampleBase", []), ("SampleChild", ["SampleBase"])]
+    assert [m["name"] for m in classes[0]["methods"]] == ["start", "setValue:", "sharedInstance"]
+
+
+def test_macho_open_falls_back_to_registered_cache(tmp_path, sample_builder):
+    path = build_cache(tmp_path, sample_builder(), 2)
+    try:
+        assert DyldSharedCache.register(path) is DyldSharedCache.current
+        image = MachOFile.open(INSTALL_NAME)
+        assert isinstance(image, DyldCacheImage) and image.path == INSTALL_NAME
+        assert MachOFile.open("/System/Library/PrivateFrameworks/Missing.framework/Missing") is None
+    finally:
+        DyldSharedCache.current.close()
+        DyldSharedCache.register(None)
+    assert DyldSharedCache.current is None
+
+
+def test_missing_subcache(tmp_path, sample_builder, caplog):
+    path = build_cache(tmp_path, sample_builder(), 2, subcache=False)
+    with caplog.at_level(logging.WARNING):
+        cache = DyldSharedCache(path)
+    assert "Missing dyld sub-cache" in caplog.text
+    assert cache.images() == [INSTALL_NAME]
+    assert cache.slide_version == 0
+    cache.close()
+
+
+def test_not_a_cache(write_binary, sample_builder):
+    with pytest.raises(ValueError):
+        DyldSharedCache(write_binary(sample_builder().build()))
+    assert DyldSharedCache.register(write_binary(b"\0" * 64, "bogus")) is None
+
+
+@pytest.mark.parametrize("selector_base", [True, False], ids=["with-base", "without-base"])
+def test_direct_selectors(tmp_path, sample_builder, selector_base):
+    cache = DyldSharedCache(build_cache(tmp_path, sample_builder(), 3, direct_selectors=True,
+                                       selector_base=selector_base))
+    try:
+        assert cache.selector_base == (CACHE_BASE + SELECTOR_BASE if selector_base else None)
+        classes = {c["classname"]: c for c in ObjCMetadataReader(cache.image(INSTALL_NAME)).read()["classes"]}
+        child = classes["SampleChild"]
+        if selector_base:
+            assert [(m["name"], m["types"]) for m in child["methods"]] == [
+                ("directAlpha", "v16@0:8"), ("directBeta:", "v16@0:8")]
+            assert "unresolved_methods" not in child
+        else:
+            # Never guess: without the base the methods are counted, not named
+            assert child["methods"] == [] and child["unresolved_methods"] == 2
+        assert [m["name"] for m in classes["SampleBase"]["methods"]] == ["start", "setValue:", "sharedInstance"]
+        assert "unresolved_methods" not in classes["SampleBase"]
+    finally:
+        cache.close()
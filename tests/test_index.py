@@ -0,0 +1,68 @@
+import sqlite3
+
+import pytest
+
+from deapplefy import IndexDatabase
+
+
+def framework_data(name, classes, symbols=()):
+    return {
+        "framework": f"{name}.framework",
+        "binary_path": f"/System/Library/PrivateFrameworks/{name}.framework/{name}",
+        "static": {
+            "classes": [{"classname": cls, "super": "NSObject", "methods": [{"name": f"{cls[:1].lower()}{cls[1:]}Start"}]}
+                        for cls in classes],
+            "swift_metadata": {"symbols": [{"name": sym, "demname": sym} for sym in symbols]},
+            "binary_info": {"libraries": ["/usr/lib/libobjc.A.dylib"]},
+        },
+    }
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = IndexDatabase(tmp_path / "index.db")
+    index.add_framework("Alpha", framework_data("Alpha", ["AlphaWidget", "AlphaStore"], ["_alpha_init"]))
+    index.add_framework("Beta", framework_data("Beta", ["BetaWidget"]))
+    yield index
+    index.close()
+
+
+def test_query_returns_defining_framework(index):
+    assert index.query("class", "AlphaStore") == [{"framework": "Alpha", "class": "AlphaStore", "superclass": "NSObject"}]
+    assert index.query("method", "betaWidgetStart") == [
+        {"framework": "Beta", "class": "BetaWidget", "method": "betaWidgetStart"}]
+    assert [r["framework"] for r in index.query("symbol", "_alpha_init")] == ["Alpha"]
+    assert index.query("links", "libobjc") and index.query("class", "Missing") == []
+
+
+def test_search_follows_replaced_frameworks(index):
+    if not index.has_fts:
+        pytest.skip("SQLite without FTS5")
+    assert sorted((r["framework"], r["kind"], r["name"]) for r in index.query("search", "AlphaW")) == [
+        ("Alpha", "class", "AlphaWidget"), ("Alpha", "method", "alphaWidgetStart")]
+    assert [r["framework"] for r in index.query("search", "BetaWidget")] == ["Beta", "Beta"]
+    index.add_framework("Alpha", framework_data("Alpha", ["AlphaGadget"]))
+    assert index.query("search", "AlphaW") == [] and index.query("search", "_alpha_init") == []
+    assert {r["name"] for r in index.query("search", "AlphaG")} == {"AlphaGadget", "alphaGadgetStart"}
+    assert [r["framework"] for r in index.query("search", "BetaWidget")] == ["Beta", "Beta"]
+
+
+def test_old_names_table_is_rebuilt(tmp_path):
+    path = tmp_path / "index.db"
+    IndexDatabase(path).close()
+    conn = sqlite3.connect(str(path))
+    try:
+        conn.execute("DROP TABLE names")
+        conn.execute("CREATE VIRTUAL TABLE names USING fts5(name, kind UNINDEXED, framework UNINDEXED)")
+    except sqlite3.OperationalError:
+        pytest.skip("SQLite without FTS5")
+    conn.execute("INSERT INTO frameworks (id, name) VALUES (1, 'Alpha')")
+    conn.execute("INSERT INTO classes (framework_id, name) VALUES (1, 'AlphaWidget')")
+    conn.commit()
+    conn.close()
+
+    index = IndexDatabase(path)
+    try:
+        assert [(r["framework"], r["kind"]) for r in index.query("search", "AlphaWidget")] == [("Alpha", "class")]
+    finally:
+        index.close()
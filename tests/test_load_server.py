@@ -0,0 +1,106 @@
+import concurrent.futures
+import json
+import os
+import shutil
+import signal
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from deapplefy import LoadServer
+
+pytestmark = pytest.mark.skipif(not sys.platform.startswith("linux") or shutil.which("cc") is None,
+                                reason="needs Linux and a C compiler")
+
+SOURCES = {
+    "plain": "int answer(void) { return 42; }\n",
+    "hang": "#include <unistd.h>\n"
+            "__attribute__((constructor)) static void init(void) { for (;;) sleep(1); }\n",
+    "crash": "#include <stdlib.h>\n"
+             "__attribute__((constructor)) static void init(void) { abort(); }\n",
+}
+
+
+@pytest.fixture(scope="module")
+def libraries(tmp_path_factory):
+    """Shared objects built from SOURCES: name -> path"""
+    directory = tmp_path_factory.mktemp("so")
+    built = {}
+    for name, source in SOURCES.items():
+        (directory / f"{name}.c").write_text(source)
+        built[name] = directory / f"lib{name}.so"
+        subprocess.run(["cc", "-shared", "-fPIC", "-o", str(built[name]), str(directory / f"{name}.c")],
+                       check=True, capture_output=True)
+    (directory / "notelf.so").write_bytes(b"not a shared object")
+    built["notelf"] = directory / "notelf.so"
+    return built
+
+
+@pytest.fixture
+def server():
+    server = LoadServer()
+    yield server
+    server.close()
+
+
+def test_load(server, libraries):
+    report = server.load(libraries["plain"])
+    assert report["status"] == "loaded"
+    assert str(libraries["plain"]) in report["images"]
+    # Loaded in a child: the next load starts from the same clean state
+    assert str(libraries["plain"]) in server.load(libraries["plain"])["images"]
+
+
+def test_load_failed(server, libraries):
+    report = server.load(libraries["notelf"])
+    assert report["status"] == "load_failed" and report["error"]
+
+
+def test_timeout(server, libraries):
+    assert server.load(libraries["hang"], timeout=0.5) == {"status": "timeout"}
+    assert server.load(libraries["plain"])["status"] == "loaded"
+
+
+def test_crash(server, libraries):
+    report = server.load(libraries["crash"])
+    assert report["status"] == "crashed" and report["signal"] == 6
+    assert server.load(libraries["plain"])["status"] == "loaded"
+
+
+def test_concurrent_loads(server, libraries):
+    futures = [server.submit(libraries[name], timeout=1) for name in ("hang", "plain", "crash", "plain")]
+    assert [f.result(15)["status"] for f in futures] == ["timeout", "loaded", "crashed", "loaded"]
+
+
+def test_server_crash_restarts(server, libraries):
+    waiting = server.submit(libraries["hang"], timeout=30)
+    old = server._proc
+    old.kill()
+    old.wait()
+    assert waiting.result(10) == {"status": "error", "error": "load server exited"}
+    # A fresh server takes over; the dead one's reader can't fail its requests
+    assert server.load(libraries["plain"])["status"] == "loaded"
+    assert server._proc is not old
+
+
+def test_wedged_server_replaced(server, libraries, monkeypatch):
+    monkeypatch.setattr(LoadServer, "REPLY_MARGIN", 0.5)
+    assert server.load(libraries["plain"])["status"] == "loaded"
+    wedged = server._proc
+    os.kill(wedged.pid, signal.SIGSTOP)
+    with pytest.raises(concurrent.futures.TimeoutError):
+        server.load(libraries["plain"], timeout=0.5)
+    assert wedged.poll() is not None and server._proc is not wedged
+    assert not any(server._pending.values())
+    assert server.load(libraries["plain"])["status"] == "loaded"
+
+
+def test_malformed_requests():
+    requests = b'not json\n{"id": 7}\n\n["path"]\n'
+    proc = subprocess.run([sys.executable, "-c", "import deapplefy; deapplefy.LoadServer.serve()"], input=requests,
+                          capture_output=True, cwd=Path(__file__).resolve().parent.parent, timeout=30)
+    assert proc.returncode == 0
+    replies = [json.loads(line) for line in proc.stdout.splitlines()]
+    assert [(r["id"], r["status"]) for r in replies] == [(None, "error"), (7, "error"), (None, "error")]
@@ -0,0 +1,115 @@
+import struct
+
+import pytest
+
+from deapplefy import MachOFile
+from benchmarks.corpus import (CPU_SUBTYPE_ARM64_ALL, CPU_SUBTYPE_X86_64_ALL, CPU_TYPE_ARM64, CPU_TYPE_X86_64,
+                               FAT_MAGIC, MachOBuilder, fat_macho)
+
+
+def class_addresses(macho):
+    return [macho.read_pointer(sect["addr"] + 8 * i)[0]
+            for sect in macho.sections_named("__objc_classlist") for i in range(sect["size"] // 8)]
+
+
+def test_thin_header_and_load_commands(write_binary, sample_builder):
+    macho = MachOFile.open(write_binary(sample_builder().build()))
+    assert macho.arch == "arm64"
+    assert macho.is64 and macho.filetype == MachOFile.MH_DYLIB
+    assert macho.install_name.endswith("Sample.framework/Versions/A/Sample")
+    assert macho.libraries == ["/usr/lib/libobjc.A.dylib"]
+    assert [seg["name"] for seg in macho.segments] == ["__TEXT", "__DATA", "__LINKEDIT"]
+    assert macho.section("__DATA", "__objc_selrefs")["size"] == 8
+    info = macho.info()
+    assert info["bits"] == 64 and info["arch"] == "arm" and info["lang"] == "objc"
+    macho.close()
+
+
+def test_symbol_table(write_binary, sample_builder):
+    macho = MachOFile.open(write_binary(sample_builder().build()))
+    names = {name for name, *_rest in macho.iter_symbols()}
+    assert {"_OBJC_CLASS_$_SampleBase", "_OBJC_METACLASS_$_SampleChild"} <= names
+    assert set(macho.undefined_symbols()) == {"_objc_msgSend", "_OBJC_CLASS_$_NSObject", "_OBJC_CLASS_$_NSString"}
+
+
+def test_fat_slice_selection(write_binary):
+    def image(cputype, cpusubtype, name):
+        builder = MachOBuilder(cputype=cputype, cpusubtype=cpusubtype, install_name=f"/usr/lib/{name}.dylib")
+        builder.add_symbol(f"_{name}_marker")
+        return cputype, cpusubtype, builder.build()
+
+    path = write_binary(fat_macho([image(CPU_TYPE_X86_64, CPU_SUBTYPE_X86_64_ALL, "intel"),
+                                   image(CPU_TYPE_ARM64, CPU_SUBTYPE_ARM64_ALL, "arm")]))
+    with open(path, "rb") as f:
+        assert [s["arch"] for s in MachOFile.fat_slices(f.read())] == ["x86_64", "arm64"]
+
+    preferred = MachOFile.open(path)
+    assert preferred.arch == "arm64" and preferred.install_name == "/usr/lib/arm.dylib"
+    assert preferred.fat_archs == ["x86_64", "arm64"]
+    # File offsets inside the slice are relative to the slice, not the fat file
+    assert [name for name, *_rest in preferred.iter_symbols()] == ["_arm_marker"]
+
+    explicit = MachOFile.open(path, arch="x86_64")
+    assert explicit.arch == "x86_64" and explicit.install_name == "/usr/lib/intel.dylib"
+    assert [name for name, *_rest in explicit.iter_symbols()] == ["_intel_marker"]
+
+
+def test_not_macho(write_binary):
+    assert MachOFile.open(write_binary(b"\x7fELF" + b"\0" * 60)) is None
+    # Java class files share the fat magic
+    assert MachOFile.open(write_binary(struct.pack(">2I", FAT_MAGIC, 0x34) + b"\0" * 56, "Main.class")) is None
+    assert MachOFile.open(write_binary(b"", "empty")) is None
+
+
+@pytest.mark.parametrize("chained", [False, True], ids=["bind-opcodes", "chained-fixups"])
+def test_pointer_fixups(write_binary, sample_builder, chained):
+    macho = MachOFile.open(write_binary(sample_builder(chained).build()))
+    assert macho.has_load_command(MachOFile.LC_DYLD_CHAINED_FIXUPS) == chained
+    assert macho.has_load_command(MachOFile.LC_DYLD_INFO_ONLY) != chained
+
+    base, child = class_addresses(macho)
+    data = macho.segment("__DATA")
+    assert data["vmaddr"] <= base < child < data["vmaddr"] + data["vmsize"]
+    # isa points at the metaclass, also in __DATA
+    meta, bound = macho.read_pointer(base)
+    assert bound is None and data["vmaddr"] <= meta < data["vmaddr"] + data["vmsize"]
+    # Superclass slots: a bind to NSObject and a rebase to the local base class
+    assert macho.read_pointer(base + 8) == (None, "_OBJC_CLASS_$_NSObject")
+    assert macho.read_pointer(child + 8) == (base, None)
+    # An empty slot (cache pointer) stays NULL
+    assert macho.read_pointer(base + 16) == (None, None)
+
+    classrefs = macho.section("__DATA", "__objc_classrefs")
+    assert macho.read_pointer(classrefs["addr"]) == (None, "_OBJC_CLASS_$_NSString")
+    assert macho.read_pointer(classrefs["addr"] + 8) == (base, None)
+    selref, _ = macho.read_pointer(macho.section("__DATA", "__objc_selrefs")["addr"])
+    assert macho.read_cstring(selref) == "start"
+
+
+def test_chained_imports_and_format(write_binary, sample_builder):
+    macho = MachOFile.open(write_binary(sample_builder(True).build()))
+    assert macho._chained_format() == MachOFile.PTR_64_OFFSET
+    assert macho._chained_imports() == ["_OBJC_CLASS_$_NSObject", "_OBJC_CLASS_$_NSString"]
+
+
+def test_bind_opcodes(write_binary, sample_builder):
+    macho = MachOFile.open(write_binary(sample_builder().build()))
+    base, _child = class_addresses(macho)
+    classrefs = macho.section("__DATA", "__objc_classrefs")
+    assert macho._classic_binds() == {
+        base + 8: "_OBJC_CLASS_$_NSObject",
+        classrefs["addr"]: "_OBJC_CLASS_$_NSString",
+    }
+
+
+@pytest.mark.parametrize("auth", [False, True], ids=["bind", "auth-bind"])
+@pytest.mark.parametrize("fmt, ordinal_bits", [(MachOFile.PTR_ARM64E, 16), (MachOFile.PTR_ARM64E_USERLAND, 16),
+                                               (MachOFile.PTR_ARM64E_USERLAND24, 24)])
+def test_arm64e_bind_ordinals(write_binary, sample_builder, fmt, ordinal_bits, auth):
+    macho = MachOFile.open(write_binary(sample_builder(chained=True).build()))
+    macho._chained_import_names = [f"_import{i}" for i in range(0x10002)]
+    # Bind bit, auth bit, and for auth binds a key/diversity that must not leak into the ordinal
+    raw = (1 << 62) | (auth << 63) | ((0x2a << 32) if auth else 0) | 0x10001
+    expected = 0x10001 if ordinal_bits == 24 else 0x0001
+    assert macho._decode_chained(raw, fmt) == (None, f"_import{expected}")
+    macho.close()
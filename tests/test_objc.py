@@ -0,0 +1,50 @@
+import pytest
+
+from deapplefy import MachOFile, ObjCMetadataReader
+from benchmarks.corpus import MachOBuilder
+
+
+@pytest.fixture(params=[False, True], ids=["bind-opcodes", "chained-fixups"])
+def reader(request, write_binary, sample_builder):
+    macho = MachOFile.open(write_binary(sample_builder(request.param).build()))
+    yield ObjCMetadataReader(macho)
+    macho.close()
+
+
+def test_classes(reader):
+    assert reader.has_objc()
+    result = reader.read()
+    assert result["protocols"] == [] and result["selector_refs"] == 1
+    base, child = result["classes"]
+
+    assert (base["classname"], base["super"], base["lang"]) == ("SampleBase", ["NSObject"], "objc")
+    assert [(m["name"], m["types"], m["class_method"]) for m in base["methods"]] == [
+        ("start", "v16@0:8", False), ("setValue:", "@16@0:8", False), ("sharedInstance", "v16@0:8", True)]
+    assert base["instance_size"] == 16
+    assert base["fields"] == base["properties"] == base["protocols"] == []
+    assert "unresolved_methods" not in base
+
+    # A local superclass is resolved through its class_ro_t, not a symbol
+    assert (child["classname"], child["super"]) == ("SampleChild", ["SampleBase"])
+    assert [m["name"] for m in child["methods"]] == ["stop"]
+
+
+def test_references(reader):
+    assert reader.selectors() == ["start"]
+    assert reader.class_refs() == ["NSString", "SampleBase"]
+    assert reader.class_refs(imported_only=True) == ["NSString"]
+
+
+def test_consumer_without_class_metadata(write_binary):
+    builder = MachOBuilder()
+    builder.add_selector_ref("description")
+    builder.add_selector_ref("init")
+    reader = ObjCMetadataReader(MachOFile.open(write_binary(builder.build())))
+    assert reader.read()["classes"] == []
+    assert reader.selectors() == ["description", "init"]
+    assert reader.class_refs() == []
+
+
+def test_empty_sections(write_binary):
+    reader = ObjCMetadataReader(MachOFile.open(write_binary(MachOBuilder().build())))
+    assert reader.read() == {"classes": [], "protocols": [], "selector_refs": 0}
@@ -0,0 +1,106 @@
+
+import pytest
+
+from deapplefy import StringPack, StringPackReader, StringPackWriter, unpack_main
+
+DATA = {
+    "Alpha": {"framework": "Alpha.framework", "static": {"classes": [{"classname": "A", "methods": []}]},
+              "numbers": [0, 1, -1, 1 << 40, 2.5], "flags": [True, False, None]},
+    "Beta": {"framework": "Beta.framework", "static": {"classes": []}, "usage": {"used_by": []}},
+}
+
+
+@pytest.fixture(params=["none", "zlib"])
+def pack(request, tmp_path):
+    path = tmp_path / "snapshot.dpak"
+    writer = StringPackWriter(path, request.param)
+    for name, data in DATA.items():
+        writer.add(name, data)
+    writer.close()
+    return path
+
+
+def header(path):
+    return list(StringPack.HEADER.unpack_from(path.read_bytes(), 0))
+
+
+def rewrite_header(path, **fields):
+    names = ["magic", "version", "codec", "count", "strings_offset", "string_count", "index_offset",
+             "index_length", "dict_offset", "dict_length"]
+    values = dict(zip(names, header(path)))
+    values.update(fields)
+    raw = bytearray(path.read_bytes())
+    StringPack.HEADER.pack_into(raw, 0, *[values[n] for n in names])
+    path.write_bytes(bytes(raw))
+
+
+def test_round_trip(pack):
+    reader = StringPackReader(pack)
+    try:
+        assert reader.frameworks() == ["Alpha", "Beta"]
+        assert "Alpha" in reader and "Gamma" not in reader
+        for name, data in DATA.items():
+            assert reader.get(name) == data
+    finally:
+        reader.close()
+
+
+@pytest.mark.parametrize("fields, message", [
+    ({"magic": b"NOPE"}, "not a deapplefy string pack"),
+    ({"codec": 9}, "unknown codec 9"),
+    ({"index_length": 1 << 30}, "index at offset"),
+    ({"count": 3}, "runs past the index end"),
+    ({"count": 1}, "expected"),
+    ({"string_count": 1}, "string id"),
+])
+def test_corrupt_header(pack, fields, message):
+    rewrite_header(pack, **fields)
+    with pytest.raises(ValueError, match=message):
+        StringPackReader(pack)
+
+
+def test_truncated_file(pack):
+    pack.write_bytes(pack.read_bytes()[:20])
+    with pytest.raises(ValueError, match="not a deapplefy string pack"):
+        StringPackReader(pack)
+
+
+def test_corrupt_record(tmp_path):
+    path = tmp_path / "snapshot.dpak"
+    writer = StringPackWriter(path, "none")
+    writer.add("Alpha", {"key": "value"})
+    writer.close()
+    raw = bytearray(path.read_bytes())
+    # The uncompressed record starts right after the header: DICT tag, count, key id, STR tag, value id
+    record = StringPack.HEADER.size
+    assert raw[record] == StringPack.DICT
+    raw[record + 3] = 42
+    path.write_bytes(bytes(raw))
+    reader = StringPackReader(path)
+    try:
+        with pytest.raises(ValueError, match="Unknown value tag 42 at offset 3"):
+            reader.get("Alpha")
+    finally:
+        reader.close()
+
+
+def test_record_does_not_decompress(tmp_path):
+    path = tmp_path / "snapshot.dpak"
+    writer = StringPackWriter(path, "zlib")
+    writer.add("Alpha", {"key": "value"})
+    writer.close()
+    raw = bytearray(path.read_bytes())
+    raw[StringPack.HEADER.size:StringPack.HEADER.size + 4] = b"\xff" * 4
+    path.write_bytes(bytes(raw))
+    reader = StringPackReader(path)
+    try:
+        with pytest.raises(ValueError, match=f"at offset {StringPack.HEADER.size} does not decompress"):
+            reader.get("Alpha")
+    finally:
+        reader.close()
+
+
+def test_unpack_reports_corrupt_pack(pack, tmp_path, caplog):
+    rewrite_header(pack, index_length=1 << 30)
+    assert unpack_main([str(pack), "-o", str(tmp_path / "out")]) == 1
+    assert "index at offset" in caplog.text
@@ -0,0 +1,92 @@
+import json
+import random
+import shutil
+from pathlib import Path
+
+import pytest
+
+from deapplefy import FrameworkScanner, ResultWriter, ShardPlan, UsageAnalyzer, main
+from benchmarks.corpus import generate
+from benchmarks.tools import install_tools, tool_environment
+
+
+class SizedScanner:
+    """Just what ShardPlan.select asks of a scanner: a binary per framework and its size"""
+
+    def __init__(self, sizes):
+        self.sizes = sizes
+
+    def get_binary_path(self, framework):
+        return framework / framework.stem if framework in self.sizes else None
+
+    def binary_size(self, binary_path):
+        return self.sizes[binary_path.parent]
+
+
+def test_select_covers_every_framework_once():
+    rng = random.Random(7)
+    frameworks = [Path(f"/System/Library/PrivateFrameworks/F{i:03d}.framework") for i in range(60)]
+    scanner = SizedScanner({f: rng.choice([1, 10, 1000, 50000]) for f in frameworks[:-5]})
+    plans = [ShardPlan(index, 4) for index in range(1, 5)]
+    shards = [plan.select(frameworks, scanner) for plan in plans]
+
+    assert sorted(f for shard in shards for f in shard) == frameworks
+    for shard in shards:
+        assert shard == [f for f in frameworks if f in shard]   # scan order is kept
+    assert len({plan.corpus_digest for plan in plans}) == 1
+    assert sum(plan.weight for plan in plans) == sum(scanner.sizes.values())
+    assert max(plan.weight for plan in plans) < 2 * min(plan.weight for plan in plans)
+
+    # Another host listing the frameworks in another order gets the same split
+    shuffled = frameworks[:]
+    rng.shuffle(shuffled)
+    again = [ShardPlan(index, 4).select(shuffled, scanner) for index in range(1, 5)]
+    assert [sorted(shard) for shard in again] == [sorted(shard) for shard in shards]
+
+
+def test_parse():
+    assert (ShardPlan.parse("2/3").index, ShardPlan.parse("2/3").count) == (2, 3)
+    for spec in ("0/3", "4/3", "1", "a/b"):
+        with pytest.raises(ValueError):
+            ShardPlan.parse(spec)
+
+
+@pytest.fixture
+def shard_outputs(tmp_path, monkeypatch):
+    """Output directories of a two-shard run over a generated corpus"""
+    for key, value in tool_environment(install_tools(tmp_path / "bin")).items():
+        monkeypatch.setenv(key, value)
+    corpus = generate(tmp_path / "root", frameworks=6, apps=0)
+    monkeypatch.setattr(FrameworkScanner, "FRAMEWORK_PATHS", corpus["framework_paths"])
+    monkeypatch.setattr(UsageAnalyzer, "SCAN_PATHS", [])
+    outputs = [tmp_path / f"shard{index}" / "data" for index in (1, 2)]
+    for index, output in enumerate(outputs, 1):
+        assert main(["-o", str(output), "--no-dyld-cache", "--no-cache", "--no-index", "--shard", f"{index}/2"]) == 0
+    return outputs
+
+
+def test_merge(tmp_path, shard_outputs):
+    plans = [json.loads((output / ShardPlan.FILENAME).read_text()) for output in shard_outputs]
+    assert sorted(plans[0]["processed"] + plans[1]["processed"]) == [f"Bench{i:05d}" for i in range(6)]
+
+    merged = tmp_path / "merged" / "data"
+    assert main(["merge", *map(str, shard_outputs), "-o", str(merged), "--no-index"]) == 0
+    assert sorted(ResultWriter.find(merged)) == [f"Bench{i:05d}" for i in range(6)]
+    assert json.loads((merged / "manifest.json").read_text())["frameworks"].keys() == set(ResultWriter.find(merged))
+
+
+def test_merge_rejects_overlapping_shards(tmp_path, shard_outputs, caplog):
+    first, second = shard_outputs
+    stray = next(iter(ResultWriter.find(first).values()))
+    shutil.copy2(stray, second / stray.name)
+
+    merged = tmp_path / "merged" / "data"
+    assert main(["merge", str(first), str(second), "-o", str(merged), "--no-index"]) == 1
+    assert f"{stray.stem} was processed by more than one shard" in caplog.text
+    assert not merged.exists()
+
+
+def test_merge_rejects_missing_shard(tmp_path, shard_outputs, caplog):
+    merged = tmp_path / "merged" / "data"
+    assert main(["merge", str(shard_outputs[0]), "-o", str(merged), "--no-index"]) == 1
+    assert "expected shards 1..2, got [1]" in caplog.text
@@ -0,0 +1,70 @@
+import os
+import plistlib
+
+from deapplefy import (FileSnapshot, FrameworkScanner, RecordSpool, ResultCache, ResultWriter, RuntimeAnalyzer,
+                       StaticAnalyzer, UsageAnalyzer, UsageIndex, analyze_framework, main)
+
+
+def test_fingerprint_follows_bundle_files(framework):
+    before = FileSnapshot().crawl({str(framework): ()}, quiet=True).fingerprint(framework)
+    assert FileSnapshot().crawl({str(framework): ()}, quiet=True).fingerprint(framework) == before
+    (framework / "Resources" / "Extra.plist").write_bytes(plistlib.dumps({}))
+    assert FileSnapshot().crawl({str(framework): ()}, quiet=True).fingerprint(framework) != before
+
+
+def test_static_key_covers_unsealed_plists(tmp_path, framework):
+    cache = ResultCache(tmp_path / "cache")
+    runs = []
+
+    def analyze():
+        static = StaticAnalyzer(FileSnapshot())
+        run = static.analyze
+        static.analyze = lambda *args: runs.append(args) or run(*args)
+        data = analyze_framework(framework, framework / framework.stem, static, UsageAnalyzer(UsageIndex()),
+                                 RuntimeAnalyzer(FrameworkScanner()), cache=cache)
+        RecordSpool.discard_all(data)
+
+    analyze()
+    analyze()
+    assert len(runs) == 1
+    # CodeResources is untouched, the bundle is not
+    (framework / "Resources" / "Defaults.plist").write_bytes(plistlib.dumps({"Changed": True}))
+    analyze()
+    assert len(runs) == 2
+
+
+def test_restat_reports_touched_file(tmp_path, framework):
+    path = tmp_path / "filesystem.json"
+    root = str(framework.parent)
+    FileSnapshot().crawl({root: ()}, quiet=True).save(path)
+    assert not FileSnapshot.load(path).crawl({root: ()}, quiet=True).changed
+
+    info = framework / "Versions" / "A" / "Resources" / "Info.plist"
+    os.utime(info, ns=(info.stat().st_atime_ns, info.stat().st_mtime_ns + 10 ** 9))
+    (framework / "Versions" / "A" / "Resources" / "Defaults.plist").unlink()
+    snapshot = FileSnapshot.load(path).crawl({root: ()}, quiet=True)
+    assert snapshot.incremental
+    assert snapshot.changed == {str(info), str(framework / "Versions" / "A" / "Resources" / "Defaults.plist")}
+    assert snapshot.changed_under(framework) and snapshot.changed_under(framework / "Versions")
+    assert not snapshot.changed_under(framework / "Versions" / "A" / "_CodeSignature")
+
+
+def test_unchanged_frameworks_skip_every_layer(tmp_path, framework, monkeypatch):
+    monkeypatch.setattr(FrameworkScanner, "FRAMEWORK_PATHS", [str(framework.parent)])
+    monkeypatch.setattr(UsageAnalyzer, "SCAN_PATHS", [])
+    runs = []
+    analyze = StaticAnalyzer.analyze
+    monkeypatch.setattr(StaticAnalyzer, "analyze", lambda self, *args: runs.append(args) or analyze(self, *args))
+    output = tmp_path / "out" / "data"
+
+    assert main(["-o", str(output), "--no-dyld-cache", "--no-index"]) == 0
+    assert main(["-o", str(output), "--no-dyld-cache", "--no-index"]) == 0
+    assert len(runs) == 1
+    assert ResultWriter.read(output / "Bench00000.json")["framework"] == framework.name
+    # A changed file in the bundle brings the framework back
+    (framework / "Resources" / "Defaults.plist").write_bytes(plistlib.dumps({"Changed": True}))
+    assert main(["-o", str(output), "--no-dyld-cache", "--no-index"]) == 0
+    assert len(runs) == 2
+    # So does asking for another format (its layers come from the result cache)
+    assert main(["-o", str(output), "--no-dyld-cache", "--no-index", "--format", "jsonl"]) == 0
+    assert ResultWriter.find(output) == {"Bench00000": output / "Bench00000.jsonl"}
@@ -0,0 +1,47 @@
+import json
+
+from deapplefy import FileSnapshot, RecordSpool, ResultCache, ResultWriter, StaticAnalyzer
+
+
+def test_static_layer_without_r2(tmp_path, framework, monkeypatch, caplog):
+    monkeypatch.setenv("PATH", str(tmp_path / "empty"))
+    static = StaticAnalyzer(FileSnapshot())
+    assert not static.has_r2 and "radare2 not installed" in caplog.text
+    data = static.analyze(framework, framework / framework.stem)
+    assert data["classes"] and data["binary_info"]["libraries"]["libs"]
+
+    # Not a Mach-O: the r2 fallbacks are skipped rather than started
+    junk = tmp_path / "junk"
+    junk.write_bytes(b"not a binary")
+    data = static.analyze(framework, junk)
+    assert data["classes"] == [] and data["binary_info"] == {} and not static.r2._sessions
+
+
+def test_static_layer_spills_past_ceiling(tmp_path, framework):
+    binary = framework / framework.stem
+    in_memory = StaticAnalyzer(FileSnapshot(), spool_ceiling=None).analyze(framework, binary)
+    spilled = StaticAnalyzer(FileSnapshot(), spool_ceiling=0).analyze(framework, binary)
+    spools = dict((".".join(path), spool) for path, spool in RecordSpool.nested(spilled))
+    try:
+        assert not list(RecordSpool.nested(in_memory))
+        assert {"classes", "swift_metadata.symbols.name", "structure.files", "structure.plists"} <= spools.keys()
+        assert spools["structure.plists"].mapping
+        for fmt in ResultWriter.FORMATS:
+            output = ResultWriter(tmp_path, fmt).open("Sample")
+            output.write("static", spilled)
+            output.commit()
+            if fmt == "json":
+                assert output.path.read_text() == json.dumps({"static": in_memory}, indent=2)
+            assert ResultWriter.read(output.path) == {"static": in_memory}
+
+        cache = ResultCache(tmp_path / "cache")
+        cache.put("cd" * 32, spilled)
+        cached = cache.get("cd" * 32)
+        assert {".".join(path) for path, _spool in RecordSpool.nested(cached)} == spools.keys()
+        output = ResultWriter(tmp_path, "json").open("Cached")
+        output.write("static", cached)
+        output.commit()
+        assert ResultWriter.read(output.path) == {"static": in_memory}
+    finally:
+        RecordSpool.discard_all(spilled)
+    assert not any(spool.path.exists() for spool in spools.values())
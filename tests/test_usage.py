@@ -0,0 +1,54 @@
+from pathlib import Path
+
+import pytest
+
+from deapplefy import FileSnapshot, RecordSpool, SpoolBudget, StaticAnalyzer, UsageAnalyzer
+from benchmarks.corpus import generate
+
+
+@pytest.fixture(scope="module")
+def corpus(tmp_path_factory):
+    return generate(tmp_path_factory.mktemp("corpus"), frameworks=3, apps=30, classes=6, methods=6, seed=3)
+
+
+def usage_of(corpus, name, monkeypatch, spool_ceiling=SpoolBudget.DEFAULT_CEILING):
+    monkeypatch.setattr(UsageAnalyzer, "SCAN_PATHS", corpus["app_paths"])
+    snapshot = FileSnapshot()
+    framework = Path(corpus["framework_paths"][0]) / f"{name}.framework"
+    static = StaticAnalyzer(snapshot).analyze(framework, framework / name)
+    return UsageAnalyzer(snapshot=snapshot, spool_ceiling=spool_ceiling).analyze(name, static)
+
+
+def expected_ranking(used_by):
+    callers = {}
+    for consumer in used_by:
+        for cls, selectors in consumer["calls"].items():
+            for selector in selectors:
+                callers[(cls, selector)] = callers.get((cls, selector), 0) + 1
+    return [{"class": cls, "selector": selector, "callers": count}
+            for (cls, selector), count in sorted(callers.items(), key=lambda item: (-item[1], item[0]))]
+
+
+def test_api_ranking_counts_calling_binaries(corpus, monkeypatch):
+    usage = usage_of(corpus, "Bench00001", monkeypatch)
+    ranking = usage["api_ranking"]
+    assert ranking and ranking == expected_ranking(usage["used_by"])
+    assert ranking[0]["callers"] > 1
+    assert all(r["callers"] <= len(usage["used_by"]) for r in ranking)
+
+
+def test_api_ranking_keeps_the_top(corpus, monkeypatch):
+    monkeypatch.setattr(UsageAnalyzer, "RANKING_SIZE", 3)
+    usage = usage_of(corpus, "Bench00001", monkeypatch)
+    assert usage["api_ranking"] == expected_ranking(usage["used_by"])[:3]
+
+
+def test_used_by_spills_past_ceiling(corpus, monkeypatch):
+    usage = usage_of(corpus, "Bench00001", monkeypatch)
+    spilled = usage_of(corpus, "Bench00001", monkeypatch, spool_ceiling=0)
+    try:
+        assert isinstance(spilled["used_by"], RecordSpool)
+        assert list(spilled["used_by"]) == usage["used_by"]
+        assert spilled["api_ranking"] == usage["api_ranking"]
+    finally:
+        RecordSpool.discard_all(spilled)
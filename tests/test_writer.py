@@ -0,0 +1,90 @@
+import json
+
+import pytest
+
+from deapplefy import DocsSite, FrameworkOutput, RecordSpool, ResultWriter
+
+DATA = {
+    "framework": "Sample.framework",
+    "binary_path": "/System/Library/PrivateFrameworks/Sample.framework/Sample",
+    "static": {"classes": [{"classname": "A", "methods": [], "super": ["NSObject"]}],
+               "binary_info": {"arch": "arm64", "libraries": ["/usr/lib/libobjc.A.dylib"]},
+               "plists": {}, "notes": None},
+    "usage": {"used_by": [], "api_ranking": []},
+    "runtime": [],
+    "docs": {},
+}
+
+
+@pytest.mark.parametrize("fmt", sorted(ResultWriter.FORMATS))
+def test_round_trip(tmp_path, fmt):
+    output = ResultWriter(tmp_path, fmt, max_buffer=16).open("Sample")
+    for key, value in DATA.items():
+        output.write(key, value)
+    # Nothing is visible under the final name until commit()
+    assert not output.path.exists()
+    output.commit()
+    assert ResultWriter.read(output.path) == DATA
+    assert output.counters["bytes"] > 0
+    if fmt == "json":
+        assert output.path.read_text() == json.dumps(DATA, indent=2)
+
+
+def test_empty_top_level_list_survives_jsonl(tmp_path):
+    output = ResultWriter(tmp_path, "jsonl").open("Sample")
+    output.write("runtime", [])
+    output.commit()
+    assert output.path.read_text() == '{"path":[],"fields":{"runtime":[]}}\n'
+    assert ResultWriter.read(output.path) == {"runtime": []}
+
+
+def test_abort_leaves_nothing(tmp_path):
+    output = ResultWriter(tmp_path, "jsonl.gz").open("Sample")
+    output.write("framework", "Sample.framework")
+    output.abort()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_one_format_per_framework(tmp_path):
+    for fmt in ("json", "jsonl"):
+        writer = ResultWriter(tmp_path, fmt)
+        output = writer.open("Sample")
+        output.write("framework", fmt)
+        output.commit()
+        writer.remove_other_formats("Sample")
+    assert [p.name for p in tmp_path.iterdir()] == ["Sample.jsonl"]
+    assert ResultWriter.find(tmp_path) == {"Sample": tmp_path / "Sample.jsonl"}
+
+
+def test_summary_counters(tmp_path):
+    headers = RecordSpool()
+    for name in ("A", "B"):
+        headers.append({"kind": "interface", "name": name})
+    layers = {**DATA, "static": {**DATA["static"], "swift_metadata": {"is_swift": True}},
+              "usage": {"used_by": [{"path": "/Applications/App.app"}]},
+              "runtime": {"method": "class-dump", "headers": headers, "dump_size": 10}}
+    output = ResultWriter(tmp_path, "jsonl").open("Sample")
+    try:
+        for key, value in layers.items():
+            output.write(key, value)
+        output.commit()
+    finally:
+        headers.discard()
+    summary = output.counters["summary"]
+    assert summary == {
+        "binary_path": DATA["binary_path"],
+        "static": {"classes_count": 1, "swift_enabled": True},
+        "usage": {"used_by_count": 1},
+        "runtime": {"method": "class-dump", "headers": 2, "dump_size": 10},
+    }
+    assert FrameworkOutput.summarize(ResultWriter.read(output.path)) == summary
+    assert FrameworkOutput.summarize({}) == FrameworkOutput.empty_summary()
+
+
+def test_site_summary_comes_from_counters(tmp_path):
+    site = DocsSite(tmp_path, tmp_path / "site.json")
+    summary = {**FrameworkOutput.empty_summary(), "binary_path": "/counted"}
+    site.framework("Sample", DATA, summary, "Sample.json")
+    page = (tmp_path / "content" / "docs" / "Sample" / "_index.md").read_text()
+    assert json.dumps(summary, indent=2) in page
+    assert DATA["binary_path"] not in page